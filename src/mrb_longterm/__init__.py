@@ -5,4 +5,24 @@ __all__ = [
     "importance_tables",
     "io",
     "config",
+    "hierarchy",
+    "gap_index",
+    "outputs",
+    "stages",
+    "validation",
+    "aio",
+    "diff",
+    "spill",
+    "columnar",
+    "snapshot",
+    "partitioned",
+    "whatif",
+    "constraints",
+    "standards",
+    "adjacency",
+    "spool",
+    "progress",
+    "assets",
+    "engines",
+    "decay",
 ]
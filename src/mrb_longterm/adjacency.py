@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import ModuleConfig
+from .io import load_zone_adjacency
+from .models import ExposureCounts, Phase1Output, ZoneHazardResult
+
+
+@dataclass(frozen=True)
+class ZoneGraph:
+    """
+    Undirected zone adjacency in CSR form: the neighbours of zone row i are
+    neighbors[offsets[i]:offsets[i + 1]] (rows follow `zone_ids`).
+    """
+    zone_ids: List[str]
+    zone_row: Dict[str, int]
+    offsets: array
+    neighbors: array
+
+    def neighbours_of(self, zone_id: str) -> List[str]:
+        i = self.zone_row[zone_id]
+        return [self.zone_ids[j] for j in self.neighbors[self.offsets[i]:self.offsets[i + 1]]]
+
+
+def build_zone_graph(zone_ids: List[str], edges: Iterable[Tuple[str, str]]) -> ZoneGraph:
+    """CSR by counting sort over the edge list; self loops are ignored."""
+    zone_row = {z: i for i, z in enumerate(zone_ids)}
+    src = array("i")
+    dst = array("i")
+    unknown = set()
+    for a, b in edges:
+        ia, ib = zone_row.get(a), zone_row.get(b)
+        if ia is None or ib is None:
+            unknown.update(z for z in (a, b) if z not in zone_row)
+            continue
+        if ia != ib:
+            src.append(ia)
+            dst.append(ib)
+    if unknown:
+        raise ValueError(f"zone_adjacency.json references unknown zones: {sorted(unknown)[:10]}")
+
+    n = len(zone_ids)
+    degree = array("i", bytes(4 * (n + 1)))
+    for i in src:
+        degree[i + 1] += 1
+    for i in dst:
+        degree[i + 1] += 1
+    for i in range(n):
+        degree[i + 1] += degree[i]
+    offsets = array("i", degree)
+    fill = array("i", degree[:n])
+    neighbors = array("i", bytes(4 * offsets[n]))
+    for a, b in zip(src, dst):
+        neighbors[fill[a]] = b
+        fill[a] += 1
+        neighbors[fill[b]] = a
+        fill[b] += 1
+    return ZoneGraph(zone_ids=list(zone_ids), zone_row=zone_row, offsets=offsets, neighbors=neighbors)
+
+
+def load_zone_graph(input_dir: Path, zoning: List[ZoneHazardResult]) -> Optional[ZoneGraph]:
+    edges = load_zone_adjacency(input_dir)
+    if edges is None:
+        return None
+    return build_zone_graph([z.zone_id for z in zoning], edges)
+
+
+def multi_source_bfs(
+    graph: ZoneGraph,
+    sources: List[int],
+    max_hops: int,
+    targets: Optional[set] = None,
+) -> Tuple[array, array]:
+    """
+    Hop distance to the nearest source (-1 beyond max_hops) and that source's
+    row, for every zone. Stops early once every row in `targets` is reached.
+    """
+    n = len(graph.zone_ids)
+    dist = array("i", [-1]) * n
+    origin = array("i", [-1]) * n
+    for s in sources:
+        dist[s] = 0
+        origin[s] = s
+    pending = None if targets is None else {t for t in targets if dist[t] < 0}
+    offsets, neighbors = graph.offsets, graph.neighbors
+    frontier = list(sources)
+    hop = 0
+    while frontier and hop < max_hops and (pending is None or pending):
+        hop += 1
+        nxt = []
+        for u in frontier:
+            o = origin[u]
+            for j in range(offsets[u], offsets[u + 1]):
+                v = neighbors[j]
+                if dist[v] < 0:
+                    dist[v] = hop
+                    origin[v] = o
+                    nxt.append(v)
+                    if pending is not None:
+                        pending.discard(v)
+        frontier = nxt
+    return dist, origin
+
+
+def nearest_other_source(
+    graph: ZoneGraph,
+    sources: List[int],
+    max_hops: int,
+    targets: Optional[set] = None,
+) -> Tuple[array, array]:
+    """
+    Like multi_source_bfs, but a source zone's own entry is the nearest
+    *other* source. Each zone keeps up to two labels from distinct sources
+    (so it is expanded at most twice): the second one is the answer for a
+    zone whose first label is itself.
+    """
+    n = len(graph.zone_ids)
+    dist = [array("i", [-1]) * n, array("i", [-1]) * n]
+    origin = [array("i", [-1]) * n, array("i", [-1]) * n]
+    for s in sources:
+        dist[0][s] = 0
+        origin[0][s] = s
+    pending = None if targets is None else set(targets)
+    offsets, neighbors = graph.offsets, graph.neighbors
+    frontier = [(s, s) for s in sources]
+    hop = 0
+    while frontier and hop < max_hops and (pending is None or pending):
+        hop += 1
+        nxt = []
+        for u, o in frontier:
+            for j in range(offsets[u], offsets[u + 1]):
+                v = neighbors[j]
+                if dist[0][v] < 0:
+                    label = 0
+                elif dist[1][v] < 0 and origin[0][v] != o:
+                    label = 1
+                else:
+                    continue
+                dist[label][v] = hop
+                origin[label][v] = o
+                nxt.append((v, o))
+                if pending is not None and o != v:
+                    pending.discard(v)
+        frontier = nxt
+
+    out_dist, out_origin = dist[0], origin[0]
+    for s in sources:
+        out_dist[s] = dist[1][s]
+        out_origin[s] = origin[1][s]
+    return out_dist, out_origin
+
+
+def gap_coverage_doc(
+    phase1: Phase1Output,
+    graph: Optional[ZoneGraph],
+    zoning: List[ZoneHazardResult],
+    counts: List[ExposureCounts],
+    cfg: ModuleConfig,
+) -> Dict[str, Any]:
+    """
+    Marks each Phase 1 gap "covered" when another zone that has the element
+    type (and whose hazard class may serve neighbours) is within
+    phase1_coverage_hops, else "uncovered". A zone short of its planning
+    standard never covers itself. One bounded multi-source BFS per gap type:
+    O(types x edges), not a search per gap.
+    """
+    if graph is None:
+        raise ValueError("phase1_gap_coverage needs input/zone_adjacency.json")
+    max_hops = int(cfg.phase1_coverage_hops)
+    providers = set(cfg.phase1_coverage_provider_classes)
+    hazard_by_zone = {z.zone_id: z.hazard_class for z in zoning}
+
+    gaps = list(phase1.gaps)
+    targets_by_type: Dict[str, set] = {}
+    for g in gaps:
+        targets_by_type.setdefault(g.element_type, set()).add(graph.zone_row[g.zone_id])
+
+    sources_by_type: Dict[str, List[int]] = {t: [] for t in targets_by_type}
+    for c in counts:
+        row = graph.zone_row.get(c.zone_id)
+        if row is None or hazard_by_zone.get(c.zone_id) not in providers:
+            continue
+        for etype, n in c.counts_by_type.items():
+            if n > 0 and etype in sources_by_type:
+                sources_by_type[etype].append(row)
+
+    reach = {}
+    for t, targets in targets_by_type.items():
+        # only under planning standards can a gap zone hold the type itself
+        search = nearest_other_source if targets.intersection(sources_by_type[t]) else multi_source_bfs
+        reach[t] = search(graph, sources_by_type[t], max_hops, targets)
+
+    rows = []
+    n_covered = 0
+    for g in gaps:
+        dist, origin = reach[g.element_type]
+        i = graph.zone_row[g.zone_id]
+        covered = dist[i] >= 0
+        n_covered += covered
+        rows.append({
+            "zone_id": g.zone_id,
+            "element_type": g.element_type,
+            "hazard_class": g.hazard_class,
+            "value_index": g.value_index,
+            "status": "covered" if covered else "uncovered",
+            "hops": dist[i] if covered else None,
+            "nearest_provider": graph.zone_ids[origin[i]] if covered else None,
+        })
+
+    return {
+        "phase": 1,
+        "max_hops": max_hops,
+        "provider_hazard_classes": sorted(providers),
+        "n_gaps": len(rows),
+        "n_covered": n_covered,
+        "n_uncovered": len(rows) - n_covered,
+        "gaps": rows,
+        "notes": {
+            "covered": "another zone within max_hops that has the element type and a provider hazard class",
+            "hops": "hops from the gap zone to the nearest such zone",
+        },
+    }
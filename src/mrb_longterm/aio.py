@@ -0,0 +1,271 @@
+"""
+Asyncio counterparts of the library entry points, for embedding in an
+asyncio orchestrator. Blocking file I/O and CPU-bound work run in an
+executor (the loop's default one unless `executor` is given), so the event
+loop stays responsive. Ranking checks for cancellation after every ranked
+element: cancelling the awaiting task stops the worker thread promptly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import threading
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .assets import has_asset_input, load_asset_inputs
+from .config import ModuleConfig
+from .constraints import constrained_rank
+from .io import expand_assets, load_config, write_outputs
+from .models import (
+    ElementPriority,
+    ExposureCounts,
+    ExposureItem,
+    Phase1Output,
+    Phase2Output,
+    RankedElement,
+    SkippedElement,
+    ZoneHazardInputs,
+    ZoneHazardResult,
+)
+from .outputs import output_documents
+from .pipeline import build_candidates, phase2_from_ranked, run_phase1
+from .progress import ProgressReporter
+from .scoring import zoning_from_inputs
+from .snapshot import load_inputs
+from .stages import DEFAULT_TARGETS, StageRunner, ordered_targets, target_seeds
+
+
+class RankingCancelled(Exception):
+    """Raised inside the ranking thread when its awaiting task was cancelled."""
+
+
+async def _offload(executor: Optional[Executor], fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def load_inputs_async(
+    input_dir: Path,
+    *,
+    executor: Optional[Executor] = None,
+) -> Tuple[List[ZoneHazardInputs], List[ExposureItem], List[ExposureCounts], ModuleConfig]:
+    """
+    Async version of the CLI load step: validated inputs, assets (synthetic,
+    or an AssetTable for exposure_assets.csv) and config.
+    """
+    if has_asset_input(input_dir):
+        (zone_hazards, counts, assets), cfg = await asyncio.gather(
+            _offload(executor, load_asset_inputs, input_dir),
+            _offload(executor, load_config, input_dir),
+        )
+        return zone_hazards, assets, counts, cfg
+    (zone_hazards, counts), cfg = await asyncio.gather(
+        _offload(executor, load_inputs, input_dir),
+        _offload(executor, load_config, input_dir),
+    )
+    assets = await _offload(executor, expand_assets, counts)
+    return zone_hazards, assets, counts, cfg
+
+
+async def run_phase1_async(
+    *,
+    zone_hazards: List[ZoneHazardInputs],
+    exposure_counts: List[ExposureCounts],
+    cfg: ModuleConfig,
+    zoning: Optional[List[ZoneHazardResult]] = None,
+    executor: Optional[Executor] = None,
+) -> Phase1Output:
+    return await _offload(
+        executor,
+        run_phase1,
+        zone_hazards=zone_hazards,
+        exposure_counts=exposure_counts,
+        cfg=cfg,
+        zoning=zoning,
+    )
+
+
+async def _rank_cancellable(
+    candidates: List[ElementPriority],
+    cfg: ModuleConfig,
+    executor: Optional[Executor],
+) -> Tuple[List[RankedElement], List[SkippedElement]]:
+    cancelled = threading.Event()
+
+    def hook(_r: RankedElement) -> None:
+        if cancelled.is_set():
+            raise RankingCancelled()
+
+    try:
+        return await _offload(executor, constrained_rank, candidates, cfg, hook)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+
+
+async def run_phase2_async(
+    *,
+    zone_hazards: List[ZoneHazardInputs],
+    assets: List[ExposureItem],
+    cfg: ModuleConfig,
+    zoning: Optional[List[ZoneHazardResult]] = None,
+    executor: Optional[Executor] = None,
+) -> Phase2Output:
+    if zoning is None:
+        zoning = await _offload(executor, zoning_from_inputs, zone_hazards)
+    candidates = await _offload(executor, build_candidates, zoning=zoning, assets=assets)
+    ranked, skipped = await _rank_cancellable(candidates, cfg, executor)
+    return phase2_from_ranked(ranked, cfg, skipped)
+
+
+async def iter_ranked_async(
+    *,
+    zone_hazards: List[ZoneHazardInputs],
+    assets: List[ExposureItem],
+    cfg: ModuleConfig,
+    zoning: Optional[List[ZoneHazardResult]] = None,
+    max_buffer: int = 256,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[RankedElement]:
+    """
+    Stream ranked elements as the ranker produces them.
+
+    At most `max_buffer` elements wait in the queue: when the consumer falls
+    behind, the ranking thread blocks (back-pressure). Leaving the loop early
+    or cancelling the consumer stops the ranking thread.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max(1, max_buffer))
+    done = object()
+    stop = threading.Event()
+
+    def push(item: Any) -> None:
+        fut = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                fut.result(timeout=0.1)
+                return
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    fut.cancel()
+                    raise RankingCancelled()
+
+    def produce() -> None:
+        try:
+            if zoning is None:
+                z = zoning_from_inputs(zone_hazards)
+            else:
+                z = zoning
+            candidates = build_candidates(zoning=z, assets=assets)
+
+            def hook(r: RankedElement) -> None:
+                if stop.is_set():
+                    raise RankingCancelled()
+                push(r)
+
+            constrained_rank(candidates, cfg, hook)
+            push(done)
+        except RankingCancelled:
+            pass
+        except BaseException as exc:  # surface producer errors to the consumer
+            if not stop.is_set():
+                push(exc)
+
+    producer = loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # drain so a producer blocked on put() sees the stop flag
+        while not queue.empty():
+            queue.get_nowait()
+        await asyncio.shield(producer)
+
+
+async def write_outputs_async(
+    output_dir: Path,
+    documents: Dict[str, Any],
+    *,
+    max_workers: Optional[int] = None,
+    only_changed: bool = False,
+    streaming: bool = False,
+    executor: Optional[Executor] = None,
+) -> List[Path]:
+    """Async version of io.write_outputs (atomic files + manifest)."""
+    return await _offload(executor, write_outputs, output_dir, documents, max_workers, only_changed, streaming)
+
+
+async def run_targets_async(
+    *,
+    input_dir: Path,
+    output_dir: Path,
+    targets: Iterable[str] = DEFAULT_TARGETS,
+    executor: Optional[Executor] = None,
+    schema: str = "full",
+    seeds: Optional[Dict[str, Any]] = None,
+    write_workers: Optional[int] = None,
+    only_changed: bool = False,
+    progress: Optional[ProgressReporter] = None,
+    memory_budget_mb: Optional[int] = None,
+) -> List[Path]:
+    """
+    Async version of stages.run_targets, with the same options. Without a
+    progress reporter, Phase 1 and the Phase 2 ranking run concurrently when
+    both are needed; the remaining stages are then built in the executor
+    from the memoized intermediates. With one, stages run in order so its
+    events stay per stage, and cancelling the awaiting task cancels its token.
+    """
+    ordered = ordered_targets(targets)
+    run_seeds = await _offload(
+        executor, target_seeds, input_dir, ordered,
+        seeds=seeds, progress=progress, schema=schema, memory_budget_mb=memory_budget_mb,
+    )
+    runner = StageRunner(run_seeds)
+
+    try:
+        needed = set(runner.plan(ordered))
+        if progress is None and {"phase1", "ranking"} <= needed:
+            await _offload(executor, runner.run, ["zoning", "engines", "candidates"])
+            r = runner.results
+            phase1, ranking = await asyncio.gather(
+                run_phase1_async(
+                    zone_hazards=r["zone_hazards"],
+                    exposure_counts=r["exposure_counts"],
+                    cfg=r["engines"].phase1_cfg(r["cfg"]),
+                    zoning=r["zoning"],
+                    executor=executor,
+                ),
+                _rank_cancellable(r["candidates"], r["cfg"], executor),
+            )
+            runner.results.update(phase1=phase1, ranking=ranking)
+        results = await _offload(executor, runner.run, ordered)
+
+        documents = await _offload(executor, output_documents, results, ordered, schema)
+        if progress is not None:
+            progress.begin("write_outputs")
+        engines = runner.results.get("engines")
+        written = await write_outputs_async(
+            output_dir,
+            documents,
+            max_workers=write_workers,
+            only_changed=only_changed,
+            streaming=engines is not None and engines.streaming_writer,
+            executor=executor,
+        )
+        if progress is not None:
+            progress.end()
+        return written
+    except asyncio.CancelledError:
+        if progress is not None:
+            progress.token.cancel("cancelled")
+        raise
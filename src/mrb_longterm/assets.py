@@ -0,0 +1,239 @@
+"""
+Asset-level exposure input: input/exposure_assets.csv, one row per real asset.
+
+    element_id,element_type,zone_id[,any other columns...]
+    HOSP-0001,hospitals_health_center,Zone_Yellow,beds=120
+    ...
+
+The file is streamed with the stdlib csv reader straight into columns (no
+per-row objects): ids as a list of str, zone/type as interned int32 codes,
+every extra column as a list of str (the asset meta). Phase 1 counts and the
+Phase 2 asset order are derived in the same pass.
+"""
+
+from __future__ import annotations
+
+import csv
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .io import parse_zone_hazards, read_json
+from .models import ExposureCounts, ExposureItem, ZoneHazardInputs
+from .validation import KNOWN_TYPES, InputValidationError, validate_inputs
+
+ASSETS_FILE = "exposure_assets.csv"
+REQUIRED_COLUMNS = ("element_id", "element_type", "zone_id")
+
+
+@dataclass(frozen=True)
+class AssetTable:
+    """
+    Column-oriented asset registry. Row i is element_ids[i], of type
+    types[type_code[i]] in zone zones[zone_code[i]], with meta[col][i].
+
+    `order` lists rows grouped the way synthetic assets are (zone by first
+    appearance, then type by first appearance in that zone, then file
+    order), so rankings tie-break the same as for the equivalent counts.
+    `counts` are the per-zone counts of the same rows, in that order.
+    `source` is the file the rows were read from (None for the synthetic
+    assets of grouped_assets).
+    """
+    element_ids: List[str]
+    zone_code: array
+    type_code: array
+    zones: List[str]
+    types: List[str]
+    meta: Dict[str, List[str]]
+    order: array
+    counts: List[ExposureCounts]
+    source: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.element_ids)
+
+    def row_meta(self, i: int) -> Dict[str, str]:
+        return {k: col[i] for k, col in self.meta.items() if col[i] != ""}
+
+    def item(self, i: int) -> ExposureItem:
+        """One row as an ExposureItem (built on demand, not stored)."""
+        return ExposureItem(
+            element_id=self.element_ids[i],
+            element_type=self.types[self.type_code[i]],
+            zone_id=self.zones[self.zone_code[i]],
+            meta=self.row_meta(i),
+        )
+
+
+def load_asset_table(
+    path: Path,
+    zone_ids: Optional[Set[str]] = None,
+    known_types: FrozenSet[str] = KNOWN_TYPES,
+) -> AssetTable:
+    """
+    Stream exposure_assets.csv into an AssetTable. Every problem (missing
+    columns, empty fields, duplicate ids, unknown types, zones not in
+    `zone_ids`) is collected with its line number and raised together as
+    InputValidationError.
+    """
+    name = path.name
+    problems: List[str] = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        missing = [c for c in REQUIRED_COLUMNS if c not in header]
+        if missing:
+            raise InputValidationError([f"{name}: missing column(s) {missing} in header {header}"])
+        i_id, i_type, i_zone = (header.index(c) for c in REQUIRED_COLUMNS)
+        meta_cols = [(j, h) for j, h in enumerate(header) if h not in REQUIRED_COLUMNS]
+        meta: Dict[str, List[str]] = {h: [] for _, h in meta_cols}
+        meta_lists = [(j, meta[h]) for j, h in meta_cols]
+        width = len(header)
+
+        element_ids: List[str] = []
+        zone_code = array("i")
+        type_code = array("i")
+        row_group = array("i")
+        zone_pos: Dict[str, int] = {}
+        type_pos: Dict[str, int] = {}
+        group_pos: Dict[Tuple[int, int], int] = {}
+        group_count: List[int] = []
+        zone_groups: List[List[int]] = []  # per zone: its groups in first-seen order
+        seen_ids: Set[str] = set()
+
+        for lineno, row in enumerate(reader, 2):
+            if len(row) != width:
+                if not row:
+                    continue  # blank line
+                problems.append(f"{name} line {lineno}: expected {width} fields, got {len(row)}")
+                continue
+            eid, etype, zid = row[i_id].strip(), row[i_type].strip(), row[i_zone].strip()
+            if not eid or not etype or not zid:
+                problems.append(f"{name} line {lineno}: element_id, element_type and zone_id must be non-empty")
+                continue
+            if eid in seen_ids:
+                problems.append(f"{name} line {lineno}: duplicate element_id {eid!r}")
+                continue
+            seen_ids.add(eid)
+
+            z = zone_pos.get(zid)
+            if z is None:
+                if zone_ids is not None and zid not in zone_ids:
+                    problems.append(f"{name} line {lineno}: orphan zone {zid!r} (not in hazard_zones.json)")
+                z = zone_pos[zid] = len(zone_pos)
+                zone_groups.append([])
+            t = type_pos.get(etype)
+            if t is None:
+                if etype not in known_types:
+                    problems.append(
+                        f"{name} line {lineno}: unknown element_type {etype!r} (add it to importance_tables.py)"
+                    )
+                t = type_pos[etype] = len(type_pos)
+            g = group_pos.get((z, t))
+            if g is None:
+                g = group_pos[(z, t)] = len(group_count)
+                group_count.append(0)
+                zone_groups[z].append(g)
+            group_count[g] += 1
+
+            element_ids.append(eid)
+            zone_code.append(z)
+            type_code.append(t)
+            row_group.append(g)
+            for j, col in meta_lists:
+                col.append(row[j])
+
+    if problems:
+        raise InputValidationError(problems)
+
+    zones = list(zone_pos)
+    types = list(type_pos)
+    group_key = list(group_pos)
+
+    # counting sort of rows into (zone, type) groups, zone-major
+    start = [0] * len(group_count)
+    counts: List[ExposureCounts] = []
+    at = 0
+    for z, groups in enumerate(zone_groups):
+        by_type: Dict[str, int] = {}
+        for g in groups:
+            start[g] = at
+            at += group_count[g]
+            by_type[types[group_key[g][1]]] = group_count[g]
+        counts.append(ExposureCounts(zone_id=zones[z], counts_by_type=by_type))
+    order = array("i", bytes(4 * len(element_ids)))
+    for i, g in enumerate(row_group):
+        order[start[g]] = i
+        start[g] += 1
+
+    return AssetTable(
+        element_ids=element_ids,
+        zone_code=zone_code,
+        type_code=type_code,
+        zones=zones,
+        types=types,
+        meta=meta,
+        order=order,
+        counts=counts,
+        source=path.name,
+    )
+
+
+def grouped_assets(counts: List[ExposureCounts]) -> AssetTable:
+    """
+    The synthetic assets of expand_assets (same ids, same order) as an
+    AssetTable: no ExposureItem or meta dict per asset.
+    """
+    element_ids: List[str] = []
+    zone_code = array("i")
+    type_code = array("i")
+    type_pos: Dict[str, int] = {}
+    for z, c in enumerate(counts):
+        for etype, n in c.counts_by_type.items():
+            t = type_pos.setdefault(etype, len(type_pos))
+            n = int(n)
+            element_ids.extend(f"{c.zone_id}:{etype}:{i + 1}" for i in range(n))
+            zone_code.extend([z] * n)
+            type_code.extend([t] * n)
+    return AssetTable(
+        element_ids=element_ids,
+        zone_code=zone_code,
+        type_code=type_code,
+        zones=[c.zone_id for c in counts],
+        types=list(type_pos),
+        meta={},
+        order=array("i", range(len(element_ids))),
+        counts=counts,
+    )
+
+
+def has_asset_input(input_dir: Path) -> bool:
+    return (input_dir / ASSETS_FILE).exists()
+
+
+def load_asset_inputs(input_dir: Path) -> Tuple[List[ZoneHazardInputs], List[ExposureCounts], AssetTable]:
+    """
+    Validated zone hazards plus the asset table (and its derived counts),
+    for input folders that provide exposure_assets.csv instead of
+    exposure_by_zone.json.
+    """
+    if (input_dir / "exposure_by_zone.json").exists():
+        raise ValueError(
+            f"{input_dir} has both exposure_by_zone.json and {ASSETS_FILE}; keep exactly one exposure input"
+        )
+    zones_obj = read_json(input_dir / "hazard_zones.json")
+    problems = validate_inputs(zones_obj, {"counts": []})
+    if problems:
+        raise InputValidationError(problems)
+    zones = parse_zone_hazards(zones_obj)
+    table = load_asset_table(input_dir / ASSETS_FILE, zone_ids={z.zone_id for z in zones})
+    return zones, table.counts, table
+
+
+def asset_input_seeds(input_dir: Path) -> Dict[str, Any]:
+    """StageRunner seeds for an asset-level input folder ({} for counts input)."""
+    if not has_asset_input(input_dir):
+        return {}
+    zones, counts, table = load_asset_inputs(input_dir)
+    return {"zone_hazards": zones, "exposure_counts": counts, "assets": table}
@@ -0,0 +1,205 @@
+"""
+Binary columnar form of phase1_matrix.json (opt-in).
+
+    phase1_matrix_columnar/
+      header.json            shapes, dtypes, element_types, byte order
+      count.i32              int32  [n_zones * n_types], row-major (zone, type)
+      value_index.i8         int8   [n_zones * n_types]
+      priority_rank.i8       int8   [n_zones * n_types]
+      is_gap.i8              int8   [n_zones * n_types]  (0/1)
+      hazard_index.i8        int8   [n_zones]
+      zone_ids.offsets.i32   int32  [n_zones + 1]  byte offsets into zone_ids.utf8
+      zone_ids.utf8          concatenated UTF-8 zone ids
+
+Zones are sorted by zone_id (same row order as phase1_matrix.json) and types
+follow the Phase 1 table order, so cell (z, t) is at index z * n_types + t.
+"""
+
+from __future__ import annotations
+
+import mmap
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import ModuleConfig
+from .importance_tables import DEFAULT_TABLES
+from .io import FileBundle, encode_json, read_json
+from .models import ExposureCounts, ZoneHazardInputs, ZoneHazardResult
+from .scoring import PRIORITY_NUMERIC, priority_label
+from .standards import COUNTS_GAP_DEFINITION, STANDARDS_GAP_DEFINITION, configured_standards_table
+
+
+COLUMNAR_VERSION = 1
+HAZARD_CLASSES = ("low", "medium", "high")
+
+# column name -> (array typecode, file suffix)
+CELL_COLUMNS: Dict[str, Tuple[str, str]] = {
+    "count": ("i", "i32"),
+    "value_index": ("b", "i8"),
+    "priority_rank": ("b", "i8"),
+    "is_gap": ("b", "i8"),
+}
+
+
+def _le_bytes(a: array) -> bytes:
+    if sys.byteorder != "little":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def phase1_matrix_columnar_files(
+    zoning: List[ZoneHazardResult],
+    counts: List[ExposureCounts],
+    cfg: ModuleConfig,
+    zone_hazards: Optional[List[ZoneHazardInputs]] = None,
+) -> FileBundle:
+    """
+    The columnar matrix as a bundle of files (header.json + column files).
+    is_gap uses the same rule as phase1_matrix_doc (planning standards when
+    configured, read from `zone_hazards`).
+    """
+    types = list(DEFAULT_TABLES.phase1_new_planification.keys())
+    values = [DEFAULT_TABLES.phase1_new_planification[t] for t in types]
+    counts_by_zone = {c.zone_id: c.counts_by_type for c in counts}
+    zones = sorted({z.zone_id: z for z in zoning}.values(), key=lambda z: z.zone_id)
+    threshold = cfg.phase1_gap_value_threshold
+    standards = configured_standards_table(cfg.phase1_standards, zone_hazards, counts_by_zone)
+    # (column position, gap column) of the types with a standard; those cells come from the table
+    standard_cols = [] if standards is None else [(i, standards.gap[t]) for i, t in enumerate(types) if t in standards.gap]
+    standard_row = {} if standards is None else standards.zone_row
+
+    # priority rank per (hazard class, type) is computed once, not per cell
+    rank_row = {
+        hc: array("b", [PRIORITY_NUMERIC[priority_label(hc, v)] for v in values])  # type: ignore[arg-type]
+        for hc in HAZARD_CLASSES
+    }
+    value_row = array("b", values)
+
+    count_col = array("i")
+    value_col = array("b")
+    rank_col = array("b")
+    gap_col = array("b")
+    hazard_col = array("b")
+    offsets = array("i", [0])
+    names = bytearray()
+
+    for z in zones:
+        observed = counts_by_zone.get(z.zone_id, {})
+        row_counts = array("i", [int(observed.get(t, 0)) for t in types])
+        count_col.extend(row_counts)
+        value_col.extend(value_row)
+        rank_col.extend(rank_row[z.hazard_class])
+        row_gaps = array("b", [int(v >= threshold and c == 0) for v, c in zip(values, row_counts)])
+        for i, col in standard_cols:
+            row_gaps[i] = int(col[standard_row[z.zone_id]] > 0)
+        gap_col.extend(row_gaps)
+        hazard_col.append(z.hazard_index)
+        names.extend(z.zone_id.encode("utf-8"))
+        offsets.append(len(names))
+
+    header = {
+        "format": "mrb-phase1-matrix-columnar",
+        "version": COLUMNAR_VERSION,
+        "byteorder": "little",
+        "n_zones": len(zones),
+        "n_types": len(types),
+        "layout": "row-major (zone, element_type)",
+        "element_types": types,
+        "threshold": {
+            "phase1_gap_value_threshold": threshold,
+            "phase1_only_nonlow_hazard": cfg.phase1_only_nonlow_hazard,
+        },
+        "is_gap_definition": COUNTS_GAP_DEFINITION if standards is None else STANDARDS_GAP_DEFINITION,
+        "columns": {name: {"file": f"{name}.{suffix}", "dtype": suffix} for name, (_tc, suffix) in CELL_COLUMNS.items()},
+        "zone_columns": {"hazard_index": {"file": "hazard_index.i8", "dtype": "i8"}},
+        "zone_ids": {"offsets": "zone_ids.offsets.i32", "data": "zone_ids.utf8"},
+    }
+
+    return FileBundle({
+        "header.json": encode_json(header),
+        "count.i32": _le_bytes(count_col),
+        "value_index.i8": _le_bytes(value_col),
+        "priority_rank.i8": _le_bytes(rank_col),
+        "is_gap.i8": _le_bytes(gap_col),
+        "hazard_index.i8": _le_bytes(hazard_col),
+        "zone_ids.offsets.i32": _le_bytes(offsets),
+        "zone_ids.utf8": bytes(names),
+    })
+
+
+class ColumnarMatrix:
+    """
+    Memory-mapped reader. Columns are exposed as memoryviews over the mapped
+    files, so zone rows and type columns are sliced without copying.
+    """
+
+    def __init__(self, folder: Path) -> None:
+        self.folder = Path(folder)
+        self.header = read_json(self.folder / "header.json")
+        if self.header.get("version") != COLUMNAR_VERSION:
+            raise ValueError(f"Unsupported columnar matrix version: {self.header.get('version')!r}")
+        self.n_zones: int = self.header["n_zones"]
+        self.n_types: int = self.header["n_types"]
+        self.element_types: List[str] = self.header["element_types"]
+        self._maps: List[mmap.mmap] = []
+        self._zone_pos: Optional[Dict[str, int]] = None
+        self.columns: Dict[str, memoryview] = {
+            name: self._map(f"{name}.{suffix}", tc) for name, (tc, suffix) in CELL_COLUMNS.items()
+        }
+        self.hazard_index = self._map("hazard_index.i8", "b")
+        self._offsets = self._map("zone_ids.offsets.i32", "i")
+        self._names = self._map("zone_ids.utf8", "B")
+
+    def _map(self, name: str, typecode: str) -> memoryview:
+        path = self.folder / name
+        if path.stat().st_size == 0:
+            return memoryview(array(typecode))
+        with path.open("rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        if sys.byteorder != "little" and typecode not in ("b", "B"):
+            a = array(typecode, mm)
+            a.byteswap()
+            return memoryview(a)
+        return memoryview(mm).cast(typecode)
+
+    def zone_id(self, row: int) -> str:
+        return bytes(self._names[self._offsets[row]:self._offsets[row + 1]]).decode("utf-8")
+
+    def zone_row(self, zone_id: str) -> int:
+        if self._zone_pos is None:
+            self._zone_pos = {self.zone_id(i): i for i in range(self.n_zones)}
+        return self._zone_pos[zone_id]
+
+    def zone_cells(self, zone_id: str, column: str) -> memoryview:
+        """One zone's row of `column` (contiguous, n_types values)."""
+        start = self.zone_row(zone_id) * self.n_types
+        return self.columns[column][start:start + self.n_types]
+
+    def type_cells(self, element_type: str, column: str) -> memoryview:
+        """One element type's column across all zones (strided view, n_zones values)."""
+        t = self.element_types.index(element_type)
+        return self.columns[column][t::self.n_types]
+
+    def close(self) -> None:
+        for mv in list(self.columns.values()) + [self.hazard_index, self._offsets, self._names]:
+            mv.release()
+        for mm in self._maps:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # a caller still holds a slice; the map is freed with it
+        self._maps = []
+
+    def __enter__(self) -> "ColumnarMatrix":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def open_phase1_matrix_columnar(folder: Path) -> ColumnarMatrix:
+    return ColumnarMatrix(folder)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
 
 
 @dataclass(frozen=True)
@@ -9,8 +10,9 @@ class ModuleConfig:
     JSON-serializable config for MRB integration.
 
     Phase 1:
-      - No population / standards. "Gap" means: important types missing (count == 0)
+      - Counts-only by default. "Gap" means: important types missing (count == 0)
         in zones with non-low hazard (or all zones depending on threshold).
+      - Optional planning standards turn gaps into shortfalls vs. expected counts.
     Phase 2:
       - Diminishing returns / duplication handling as in proposal.
     """
@@ -20,19 +22,81 @@ class ModuleConfig:
     # If True: only compute gaps for medium/high hazard zones (recommended)
     phase1_only_nonlow_hazard: bool = True
 
+    # Phase 1 planning standards per element type (empty = counts-only gaps):
+    # {"schools": {"attribute": "population", "per": 2500, "units": 1}}, the
+    # attribute being read from each zone's meta
+    phase1_standards: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    # Phase 1 gap coverage over zone_adjacency.json (phase1_gap_coverage.json):
+    # a gap is covered by a zone within this many hops that has the type and
+    # one of these hazard classes
+    phase1_coverage_hops: int = 1
+    phase1_coverage_provider_classes: Tuple[str, ...] = ("low", "medium")
+
     # Phase 2 diminishing returns (proposal defaults)
     alpha_min: float = 0.55
     alpha_max: float = 0.92
 
+    # Phase 2 decay model (see decay.py): "exponential" (proposal) | "hyperbolic"
+    # | "step_capped" | "saturating", with per-model parameters, e.g.
+    # {"step_capped": {"cap": 3}, "saturating": {"floor": 0.25}}
+    phase2_decay_model: str = "exponential"
+    phase2_decay_params: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    # Per-type alpha overriding the ValueIndex mapping, e.g. {"shelters": 0.8}
+    phase2_alpha_by_type: Dict[str, float] = field(default_factory=dict)
+
+    # Models ranked side by side in phase2_decay_comparison.json (empty = all)
+    phase2_decay_compare: Tuple[str, ...] = ()
+
     # For Phase 2 outputs
     phase2_top_n: int = 50
 
+    # Phase 2 top-N selection constraints (0 / empty = off): at most this many
+    # selections per zone and per hazard class, and at least min_per_type[t]
+    # of type t when enough candidates exist
+    phase2_max_per_zone: int = 0
+    phase2_max_per_hazard_class: int = 0
+    phase2_min_per_type: Dict[str, int] = field(default_factory=dict)
+
+    # Phase 2 per-partition ranking (phase2_partitioned.json):
+    # "zone" | "hazard_class" | "element_type"; workers 0 = one per CPU
+    phase2_partition_by: str = "zone"
+    phase2_workers: int = 0
+
+    # Phase 1 bounded-memory sort: spill sorted runs of this many rows to disk
+    # and k-way merge them on output (0 = sort in memory).
+    phase1_spill_run_size: int = 0
+
+    # Memory budget in MB (0 = none): estimate the run's footprint and switch to
+    # grouped assets / streaming writers / spilled Phase 1 sort as needed
+    memory_budget_mb: int = 0
+
+    # Zone hierarchy: meta keys giving each zone's parent path, outermost first.
+    # A zone may also declare meta["parent_path"] directly (list or "a/b" string).
+    hierarchy_levels: Tuple[str, ...] = ("region", "municipality")
+
     @staticmethod
     def default() -> "ModuleConfig":
         return ModuleConfig(
             phase1_gap_value_threshold=4,
             phase1_only_nonlow_hazard=True,
+            phase1_standards={},
+            phase1_coverage_hops=1,
+            phase1_coverage_provider_classes=("low", "medium"),
             alpha_min=0.55,
             alpha_max=0.92,
+            phase2_decay_model="exponential",
+            phase2_decay_params={},
+            phase2_alpha_by_type={},
+            phase2_decay_compare=(),
             phase2_top_n=50,
+            phase2_max_per_zone=0,
+            phase2_max_per_hazard_class=0,
+            phase2_min_per_type={},
+            phase2_partition_by="zone",
+            phase2_workers=0,
+            phase1_spill_run_size=0,
+            memory_budget_mb=0,
+            hierarchy_levels=("region", "municipality"),
         )
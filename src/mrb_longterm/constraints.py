@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .config import ModuleConfig
+from .models import ElementPriority, RankedElement, SkippedElement
+from .scoring import (
+    GroupQueues,
+    decaying_weights,
+    diminishing_returns_rank,
+    greedy_steps,
+    ranked_element,
+)
+
+
+def constraints_active(cfg: ModuleConfig) -> bool:
+    return bool(
+        cfg.phase2_max_per_zone > 0
+        or cfg.phase2_max_per_hazard_class > 0
+        or any(n > 0 for n in cfg.phase2_min_per_type.values())
+    )
+
+
+def constraints_doc(cfg: ModuleConfig) -> Dict[str, Any]:
+    return {
+        "max_per_zone": cfg.phase2_max_per_zone or None,
+        "max_per_hazard_class": cfg.phase2_max_per_hazard_class or None,
+        "min_per_type": {t: n for t, n in cfg.phase2_min_per_type.items() if n > 0},
+    }
+
+
+def constrained_rank(
+    candidates: List[ElementPriority],
+    cfg: ModuleConfig,
+    on_rank: Optional[Callable[[RankedElement], None]] = None,
+) -> Tuple[List[RankedElement], List[SkippedElement]]:
+    """
+    Diminishing-returns ranking whose top N respects the funding constraints.
+
+    The greedy winner is taken unless it breaks a cap: then it is dropped
+    from its queue (caps only tighten, so it can never fit again). Minimums
+    are met by reservation: once the open slots equal the minimums still
+    reachable, groups of other types are parked. Both cost O(log n) per
+    skipped element. A group can be parked again after an unpark; each
+    element's reservation skip is recorded once, at the first rank it lost.
+
+    Below the top N the remaining candidates (skipped ones included) follow
+    in plain greedy order, so the list still covers every candidate.
+    """
+    if not constraints_active(cfg):
+        return diminishing_returns_rank(candidates, cfg, on_rank), []
+    if not decaying_weights(cfg, candidates):
+        raise ValueError(
+            "Phase 2 constraints need alpha_min/alpha_max/phase2_alpha_by_type in [0, 1] "
+            "and non-negative base scores"
+        )
+
+    top_n = max(1, int(cfg.phase2_top_n))
+    max_zone = cfg.phase2_max_per_zone
+    max_class = cfg.phase2_max_per_hazard_class
+    unmet = {t: n for t, n in cfg.phase2_min_per_type.items() if n > 0}
+    available: Dict[str, int] = {}
+    for c in candidates:
+        available[c.element_type] = available.get(c.element_type, 0) + 1
+
+    type_counts: Dict[str, int] = {}
+    queues = GroupQueues(candidates, cfg, type_counts)
+    zone_n: Dict[str, int] = {}
+    class_n: Dict[str, int] = {}
+    taken = bytearray(len(candidates))
+    ranked: List[RankedElement] = []
+    skipped: List[SkippedElement] = []
+    reserved_skips: Set[int] = set()  # positions already recorded as reserved_for_min_per_type
+
+    def reachable_minimums() -> int:
+        return sum(min(n, available.get(t, 0)) for t, n in unmet.items())
+
+    def skip(e: Any, reason: str) -> None:
+        c = candidates[e[1]]
+        skipped.append(SkippedElement(
+            element_id=c.element_id,
+            element_type=c.element_type,
+            zone_id=c.zone_id,
+            hazard_class=c.hazard_class,
+            base_score=c.base_score,
+            final_score=-e[0],
+            at_rank=len(ranked) + 1,
+            reason=reason,  # type: ignore[arg-type]
+        ))
+
+    while len(ranked) < top_n:
+        e = queues.best()
+        if e is None:
+            break
+        c = candidates[e[1]]
+
+        reason = None
+        if max_zone and zone_n.get(c.zone_id, 0) >= max_zone:
+            reason = "max_per_zone"
+        elif max_class and class_n.get(c.hazard_class, 0) >= max_class:
+            reason = "max_per_hazard_class"
+        if reason is not None:
+            skip(e, reason)
+            queues.drop(e)
+            available[c.element_type] -= 1
+            if queues.parked and top_n - len(ranked) > reachable_minimums():
+                queues.unpark_all()  # a minimum became unreachable: slots free up again
+            continue
+
+        if unmet.get(c.element_type, 0) == 0 and top_n - len(ranked) <= reachable_minimums():
+            if e[1] not in reserved_skips:
+                reserved_skips.add(e[1])
+                skip(e, "reserved_for_min_per_type")
+            queues.park(e)
+            continue
+
+        queues.accept(e)
+        taken[e[1]] = 1
+        available[c.element_type] -= 1
+        zone_n[c.zone_id] = zone_n.get(c.zone_id, 0) + 1
+        class_n[c.hazard_class] = class_n.get(c.hazard_class, 0) + 1
+        if unmet.get(c.element_type, 0) > 0:
+            unmet[c.element_type] -= 1
+        r = ranked_element(c, e[3], e[4], e[5], -e[0])
+        ranked.append(r)
+        if on_rank is not None:
+            on_rank(r)
+
+    rest = [c for pos, c in enumerate(candidates) if not taken[pos]]
+    for pos, k, a, w, final in greedy_steps(rest, cfg, type_counts):
+        r = ranked_element(rest[pos], k, a, w, final)
+        ranked.append(r)
+        if on_rank is not None:
+            on_rank(r)
+
+    return ranked, skipped
@@ -0,0 +1,185 @@
+"""
+Decay models for the Phase 2 diminishing-returns ranker.
+
+A model maps (alpha, k) to the weight of the next element of a type that
+already has k ranked elements. alpha comes from phase2_alpha_by_type when the
+type is listed there, else from the ValueIndex (alpha_from_value):
+
+    exponential   alpha ** k                          proposal default
+    hyperbolic    1 / (1 + k * (1 - alpha) / alpha)   same first step, heavier tail
+    step_capped   alpha ** min(k, cap)                stops decaying after `cap` repeats
+    saturating    floor + (1 - floor) * alpha ** k    never drops below `floor`
+
+For alpha in [0, 1] every model gives weights in [0, 1] that never increase
+with k, which is what GroupQueues relies on. DecayWeights keeps one weight
+table per (element_type, value_index) group, so the rankers index a list
+instead of evaluating the model at every step.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import ModuleConfig
+
+DECAY_MODELS = ("exponential", "hyperbolic", "step_capped", "saturating")
+
+# model -> default parameters (phase2_decay_params[model] overrides them)
+DEFAULT_PARAMS: Dict[str, Dict[str, float]] = {
+    "exponential": {},
+    "hyperbolic": {},
+    "step_capped": {"cap": 3},
+    "saturating": {"floor": 0.25},
+}
+
+
+# --- Proposal Phase 2: alpha(V) mapping and repetition weights ---
+def alpha_from_value(value_index: int, alpha_min: float, alpha_max: float) -> float:
+    if not (1 <= value_index <= 5):
+        raise ValueError("value_index must be 1..5")
+    # Linear mapping: value 1 -> alpha_min, value 5 -> alpha_max
+    t = (value_index - 1) / 4.0
+    return alpha_min + t * (alpha_max - alpha_min)
+
+
+def repetition_weight(alpha: float, k: int) -> float:
+    if k < 0:
+        raise ValueError("k must be >= 0")
+    return float(alpha ** k)
+
+
+def _hyperbolic(alpha: float, k: int, params: Dict[str, float]) -> float:
+    if k == 0:
+        return 1.0
+    if alpha == 0.0:
+        return 0.0
+    return 1.0 / (1.0 + k * (1.0 - alpha) / alpha)
+
+
+def _step_capped(alpha: float, k: int, params: Dict[str, float]) -> float:
+    return float(alpha ** min(k, int(params["cap"])))
+
+
+def _saturating(alpha: float, k: int, params: Dict[str, float]) -> float:
+    floor = params["floor"]
+    return floor + (1.0 - floor) * float(alpha ** k)
+
+
+_WEIGHT_FNS: Dict[str, Callable[[float, int, Dict[str, float]], float]] = {
+    "exponential": lambda alpha, k, params: float(alpha ** k),
+    "hyperbolic": _hyperbolic,
+    "step_capped": _step_capped,
+    "saturating": _saturating,
+}
+
+
+@dataclass(frozen=True)
+class DecayModel:
+    name: str
+    params: Dict[str, float] = field(default_factory=dict)
+
+    def weight(self, alpha: float, k: int) -> float:
+        if k < 0:
+            raise ValueError("k must be >= 0")
+        return _WEIGHT_FNS[self.name](alpha, k, self.params)
+
+
+def decay_model(name: str, params: Optional[Dict[str, Any]] = None) -> DecayModel:
+    """A validated DecayModel: known name, known parameters in range."""
+    if name not in DECAY_MODELS:
+        raise ValueError(f"Unknown phase2_decay_model={name!r}; expected one of {list(DECAY_MODELS)}")
+    merged = dict(DEFAULT_PARAMS[name])
+    for key, value in (params or {}).items():
+        if key not in merged:
+            raise ValueError(f"Unknown parameter {key!r} for decay model {name!r}; expected {sorted(merged)}")
+        merged[key] = float(value)
+    if name == "step_capped" and (merged["cap"] < 0 or merged["cap"] != int(merged["cap"])):
+        raise ValueError(f"step_capped cap must be a non-negative integer, got {merged['cap']}")
+    if name == "saturating" and not (0.0 <= merged["floor"] <= 1.0):
+        raise ValueError(f"saturating floor must be in [0, 1], got {merged['floor']}")
+    return DecayModel(name=name, params=merged)
+
+
+class DecayWeights:
+    """
+    Alpha and weight lookups for one config. Tables grow on demand (one
+    entry per repetition count reached), or up front through reserve().
+    """
+
+    def __init__(self, model: DecayModel, alpha_min: float, alpha_max: float,
+                 alpha_by_type: Optional[Dict[str, float]] = None) -> None:
+        self.model = model
+        self.alpha_min = alpha_min
+        self.alpha_max = alpha_max
+        self.alpha_by_type = dict(alpha_by_type or {})
+        self._alphas: Dict[Tuple[str, int], float] = {}
+        self._tables: Dict[Tuple[str, int], List[float]] = {}
+        if model.name != "exponential" and not self.decaying:
+            # only the proposal's alpha ** k is defined (and ranked, slowly) outside [0, 1]
+            raise ValueError(f"decay model {model.name!r} needs every alpha in [0, 1]")
+
+    @property
+    def decaying(self) -> bool:
+        """True if weights never increase with k (every alpha in [0, 1])."""
+        alphas = (self.alpha_min, self.alpha_max, *self.alpha_by_type.values())
+        return all(0.0 <= a <= 1.0 for a in alphas)
+
+    def alpha(self, element_type: str, value_index: int) -> float:
+        key = (element_type, value_index)
+        a = self._alphas.get(key)
+        if a is None:
+            a = self.alpha_by_type.get(element_type)
+            if a is None:
+                a = alpha_from_value(value_index, self.alpha_min, self.alpha_max)
+            a = self._alphas[key] = float(a)
+        return a
+
+    def weight(self, element_type: str, value_index: int, k: int) -> float:
+        table = self._tables.get((element_type, value_index))
+        if table is None or k >= len(table):
+            if k < 0:
+                raise ValueError("k must be >= 0")
+            table = self._extend(element_type, value_index, k + 1)
+        return table[k]
+
+    def _extend(self, element_type: str, value_index: int, size: int) -> List[float]:
+        table = self._tables.setdefault((element_type, value_index), [])
+        a = self.alpha(element_type, value_index)
+        table.extend(self.model.weight(a, k) for k in range(len(table), size))
+        return table
+
+    def reserve(self, groups: Iterable[Tuple[Tuple[str, int], int]]) -> None:
+        """Precompute tables for ((element_type, value_index), n_candidates) pairs."""
+        for (element_type, value_index), n in groups:
+            self._extend(element_type, value_index, n + 1)
+
+
+def decay_weights(cfg: ModuleConfig) -> DecayWeights:
+    """The DecayWeights selected by config.json (phase2_decay_* / phase2_alpha_by_type)."""
+    model = decay_model(cfg.phase2_decay_model, cfg.phase2_decay_params.get(cfg.phase2_decay_model))
+    return DecayWeights(model, cfg.alpha_min, cfg.alpha_max, cfg.phase2_alpha_by_type)
+
+
+def custom_decay(cfg: ModuleConfig) -> bool:
+    """True if the ranking departs from the proposal's exponential decay."""
+    return bool(
+        cfg.phase2_decay_model != "exponential"
+        or cfg.phase2_decay_params.get(cfg.phase2_decay_model)
+        or cfg.phase2_alpha_by_type
+    )
+
+
+def decay_doc(cfg: ModuleConfig) -> Dict[str, Any]:
+    model = decay_model(cfg.phase2_decay_model, cfg.phase2_decay_params.get(cfg.phase2_decay_model))
+    return {"model": model.name, "params": model.params, "alpha_by_type": dict(cfg.phase2_alpha_by_type)}
+
+
+def comparison_models(cfg: ModuleConfig) -> List[str]:
+    """The configured model first, then phase2_decay_compare (default: all models)."""
+    names = [cfg.phase2_decay_model, *(cfg.phase2_decay_compare or DECAY_MODELS)]
+    return list(dict.fromkeys(names))
+
+
+def comparison_configs(cfg: ModuleConfig) -> Dict[str, ModuleConfig]:
+    return {name: replace(cfg, phase2_decay_model=name) for name in comparison_models(cfg)}
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .io import read_output
+from .models import Phase1Output, Phase2Output
+from .outputs import OUTPUT_FILES
+
+Key = Tuple[str, str]
+
+
+def load_previous_outputs(previous_dir: Path) -> Dict[str, Any]:
+    """
+    Previous run's detailed documents, or None per document when absent.
+    Must be read before the new run writes into the same folder.
+    """
+    out: Dict[str, Any] = {}
+    for target in ("phase1_new_planification", "phase2_risk_mitigation"):
+        path = previous_dir / OUTPUT_FILES[target]
+        out[target] = read_output(path) if path.exists() else None
+    return out
+
+
+def diff_phase1(previous: Optional[Dict[str, Any]], phase1: Phase1Output) -> Dict[str, Any]:
+    """
+    Keyed on (zone_id, element_type): new/closed gaps and priority label or
+    count changes of existing elements. O(previous + new).
+    """
+    previous = previous or {}
+    prev_gaps: Dict[Key, Dict[str, Any]] = {
+        (g["zone_id"], g["element_type"]): g for g in previous.get("gaps", [])
+    }
+    prev_existing: Dict[Key, Dict[str, Any]] = {
+        (e["zone_id"], e["element_type"]): e for e in previous.get("existing", [])
+    }
+
+    new_gap_keys = set()
+    new_gaps: List[Dict[str, Any]] = []
+    for g in phase1.gaps:
+        key = (g.zone_id, g.element_type)
+        new_gap_keys.add(key)
+        if key not in prev_gaps:
+            new_gaps.append(asdict(g))
+    closed_gaps = [g for key, g in prev_gaps.items() if key not in new_gap_keys]
+
+    label_changes: List[Dict[str, Any]] = []
+    count_changes: List[Dict[str, Any]] = []
+    for e in phase1.existing:
+        old = prev_existing.get((e.zone_id, e.element_type))
+        if old is None:
+            continue
+        if old["priority_label"] != e.priority_label:
+            label_changes.append({
+                "zone_id": e.zone_id,
+                "element_type": e.element_type,
+                "before": old["priority_label"],
+                "after": e.priority_label,
+            })
+        if old["count"] != e.count:
+            count_changes.append({
+                "zone_id": e.zone_id,
+                "element_type": e.element_type,
+                "before": old["count"],
+                "after": e.count,
+            })
+
+    return {
+        "n_new_gaps": len(new_gaps),
+        "n_closed_gaps": len(closed_gaps),
+        "new_gaps": new_gaps,
+        "closed_gaps": closed_gaps,
+        "existing_label_changes": label_changes,
+        "existing_count_changes": count_changes,
+    }
+
+
+def diff_phase2(previous: Optional[Dict[str, Any]], phase2: Phase2Output) -> Dict[str, Any]:
+    """
+    Keyed on element_id: elements entering/leaving the ranked list, rank
+    moves (1-based) and priority label changes. O(previous + new).
+    """
+    previous = previous or {}
+    prev_rank: Dict[str, Tuple[int, Dict[str, Any]]] = {
+        r["element_id"]: (pos + 1, r) for pos, r in enumerate(previous.get("ranked_elements", []))
+    }
+
+    seen = set()
+    entered: List[Dict[str, Any]] = []
+    moves: List[Dict[str, Any]] = []
+    label_changes: List[Dict[str, Any]] = []
+    for pos, r in enumerate(phase2.ranked_elements, start=1):
+        seen.add(r.element_id)
+        old = prev_rank.get(r.element_id)
+        if old is None:
+            entered.append({"element_id": r.element_id, "rank": pos, "final_score": r.final_score})
+            continue
+        old_pos, old_r = old
+        if old_pos != pos:
+            moves.append({"element_id": r.element_id, "before": old_pos, "after": pos})
+        if old_r["priority_label"] != r.priority_label:
+            label_changes.append({
+                "element_id": r.element_id,
+                "before": old_r["priority_label"],
+                "after": r.priority_label,
+            })
+
+    left = [
+        {"element_id": eid, "rank": pos}
+        for eid, (pos, _r) in prev_rank.items()
+        if eid not in seen
+    ]
+
+    return {
+        "n_entered": len(entered),
+        "n_left": len(left),
+        "n_rank_moves": len(moves),
+        "entered": entered,
+        "left": left,
+        "rank_moves": moves,
+        "label_changes": label_changes,
+    }
+
+
+def changes_doc(previous: Dict[str, Any], phase1: Phase1Output, phase2: Phase2Output) -> Dict[str, Any]:
+    return {
+        "previous_found": {k: v is not None for k, v in previous.items()},
+        "phase1": diff_phase1(previous.get("phase1_new_planification"), phase1),
+        "phase2": diff_phase2(previous.get("phase2_risk_mitigation"), phase2),
+    }
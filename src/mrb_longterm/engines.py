@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+from .config import ModuleConfig
+from .importance_tables import DEFAULT_TABLES
+from .models import ExposureCounts, ZoneHazardInputs
+
+# Rough peak bytes, fitted to the peak RSS of CLI runs (CPython 3.11).
+# Per asset:
+ASSET_EXPANDED_BYTES = 370  # ExposureItem + id + meta dict
+ASSET_GROUPED_BYTES = 80  # id + int32 zone/type codes (assets.AssetTable)
+CANDIDATE_BYTES = 180  # ElementPriority
+RANKED_BYTES = 300  # RankedElement + heap entry
+RANKED_DOCUMENT_BYTES = 300  # ranked_elements row dicts + their JSON text
+# Per Phase 1 (zone, type) row and per zone:
+PHASE1_ROW_BYTES = 230  # Phase1Existing / Phase1Gap
+PHASE1_DOCUMENT_ZONE_BYTES = 95_000  # planification + matrix docs, dicts + JSON text
+PHASE1_STREAMED_ZONE_BYTES = 9_000  # matrix cells and zoning rows are still built whole
+BASE_BYTES = 20 * 1024 * 1024  # interpreter + modules
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class EngineOptions:
+    """
+    What the caller allows the planner to choose. memory_budget_mb overrides
+    cfg.memory_budget_mb; spill / streaming are ruled out by outputs that need
+    in-memory lists (phase1_gap_index, the compact schema).
+    """
+    memory_budget_mb: Optional[int] = None
+    allow_spill: bool = True
+    allow_streaming_writer: bool = True
+
+
+@dataclass(frozen=True)
+class EnginePlan:
+    """Engines picked for a run, plus the footprint estimates behind them."""
+    budget_mb: Optional[int]
+    assets: str  # "expanded" | "grouped"
+    phase1_sort: str  # "memory" | "spill"
+    spill_run_size: int
+    writer: str  # "document" | "streaming"
+    estimated_mb: Dict[str, float]
+    fits: bool
+
+    @property
+    def streaming_writer(self) -> bool:
+        return self.writer == "streaming"
+
+    def phase1_cfg(self, cfg: ModuleConfig) -> ModuleConfig:
+        if self.phase1_sort == "spill" and cfg.phase1_spill_run_size <= 0:
+            return replace(cfg, phase1_spill_run_size=self.spill_run_size)
+        return cfg
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "memory_budget_mb": self.budget_mb,
+            "assets": self.assets,
+            "phase1_sort": self.phase1_sort,
+            "phase1_spill_run_size": self.spill_run_size if self.phase1_sort == "spill" else None,
+            "writer": self.writer,
+            "estimated_mb": self.estimated_mb,
+            "fits_budget": self.fits,
+        }
+
+
+IN_MEMORY = EnginePlan(
+    budget_mb=None,
+    assets="expanded",
+    phase1_sort="memory",
+    spill_run_size=0,
+    writer="document",
+    estimated_mb={},
+    fits=True,
+)
+
+
+def _estimate(n_zones: int, n_assets: int, n_rows: int, assets: str, spill_rows: int, writer: str) -> float:
+    streaming = writer == "streaming"
+    total = BASE_BYTES + n_assets * (
+        (ASSET_GROUPED_BYTES if assets == "grouped" else ASSET_EXPANDED_BYTES)
+        + CANDIDATE_BYTES
+        + RANKED_BYTES
+        + (0 if streaming else RANKED_DOCUMENT_BYTES)
+    )
+    total += PHASE1_ROW_BYTES * (min(n_rows, 2 * spill_rows) if spill_rows else n_rows)
+    total += n_zones * (PHASE1_STREAMED_ZONE_BYTES if streaming else PHASE1_DOCUMENT_ZONE_BYTES)
+    return total / MB
+
+
+def plan_engines(
+    cfg: ModuleConfig,
+    zone_hazards: List[ZoneHazardInputs],
+    counts: List[ExposureCounts],
+    options: Optional[EngineOptions] = None,
+) -> EnginePlan:
+    """
+    Without a budget (cfg.memory_budget_mb = 0 and no override): the
+    in-memory engines. With one, estimate the footprint from zone and asset
+    totals and switch, cheapest first, to grouped assets, then a streaming
+    writer, then a spilled Phase 1 sort, until the estimate fits. A plan that
+    still does not fit runs with every fallback on (fits = False).
+    """
+    options = options or EngineOptions()
+    budget = options.memory_budget_mb if options.memory_budget_mb is not None else cfg.memory_budget_mb
+    if not budget or budget <= 0:
+        return IN_MEMORY
+
+    n_zones = len(zone_hazards)
+    n_assets = sum(int(n) for c in counts for n in c.counts_by_type.values())
+    n_rows = n_zones * len(DEFAULT_TABLES.phase1_new_planification)  # upper bound on existing + gaps
+    # a spill run gets a tenth of the budget
+    spill_rows = max(1_000, int(0.1 * budget * MB / PHASE1_ROW_BYTES))
+
+    steps = [("expanded", 0, "document"), ("grouped", 0, "document")]
+    if options.allow_streaming_writer:
+        steps.append(("grouped", 0, "streaming"))
+    if options.allow_spill and n_rows > spill_rows:
+        steps.append(("grouped", spill_rows, steps[-1][2]))
+
+    estimated = {"in_memory": round(_estimate(n_zones, n_assets, n_rows, *steps[0]), 1)}
+    for assets, spill, writer in steps:
+        mb = _estimate(n_zones, n_assets, n_rows, assets, spill, writer)
+        if mb <= budget:
+            break
+    estimated["selected"] = round(mb, 1)
+    return EnginePlan(
+        budget_mb=int(budget),
+        assets=assets,
+        phase1_sort="spill" if spill else "memory",
+        spill_run_size=spill,
+        writer=writer,
+        estimated_mb=estimated,
+        fits=mb <= budget,
+    )
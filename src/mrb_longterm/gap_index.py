@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import HazardClass, Phase1Gap
+
+
+@dataclass(frozen=True)
+class GapIndex:
+    """
+    Inverted index over Phase1Output.gaps.
+
+    Posting lists hold positions into `gaps` (ascending), so every lookup
+    returns gaps in the same order as the ranked gap list and costs
+    O(result) instead of a scan over all gaps.
+    """
+    gaps: List[Phase1Gap]
+    by_type: Dict[str, List[int]]
+    by_zone: Dict[str, List[int]]
+    by_class: Dict[HazardClass, List[int]]
+    by_value: Dict[int, List[int]]
+    by_class_value: Dict[Tuple[HazardClass, int], List[int]]
+
+    @staticmethod
+    def build(gaps: List[Phase1Gap]) -> "GapIndex":
+        by_type: Dict[str, List[int]] = {}
+        by_zone: Dict[str, List[int]] = {}
+        by_class: Dict[HazardClass, List[int]] = {}
+        by_value: Dict[int, List[int]] = {}
+        by_class_value: Dict[Tuple[HazardClass, int], List[int]] = {}
+        for pos, g in enumerate(gaps):
+            by_type.setdefault(g.element_type, []).append(pos)
+            by_zone.setdefault(g.zone_id, []).append(pos)
+            by_class.setdefault(g.hazard_class, []).append(pos)
+            by_value.setdefault(g.value_index, []).append(pos)
+            by_class_value.setdefault((g.hazard_class, g.value_index), []).append(pos)
+        return GapIndex(
+            gaps=gaps,
+            by_type=by_type,
+            by_zone=by_zone,
+            by_class=by_class,
+            by_value=by_value,
+            by_class_value=by_class_value,
+        )
+
+    # --- lookups ---
+    def zones_missing(self, element_type: str) -> List[str]:
+        """Zones lacking `element_type`, in gap-ranking order."""
+        return [self.gaps[p].zone_id for p in self.by_type.get(element_type, [])]
+
+    def missing_in_zone(self, zone_id: str) -> List[str]:
+        """Element types missing in `zone_id`, in gap-ranking order."""
+        return [self.gaps[p].element_type for p in self.by_zone.get(zone_id, [])]
+
+    def query(
+        self,
+        *,
+        element_type: Optional[str] = None,
+        zone_id: Optional[str] = None,
+        hazard_class: Optional[HazardClass] = None,
+        value_index: Optional[int] = None,
+    ) -> List[Phase1Gap]:
+        """
+        Gaps matching every given filter, e.g.
+        query(element_type="hospitals_health_center", hazard_class="high").
+
+        The shortest applicable posting list drives the lookup; the remaining
+        filters are checked on its members only.
+        """
+        postings: List[List[int]] = []
+        if element_type is not None:
+            postings.append(self.by_type.get(element_type, []))
+        if zone_id is not None:
+            postings.append(self.by_zone.get(zone_id, []))
+        if hazard_class is not None:
+            if value_index is not None:
+                postings.append(self.by_class_value.get((hazard_class, value_index), []))
+            else:
+                postings.append(self.by_class.get(hazard_class, []))
+        elif value_index is not None:
+            postings.append(self.by_value.get(value_index, []))
+
+        if not postings:
+            candidates = range(len(self.gaps))
+        else:
+            candidates = min(postings, key=len)
+
+        out: List[Phase1Gap] = []
+        for p in candidates:
+            g = self.gaps[p]
+            if element_type is not None and g.element_type != element_type:
+                continue
+            if zone_id is not None and g.zone_id != zone_id:
+                continue
+            if hazard_class is not None and g.hazard_class != hazard_class:
+                continue
+            if value_index is not None and g.value_index != value_index:
+                continue
+            out.append(g)
+        return out
+
+    def to_json(self) -> Dict[str, Any]:
+        """Posting lists refer to positions in phase1_new_planification.json["gaps"]."""
+        return {
+            "n_gaps": len(self.gaps),
+            "by_element_type": self.by_type,
+            "by_zone": self.by_zone,
+            "by_hazard_class_value_index": {
+                f"{hc}:{v}": ps for (hc, v), ps in sorted(self.by_class_value.items())
+            },
+        }
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .config import ModuleConfig
+from .models import Phase1Output, Phase2Output, RankedElement, RollupNode, ZoneHazardInputs
+from .scoring import PRIORITY_NUMERIC
+
+
+def zone_parent_path(zone: ZoneHazardInputs, levels: Sequence[str]) -> List[str]:
+    """
+    Parent path of a zone, outermost first, taken from hazard_zones.json meta:
+
+      {"zone_id": "Z1", "HD": 5, "F": 5, "I": 5, "parent_path": ["North", "Town_A"]}
+      {"zone_id": "Z1", "HD": 5, "F": 5, "I": 5, "region": "North", "municipality": "Town_A"}
+
+    Missing levels are skipped, so a zone with no meta hangs directly off the root.
+    """
+    explicit = zone.meta.get("parent_path")
+    if explicit is not None:
+        if isinstance(explicit, str):
+            return [p for p in explicit.split("/") if p]
+        return [str(p) for p in explicit]
+    return [str(zone.meta[lvl]) for lvl in levels if zone.meta.get(lvl) not in (None, "")]
+
+
+class _Acc:
+    """Mutable accumulator used while folding zones into their ancestors."""
+
+    __slots__ = (
+        "level", "key", "path", "n_zones", "n_gaps", "gaps_by_type",
+        "existing_by_label", "n_ranked", "sum_final", "max_final", "children",
+    )
+
+    def __init__(self, level: str, key: str, path: List[str]) -> None:
+        self.level = level
+        self.key = key
+        self.path = path
+        self.n_zones = 0
+        self.n_gaps = 0
+        self.gaps_by_type: Dict[str, int] = {}
+        self.existing_by_label: Dict[str, int] = {k: 0 for k in PRIORITY_NUMERIC}
+        self.n_ranked = 0
+        self.sum_final = 0.0
+        self.max_final = 0.0
+        # keyed by (level, key): a zone may share its id with a region or municipality
+        self.children: Dict[Tuple[str, str], "_Acc"] = {}
+
+    def child(self, level: str, key: str) -> "_Acc":
+        node = self.children.get((level, key))
+        if node is None:
+            node = _Acc(level, key, self.path + [key])
+            self.children[(level, key)] = node
+        return node
+
+    def absorb(self, other: "_Acc") -> None:
+        self.n_zones += other.n_zones
+        self.n_gaps += other.n_gaps
+        for t, n in other.gaps_by_type.items():
+            self.gaps_by_type[t] = self.gaps_by_type.get(t, 0) + n
+        for lbl, n in other.existing_by_label.items():
+            self.existing_by_label[lbl] += n
+        self.n_ranked += other.n_ranked
+        self.sum_final += other.sum_final
+        self.max_final = max(self.max_final, other.max_final)
+
+    def freeze(self) -> RollupNode:
+        return RollupNode(
+            level=self.level,
+            key=self.key,
+            path=self.path,
+            n_zones=self.n_zones,
+            phase1_n_gaps=self.n_gaps,
+            phase1_gaps_by_type=dict(sorted(self.gaps_by_type.items())),
+            phase1_existing_by_priority_label=dict(self.existing_by_label),  # type: ignore
+            phase2_n_ranked=self.n_ranked,
+            phase2_sum_final_score=self.sum_final,
+            phase2_max_final_score=self.max_final,
+            children=[self.children[k].freeze() for k in sorted(self.children, key=lambda lk: (lk[1], lk[0]))],
+        )
+
+
+def build_rollup(
+    *,
+    zone_hazards: List[ZoneHazardInputs],
+    phase1: Phase1Output,
+    phase2: Phase2Output,
+    cfg: ModuleConfig,
+    ranked: Optional[List[RankedElement]] = None,
+) -> RollupNode:
+    """
+    Bottom-up roll-up: zone -> configured levels -> root.
+
+    Each gap / existing entry / ranked element is visited exactly once and
+    accumulated on its zone leaf; every leaf is then folded into its ancestors
+    (O(zones x depth)). Elements of zones unknown to hazard_zones.json are ignored,
+    as in the phases themselves.
+
+    `ranked` is the full Phase 2 ranking; phase2.ranked_elements is cut to the
+    top N, so without it the Phase 2 totals only cover the top N.
+    """
+    levels = list(cfg.hierarchy_levels)
+    root = _Acc("root", "all", [])
+
+    leaves: Dict[str, Tuple[_Acc, List[_Acc]]] = {}
+    for z in zone_hazards:
+        if z.zone_id in leaves:
+            raise ValueError(f"Duplicate zone_id={z.zone_id!r} in zone hazards")
+        parent_path = zone_parent_path(z, levels)
+        node = root
+        ancestors = [root]
+        for depth, key in enumerate(parent_path):
+            level = levels[depth] if depth < len(levels) else f"level_{depth}"
+            node = node.child(level, key)
+            ancestors.append(node)
+        leaf = node.child("zone", z.zone_id)
+        leaf.n_zones = 1
+        leaves[z.zone_id] = (leaf, ancestors)
+
+    for g in phase1.gaps:
+        entry = leaves.get(g.zone_id)
+        if entry is None:
+            continue
+        leaf = entry[0]
+        leaf.n_gaps += 1
+        leaf.gaps_by_type[g.element_type] = leaf.gaps_by_type.get(g.element_type, 0) + 1
+
+    for e in phase1.existing:
+        entry = leaves.get(e.zone_id)
+        if entry is None:
+            continue
+        entry[0].existing_by_label[e.priority_label] += e.count
+
+    for r in phase2.ranked_elements if ranked is None else ranked:
+        entry = leaves.get(r.zone_id)
+        if entry is None:
+            continue
+        leaf = entry[0]
+        leaf.n_ranked += 1
+        leaf.sum_final += float(r.final_score)
+        leaf.max_final = max(leaf.max_final, float(r.final_score))
+
+    for leaf, ancestors in leaves.values():
+        for a in ancestors:
+            a.absorb(leaf)
+
+    return root.freeze()
+
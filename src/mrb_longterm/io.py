@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import hashlib
 import json
-from dataclasses import asdict
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from .config import ModuleConfig
 from .models import ExposureCounts, ExposureItem, ZoneHazardInputs
@@ -18,6 +22,222 @@ def write_json(path: Path, data: Any) -> None:
     path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
 
 
+def encode_json(data: Any) -> bytes:
+    """Serialization used for every output file (same as write_json)."""
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class LazyList:
+    """
+    A JSON array produced on demand while the file is written (e.g. from a
+    k-way merge over spilled runs) instead of being held in memory.
+    """
+    factory: Callable[[], Iterable[Any]]
+
+
+@dataclass(frozen=True)
+class FileBundle:
+    """
+    An output target made of several files, written under a folder named
+    after the target: relative name -> bytes or JSON document.
+    """
+    files: Dict[str, Any]
+
+
+def _contains_lazy(value: Any) -> bool:
+    if isinstance(value, LazyList):
+        return True
+    if isinstance(value, dict):
+        return any(_contains_lazy(v) for v in value.values())
+    return False
+
+
+def _is_container(value: Any) -> bool:
+    return isinstance(value, (dict, list, LazyList)) and bool(value)
+
+
+def iter_encode_json(value: Any, _level: int = 0, stream_all: bool = False) -> Iterator[str]:
+    """
+    Incremental encoder producing exactly the text of encode_json, with
+    LazyList values streamed item by item. With stream_all, plain lists and
+    dicts holding containers are streamed too, so no whole-document string
+    is ever built.
+    """
+    indent = "  " * _level
+    if isinstance(value, LazyList) or (
+        stream_all and isinstance(value, list) and value and _is_container(value[0])
+    ):
+        items = iter(value.factory()) if isinstance(value, LazyList) else iter(value)
+        first = next(items, _END)
+        if first is _END:
+            yield "[]"
+            return
+        inner = indent + "  "
+        yield "[\n" + inner
+        yield from iter_encode_json(first, _level + 1, stream_all)
+        for item in items:
+            yield ",\n" + inner
+            yield from iter_encode_json(item, _level + 1, stream_all)
+        yield "\n" + indent + "]"
+    elif isinstance(value, dict) and value and (
+        _contains_lazy(value) or (stream_all and any(_is_container(v) for v in value.values()))
+    ):
+        inner = indent + "  "
+        sep = "{\n"
+        for k, v in value.items():
+            yield sep + inner + json.dumps(k, ensure_ascii=False) + ": "
+            yield from iter_encode_json(v, _level + 1, stream_all)
+            sep = ",\n"
+        yield "\n" + indent + "}"
+    else:
+        yield json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + indent)
+
+
+_END = object()
+
+
+def _manifest_entry(name: str, payload: bytes) -> Dict[str, Any]:
+    return {
+        "file": name,
+        "bytes": len(payload),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+    }
+
+
+def write_bytes_atomic(path: Path, payload: bytes) -> None:
+    """Write to a temp file in the target directory, then rename into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_json_atomic(path: Path, data: Any) -> Dict[str, Any]:
+    """
+    Same serialization as write_json, but written to a temp file in the target
+    directory and renamed into place, so readers never see a partial file.
+    Returns a manifest entry (file name, size, sha256).
+    """
+    payload = encode_json(data)
+    write_bytes_atomic(path, payload)
+    return _manifest_entry(path.name, payload)
+
+
+def _write_streamed(
+    path: Path,
+    name: str,
+    doc: Any,
+    unchanged: Callable[[Path, str], bool],
+    stream_all: bool = False,
+) -> Dict[str, Any]:
+    """Stream a document with LazyList fields to a temp file, hashing as we go."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter_encode_json(doc, stream_all=stream_all):
+                data = chunk.encode("utf-8")
+                digest.update(data)
+                size += len(data)
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        entry = {"file": name, "bytes": size, "sha256": digest.hexdigest()}
+        if unchanged(path, entry["sha256"]):
+            os.unlink(tmp)
+            return {**entry, "written": False}
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return {**entry, "written": True}
+
+
+MANIFEST_FILE = "manifest.json"
+
+
+def previous_checksums(output_dir: Path) -> Dict[str, str]:
+    """file name -> sha256 from the manifest of the previous run (if any)."""
+    path = output_dir / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    try:
+        manifest = read_json(path)
+    except ValueError:
+        return {}
+    return {e["file"]: e["sha256"] for e in manifest.get("files", [])}
+
+
+def write_outputs(
+    output_dir: Path,
+    documents: Dict[str, Any],
+    max_workers: Optional[int] = None,
+    only_changed: bool = False,
+    streaming: bool = False,
+) -> List[Path]:
+    """
+    Write {file_name: document} concurrently on a thread pool, each file
+    atomically, then commit manifest.json (sizes + checksums) last.
+    A consumer that sees the manifest can trust every file it lists.
+    Names may contain sub-folders ("dir/file"); `bytes` documents are
+    written verbatim, anything else is encoded as JSON.
+
+    only_changed: skip files whose content is byte-identical to the previous
+    run (checked against the previous manifest, else the file on disk). The
+    manifest still lists every document, with "written": false for skipped ones.
+
+    streaming: encode every JSON document incrementally straight to its file
+    (same bytes) instead of building it as one string first.
+
+    Returns the written paths (documents in the given order, manifest last).
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = previous_checksums(output_dir) if only_changed else {}
+    # The previous manifest must not vouch for files we are about to replace.
+    (output_dir / MANIFEST_FILE).unlink(missing_ok=True)
+
+    def unchanged(path: Path, sha256: str) -> bool:
+        if not (only_changed and path.exists()):
+            return False
+        old = previous.get(path.relative_to(output_dir).as_posix())
+        if old is None:
+            old = hashlib.sha256(path.read_bytes()).hexdigest()
+        return old == sha256
+
+    def write_one(name: str) -> Dict[str, Any]:
+        path = output_dir / name
+        doc = documents[name]
+        if _contains_lazy(doc) or (streaming and not isinstance(doc, bytes)):
+            return _write_streamed(path, name, doc, unchanged, streaming)
+        payload = doc if isinstance(doc, bytes) else encode_json(doc)
+        entry = _manifest_entry(name, payload)
+        if unchanged(path, entry["sha256"]):
+            return {**entry, "written": False}
+        write_bytes_atomic(path, payload)
+        return {**entry, "written": True}
+
+    names = list(documents)
+    workers = max_workers or min(8, max(1, len(names)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(write_one, names))
+
+    manifest_path = output_dir / MANIFEST_FILE
+    write_json_atomic(manifest_path, {"complete": True, "files": entries})
+    return [output_dir / e["file"] for e in entries if e["written"]] + [manifest_path]
+
+
 def load_zone_hazards(input_dir: Path) -> List[ZoneHazardInputs]:
     """
     input/hazard_zones.json
@@ -28,7 +248,10 @@ def load_zone_hazards(input_dir: Path) -> List[ZoneHazardInputs]:
       ]
     }
     """
-    obj = read_json(input_dir / "hazard_zones.json")
+    return parse_zone_hazards(read_json(input_dir / "hazard_zones.json"))
+
+
+def parse_zone_hazards(obj: Any) -> List[ZoneHazardInputs]:
     zones = obj.get("zones", [])
     out: List[ZoneHazardInputs] = []
     for z in zones:
@@ -44,7 +267,30 @@ def load_zone_hazards(input_dir: Path) -> List[ZoneHazardInputs]:
     return out
 
 
-def load_exposures_counts_only(input_dir: Path) -> Tuple[List[ExposureItem], List[ExposureCounts]]:
+def load_zone_adjacency(input_dir: Path) -> Optional[List[Tuple[str, str]]]:
+    """
+    input/zone_adjacency.json (optional), undirected edges between zones:
+    {
+      "edges": [["Zone_A", "Zone_B"], ["Zone_B", "Zone_C"], ...]
+    }
+    Returns None when the file is absent.
+    """
+    path = input_dir / "zone_adjacency.json"
+    if not path.exists():
+        return None
+    return parse_zone_adjacency(read_json(path))
+
+
+def parse_zone_adjacency(obj: Any) -> List[Tuple[str, str]]:
+    edges: List[Tuple[str, str]] = []
+    for e in obj.get("edges", []):
+        if not isinstance(e, (list, tuple)) or len(e) != 2:
+            raise ValueError(f"zone_adjacency.json: edge must be a [zone_id, zone_id] pair, got {e!r}")
+        edges.append((str(e[0]), str(e[1])))
+    return edges
+
+
+def load_exposure_counts(input_dir: Path) -> List[ExposureCounts]:
     """
     input/exposure_by_zone.json
     MRB provides ONLY counts per zone and per type:
@@ -56,11 +302,11 @@ def load_exposures_counts_only(input_dir: Path) -> Tuple[List[ExposureItem], Lis
         ...
       ]
     }
-
-    We also build synthetic ExposureItem list for Phase 2.
     """
-    obj = read_json(input_dir / "exposure_by_zone.json")
+    return parse_exposure_counts(read_json(input_dir / "exposure_by_zone.json"))
+
 
+def parse_exposure_counts(obj: Any) -> List[ExposureCounts]:
     if "counts" not in obj:
         raise ValueError(
             "Expected 'counts' in exposure_by_zone.json. "
@@ -75,8 +321,11 @@ def load_exposures_counts_only(input_dir: Path) -> Tuple[List[ExposureItem], Lis
                 counts_by_type={str(k): int(v) for k, v in c["counts_by_type"].items()},
             )
         )
+    return counts
 
-    # Build synthetic assets from counts for Phase 2 ranking
+
+def expand_assets(counts: List[ExposureCounts]) -> List[ExposureItem]:
+    """Build synthetic assets (zone:type:i) from counts for Phase 2 ranking."""
     assets: List[ExposureItem] = []
     for c in counts:
         for etype, n in c.counts_by_type.items():
@@ -89,8 +338,15 @@ def load_exposures_counts_only(input_dir: Path) -> Tuple[List[ExposureItem], Lis
                         meta={"synthetic_id": True},
                     )
                 )
+    return assets
+
 
-    return assets, counts
+def load_exposures_counts_only(input_dir: Path) -> Tuple[List[ExposureItem], List[ExposureCounts]]:
+    """
+    Counts (see load_exposure_counts) plus the synthetic ExposureItem list for Phase 2.
+    """
+    counts = load_exposure_counts(input_dir)
+    return expand_assets(counts), counts
 
 
 def load_config(input_dir: Path) -> ModuleConfig:
@@ -102,11 +358,72 @@ def load_config(input_dir: Path) -> ModuleConfig:
     return ModuleConfig(
         phase1_gap_value_threshold=int(obj.get("phase1_gap_value_threshold", 4)),
         phase1_only_nonlow_hazard=bool(obj.get("phase1_only_nonlow_hazard", True)),
+        phase1_standards=dict(obj.get("phase1_standards", {})),
+        phase1_coverage_hops=int(obj.get("phase1_coverage_hops", 1)),
+        phase1_coverage_provider_classes=tuple(
+            str(x) for x in obj.get("phase1_coverage_provider_classes", ("low", "medium"))
+        ),
         alpha_min=float(obj.get("alpha_min", 0.55)),
         alpha_max=float(obj.get("alpha_max", 0.92)),
+        phase2_decay_model=str(obj.get("phase2_decay_model", "exponential")),
+        phase2_decay_params={
+            str(m): {str(k): float(v) for k, v in params.items()}
+            for m, params in obj.get("phase2_decay_params", {}).items()
+        },
+        phase2_alpha_by_type={str(k): float(v) for k, v in obj.get("phase2_alpha_by_type", {}).items()},
+        phase2_decay_compare=tuple(str(x) for x in obj.get("phase2_decay_compare", ())),
         phase2_top_n=int(obj.get("phase2_top_n", 50)),
+        phase2_max_per_zone=int(obj.get("phase2_max_per_zone", 0)),
+        phase2_max_per_hazard_class=int(obj.get("phase2_max_per_hazard_class", 0)),
+        phase2_min_per_type={str(k): int(v) for k, v in obj.get("phase2_min_per_type", {}).items()},
+        phase2_partition_by=str(obj.get("phase2_partition_by", "zone")),
+        phase2_workers=int(obj.get("phase2_workers", 0)),
+        phase1_spill_run_size=int(obj.get("phase1_spill_run_size", 0)),
+        memory_budget_mb=int(obj.get("memory_budget_mb", 0)),
+        hierarchy_levels=tuple(str(x) for x in obj.get("hierarchy_levels", ("region", "municipality"))),
     )
 
 
+COMPACT_SCHEMA = "mrb-compact/1"
+
+
+def _expand_compact(value: Any, dictionaries: Dict[str, List[str]]) -> Any:
+    if isinstance(value, dict):
+        if "$columns" in value:
+            coded = set(value.get("$coded", ()))
+            names = list(value["$columns"])
+            cols = [
+                [dictionaries[name][c] for c in col] if name in coded else [_expand_compact(v, dictionaries) for v in col]
+                for name, col in value["$columns"].items()
+            ]
+            if not names:
+                return [{} for _ in range(value["$rows"])]
+            return [dict(zip(names, row)) for row in zip(*cols)]
+        return {k: _expand_compact(v, dictionaries) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand_compact(v, dictionaries) for v in value]
+    return value
+
+
+def decode_compact(obj: Any) -> Any:
+    """
+    Expand a compact-schema document (see outputs.compact_document) back to
+    the full structure; other documents are returned unchanged.
+
+    Compact: {"schema": "mrb-compact/1", "dictionaries": {column: [str]},
+    "document": ...} where every list of same-keyed objects is a table
+    {"$rows": n, "$columns": {name: [values]}, "$coded": [names]} and coded
+    columns hold indexes into dictionaries[name].
+    """
+    if not (isinstance(obj, dict) and obj.get("schema") == COMPACT_SCHEMA):
+        return obj
+    return _expand_compact(obj["document"], obj["dictionaries"])
+
+
+def read_output(path: Path) -> Any:
+    """Read an output document written with either schema, as the full structure."""
+    return decode_compact(read_json(path))
+
+
 def dump_dataclass_list(items: List[Any]) -> List[Dict[str, Any]]:
     return [asdict(x) for x in items]
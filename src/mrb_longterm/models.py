@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional
+
+if TYPE_CHECKING:
+    from .gap_index import GapIndex
 
 HazardClass = Literal["low", "medium", "high"]
 Suitability = Literal["Suitable", "Conditionally acceptable", "Not suitable"]
@@ -88,6 +91,9 @@ class Phase1Output:
     gaps: List[Phase1Gap]
     gaps_grouped_by_hazard_class: Dict[HazardClass, List[Phase1Gap]]
 
+    # inverted index over `gaps` (by type / zone / (hazard_class, value_index))
+    gap_index: Optional["GapIndex"] = None
+
 
 
 @dataclass(frozen=True)
@@ -120,15 +126,54 @@ class RankedElement:
     final_score: float
 
 
+@dataclass(frozen=True)
+class SkippedElement:
+    """A candidate passed over by the constrained top-N selection."""
+    element_id: str
+    element_type: str
+    zone_id: str
+    hazard_class: HazardClass
+    base_score: float
+    final_score: float  # score it had when it was the best remaining candidate
+    at_rank: int  # 1-based rank it would have taken
+    reason: Literal["max_per_zone", "max_per_hazard_class", "reserved_for_min_per_type"]
+
+
 @dataclass(frozen=True)
 class Phase2Output:
     ranked_elements: List[RankedElement]
     # Convenience summaries
     by_priority_label: Dict[PriorityLabel, int]
     top_n: int
+    # constrained selection only (phase2_max_per_zone etc.)
+    skipped: List[SkippedElement] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class RollupNode:
+    """
+    One node of the zone hierarchy (root -> region -> municipality -> zone).
+    Aggregates are precomputed bottom-up so a UI can drill down without
+    rescanning the ranked/gap lists.
+    """
+    level: str  # "root", a configured hierarchy level, or "zone"
+    key: str
+    path: List[str]
+    n_zones: int
+
+    phase1_n_gaps: int
+    phase1_gaps_by_type: Dict[str, int]
+    phase1_existing_by_priority_label: Dict[PriorityLabel, int]  # summed element counts
+
+    phase2_n_ranked: int
+    phase2_sum_final_score: float
+    phase2_max_final_score: float
+
+    children: List["RollupNode"] = field(default_factory=list)
 
 
 @dataclass(frozen=True)
 class RunOutputs:
     phase1: Phase1Output
     phase2: Phase2Output
+    rollup: Optional[RollupNode] = None
@@ -0,0 +1,449 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from .assets import ASSETS_FILE, AssetTable
+from .config import ModuleConfig
+from .constraints import constraints_active, constraints_doc
+from .decay import custom_decay, decay_doc, decay_model
+from .engines import EnginePlan
+from .importance_tables import DEFAULT_TABLES
+from .io import COMPACT_SCHEMA, FileBundle, LazyList, dump_dataclass_list
+from .models import (
+    ExposureCounts,
+    Phase1Output,
+    Phase2Output,
+    RankedElement,
+    RollupNode,
+    ZoneHazardInputs,
+    ZoneHazardResult,
+)
+from .scoring import PRIORITY_NUMERIC, priority_label, suitability_from_hazard_class
+from .standards import COUNTS_GAP_DEFINITION, STANDARDS_GAP_DEFINITION, configured_standards_table
+
+# Output documents, in the order the CLI writes them: target name -> file name
+OUTPUT_FILES: Dict[str, str] = {
+    "phase1_new_planification": "phase1_new_planification.json",
+    "phase1_matrix": "phase1_matrix.json",
+    "phase2_risk_mitigation": "phase2_risk_mitigation.json",
+    "phase2_matrix": "phase2_matrix.json",
+    "phase2_type_summary": "phase2_type_summary.json",
+    "summary": "summary.json",
+    "hierarchy_summary": "hierarchy_summary.json",
+    "phase1_gap_index": "phase1_gap_index.json",
+    "changes": "changes.json",
+    "phase1_matrix_columnar": "phase1_matrix_columnar",  # folder (FileBundle)
+    "phase2_partitioned": "phase2_partitioned.json",
+    "phase1_gap_coverage": "phase1_gap_coverage.json",
+    "phase2_decay_comparison": "phase2_decay_comparison.json",
+}
+
+# Targets only built on request (--gap-index, --compare, --columnar-matrix, --partitioned, --coverage,
+# --decay-comparison)
+OPTIONAL_TARGETS = (
+    "phase1_gap_index",
+    "changes",
+    "phase1_matrix_columnar",
+    "phase2_partitioned",
+    "phase1_gap_coverage",
+    "phase2_decay_comparison",
+)
+
+
+# output schemas: "full" (default, indented JSON) or "compact" (see compact_document)
+SCHEMAS = ("full", "compact")
+
+# string columns replaced by integer codes into a per-document dictionary
+CODED_COLUMNS = ("zone_id", "element_type", "hazard_class", "priority_label", "suitability")
+
+
+def _rows(items: Any, stream: bool = False) -> Any:
+    # spilled (bounded-memory) Phase 1 lists, and any list under a streaming
+    # engine plan, are turned into row dicts only while the file is written
+    if isinstance(items, list) and not stream:
+        return dump_dataclass_list(items)
+    return LazyList(lambda: (asdict(x) for x in items))
+
+
+def phase1_planification_doc(phase1: Phase1Output, cfg: ModuleConfig, stream: bool = False) -> Dict[str, Any]:
+    doc = {
+        "zoning": dump_dataclass_list(phase1.zoning),
+        "suitability_by_zone": phase1.suitability_by_zone,
+        "existing": _rows(phase1.existing, stream),
+        "gaps": _rows(phase1.gaps, stream),
+        "gaps_grouped_by_hazard_class": {
+            k: _rows(v, stream) for k, v in phase1.gaps_grouped_by_hazard_class.items()
+        },
+
+        "notes": {
+            "mode": "counts-only",
+            "phase1_gap_value_threshold": cfg.phase1_gap_value_threshold,
+            "phase1_only_nonlow_hazard": cfg.phase1_only_nonlow_hazard,
+            "existing_definition": "Existing = element types with count > 0, scored via hazard class × Excel ValueIndex.",
+            "gap_definition": "Gap = important type (ValueIndex >= threshold) with count == 0."
+        }
+    }
+    if cfg.phase1_standards:
+        doc["notes"]["standards"] = cfg.phase1_standards
+        doc["notes"]["standards_gap_definition"] = (
+            "For types with a standard: expected = ceil(zone meta attribute * units / per), "
+            "gap = max(expected - observed, 0); gaps ranked by gap x priority rank."
+        )
+    return doc
+
+
+def phase1_matrix_doc(
+    zoning: List[ZoneHazardResult],
+    counts: List[ExposureCounts],
+    cfg: ModuleConfig,
+    zone_hazards: Optional[List[ZoneHazardInputs]] = None,
+) -> Dict[str, Any]:
+    """
+    Phase 1 visualization matrix (zones x types). Needs only zoning and counts,
+    so it can be produced without running the Phase 1 gap analysis. With
+    cfg.phase1_standards, is_gap follows the same shortfall rule as the gap
+    analysis, read from the zone inputs' meta (`zone_hazards`).
+    """
+    # Full ordered list of types (from Excel / hardcoded)
+    phase1_types = list(DEFAULT_TABLES.phase1_new_planification.keys())
+
+    # Count matrix from MRB input
+    counts_by_zone = {c.zone_id: dict(c.counts_by_type) for c in counts}
+
+    # Hazard lookup for zones
+    zone_info = {z.zone_id: z for z in zoning}
+
+    # Planning standards, when configured, decide is_gap for their types
+    standards = configured_standards_table(cfg.phase1_standards, zone_hazards, counts_by_zone)
+
+    # Build per-zone rows with cells
+    matrix_rows = []
+    for zone_id in sorted(zone_info.keys()):
+        z = zone_info[zone_id]
+        hazard_class = z.hazard_class
+
+        row = {
+            "zone_id": zone_id,
+            "hazard_index": z.hazard_index,
+            "hazard_class": hazard_class,
+            "suitability": suitability_from_hazard_class(hazard_class),
+            "cells": []
+        }
+
+        for etype in phase1_types:
+            v = DEFAULT_TABLES.phase1_new_planification[etype]
+            c = int(counts_by_zone.get(zone_id, {}).get(etype, 0))
+            plabel = priority_label(hazard_class, v)  # uses proposal matrix
+            is_gap = standards.is_gap(zone_id, etype) if standards is not None else None
+            if is_gap is None:
+                is_gap = v >= cfg.phase1_gap_value_threshold and c == 0
+
+            row["cells"].append({
+                "element_type": etype,
+
+                # proposal axes
+                "hazard_class": hazard_class,
+                "value_index": v,
+
+                # proposal result
+                "priority_label": plabel,
+                "priority_rank": PRIORITY_NUMERIC[plabel],
+
+                # data context
+                "count": c,
+                "is_gap": is_gap
+            })
+
+        matrix_rows.append(row)
+
+    # A compact “gaps-only” view for UI toggles
+    gaps_only = []
+    for row in matrix_rows:
+        gaps_only.append({
+            "zone_id": row["zone_id"],
+            "hazard_class": row["hazard_class"],
+            "hazard_index": row["hazard_index"],
+            "cells": [c for c in row["cells"] if c["value_index"] >= cfg.phase1_gap_value_threshold],
+        })
+
+    return {
+        "element_types": phase1_types,
+        "phase": 1,
+        "mode": "counts-only" if standards is None else "planning-standards",
+        "threshold": {
+            "phase1_gap_value_threshold": cfg.phase1_gap_value_threshold,
+            "phase1_only_nonlow_hazard": cfg.phase1_only_nonlow_hazard
+        },
+
+        "ranking_matrix_definition": {
+            "axes": {
+                "x": "value_index (1–5, from Excel)",
+                "y": "hazard_class (low / medium / high)"
+            },
+            "cells_meaning": "priority_label / priority_rank",
+            "priority_scale": {
+                "1": "Low",
+                "2": "Medium",
+                "3": "Medium-High",
+                "4": "High",
+                "5": "Very High"
+            }
+        },
+
+        "matrix_rows": matrix_rows,
+        "gaps_only_rows": gaps_only,
+        "legend": {
+            "cell_fields": ["count", "value_index", "priority_label", "priority_rank", "is_gap"],
+            "is_gap_definition": COUNTS_GAP_DEFINITION if standards is None else STANDARDS_GAP_DEFINITION
+        }
+    }
+
+
+def _assets_from_file(assets: Any) -> bool:
+    # exposure_assets.csv input is seeded as an AssetTable read from that file;
+    # counts input expands to synthetic assets (a list, or a grouped AssetTable)
+    return isinstance(assets, AssetTable) and assets.source is not None
+
+
+def phase2_risk_mitigation_doc(
+    phase2: Phase2Output,
+    cfg: ModuleConfig,
+    stream: bool = False,
+    assets: Any = None,
+) -> Dict[str, Any]:
+    if _assets_from_file(assets):
+        assets_note = f"element IDs from {ASSETS_FILE} (one row per real asset)"
+    else:
+        assets_note = "synthetic IDs generated from counts: zone:type:i"
+    doc = {
+        "ranked_elements": _rows(phase2.ranked_elements, stream),
+        "by_priority_label": phase2.by_priority_label,
+        "top_n": phase2.top_n,
+        "notes": {
+            "assets": assets_note,
+            "diminishing_returns": {"alpha_min": cfg.alpha_min, "alpha_max": cfg.alpha_max}
+        }
+    }
+    if custom_decay(cfg):
+        doc["notes"]["diminishing_returns"]["decay"] = decay_doc(cfg)
+    if constraints_active(cfg):
+        doc["constraints"] = constraints_doc(cfg)
+        doc["skipped"] = dump_dataclass_list(phase2.skipped)
+    return doc
+
+
+def phase2_matrix_doc(phase2: Phase2Output) -> Dict[str, Any]:
+    """Aggregated mitigation importance per (zone, element_type)."""
+    phase2_matrix: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    for r in phase2.ranked_elements:
+        z = r.zone_id
+        t = r.element_type
+        phase2_matrix.setdefault(z, {})
+        cell = phase2_matrix[z].setdefault(t, {
+            "n_assets": 0,
+            "sum_final_score": 0.0,
+            "max_final_score": 0.0
+        })
+        cell["n_assets"] += 1
+        cell["sum_final_score"] += float(r.final_score)
+        cell["max_final_score"] = max(cell["max_final_score"], float(r.final_score))
+
+    return {
+        "phase": 2,
+        "meaning": "Aggregated mitigation importance per (zone, element_type)",
+        "cells_definition": {
+            "n_assets": "how many assets of this type were ranked",
+            "sum_final_score": "total contribution after diminishing returns",
+            "max_final_score": "highest-ranked asset of this type"
+        },
+        "matrix": phase2_matrix
+    }
+
+
+def phase2_type_summary_doc(phase2: Phase2Output, cfg: ModuleConfig, assets: Any = None) -> Dict[str, Any]:
+    """Phase 2 type summary (UI)."""
+    type_stats: Dict[str, Dict[str, Any]] = {}
+    for r in phase2.ranked_elements:
+        t = r.element_type
+        st = type_stats.setdefault(t, {
+            "element_type": t,
+            "n_assets": 0,
+            "sum_final_score": 0.0,
+            "avg_final_score": 0.0,
+            "max_final_score": None,
+            "min_final_score": None,
+            "priority_labels": {},
+            "zones": set(),
+        })
+
+        st["n_assets"] += 1
+        st["sum_final_score"] += float(r.final_score)
+        st["zones"].add(r.zone_id)
+
+        # min/max
+        st["max_final_score"] = float(r.final_score) if st["max_final_score"] is None else max(st["max_final_score"], float(r.final_score))
+        st["min_final_score"] = float(r.final_score) if st["min_final_score"] is None else min(st["min_final_score"], float(r.final_score))
+
+        # priority label counts
+        pl = r.priority_label
+        st["priority_labels"][pl] = st["priority_labels"].get(pl, 0) + 1
+
+    # finalize avg + zones list
+    type_summary = []
+    for st in type_stats.values():
+        st["avg_final_score"] = st["sum_final_score"] / max(st["n_assets"], 1)
+        st["zones"] = sorted(list(st["zones"]))
+        type_summary.append(st)
+
+    # sort by total contribution (sum_final_score)
+    type_summary = sorted(type_summary, key=lambda x: x["sum_final_score"], reverse=True)
+
+    doc = {
+        "phase": 2,
+        "mode": f"asset-level ({ASSETS_FILE})" if _assets_from_file(assets) else "counts-only (synthetic assets)",
+        "top_n_applied": phase2.top_n,
+        "alpha": {"min": cfg.alpha_min, "max": cfg.alpha_max},
+        "summary_by_type": type_summary,
+        "legend": {
+            "sum_final_score": "Total contribution of this type in the ranked list",
+            "avg_final_score": "Average final_score after diminishing returns",
+            "priority_labels": "How many items of this type ended up in each PriorityLabel bucket"
+        }
+    }
+    if custom_decay(cfg):
+        doc["decay"] = decay_doc(cfg)
+    return doc
+
+
+def phase2_decay_comparison_doc(rankings: Dict[str, List[RankedElement]], cfg: ModuleConfig) -> Dict[str, Any]:
+    top_n = max(1, int(cfg.phase2_top_n))
+    configured = {r.element_id for r in rankings[cfg.phase2_decay_model]}
+    models = {}
+    for name, ranked in rankings.items():
+        ids = [r.element_id for r in ranked]
+        top = set(ids)
+        type_mix: Dict[str, int] = {}
+        for r in ranked:
+            type_mix[r.element_type] = type_mix.get(r.element_type, 0) + 1
+        models[name] = {
+            "params": decay_model(name, cfg.phase2_decay_params.get(name)).params,
+            "type_mix": type_mix,
+            "vs_configured": {
+                "n_shared": len(configured.intersection(ids)),
+                "entered": [i for i in ids if i not in configured],
+                "left": [r.element_id for r in rankings[cfg.phase2_decay_model] if r.element_id not in top],
+            },
+            "ranked_elements": [asdict(r) for r in ranked],
+        }
+    return {
+        "phase": 2,
+        "configured_model": cfg.phase2_decay_model,
+        "top_n": top_n,
+        "alpha": {"min": cfg.alpha_min, "max": cfg.alpha_max, "by_type": dict(cfg.phase2_alpha_by_type)},
+        "models": models,
+        "notes": {
+            "vs_configured": "top-N membership against configured_model: entered / left element ids",
+            "constraints": "plain greedy top N; phase2_max_per_* / phase2_min_per_type are not applied",
+        },
+    }
+
+
+def summary_doc(
+    zoning: List[ZoneHazardResult],
+    phase1: Phase1Output,
+    cfg: ModuleConfig,
+    engines: Optional[EnginePlan] = None,
+) -> Dict[str, Any]:
+    doc = {
+        "n_zones": len(zoning),
+        "n_types_in_table_phase1": len(set(DEFAULT_TABLES.phase1_new_planification.keys())),
+        "n_types_in_table_phase2": len(set(DEFAULT_TABLES.phase2_risk_mitigation.keys())),
+        "phase1_n_gaps": len(phase1.gaps),
+        # same clamp as Phase2Output.top_n; no need to run Phase 2 for it
+        "phase2_top_n": max(1, int(cfg.phase2_top_n)),
+    }
+    if engines is not None and engines.budget_mb is not None:
+        doc["engines"] = engines.to_json()
+    return doc
+
+
+def hierarchy_summary_doc(rollup: RollupNode, cfg: ModuleConfig) -> Dict[str, Any]:
+    return {
+        "levels": ["root", *cfg.hierarchy_levels, "zone"],
+        "meaning": "Phase 1 gaps / existing priority mix and Phase 2 score totals rolled up zone -> municipality -> region",
+        "phase2_scope": "every ranked asset, not only the top N",
+        "root": asdict(rollup),
+    }
+
+
+def phase1_gap_index_doc(phase1: Phase1Output) -> Dict[str, Any]:
+    if phase1.gap_index is None:
+        raise ValueError("phase1_gap_index is not available when Phase 1 spills to disk (phase1_spill_run_size > 0)")
+    return phase1.gap_index.to_json()
+
+
+def _compact(value: Any, dictionaries: Dict[str, Dict[str, int]]) -> Any:
+    if isinstance(value, LazyList):
+        value = list(value.factory())  # column tables need the whole list
+    if isinstance(value, dict):
+        return {k: _compact(v, dictionaries) for k, v in value.items()}
+    if not isinstance(value, list):
+        return value
+    keys = tuple(value[0]) if value and isinstance(value[0], dict) else None
+    if keys is None or not all(isinstance(r, dict) and tuple(r) == keys for r in value):
+        return [_compact(v, dictionaries) for v in value]
+
+    columns: Dict[str, List[Any]] = {}
+    coded: List[str] = []
+    for name in keys:
+        col = [r[name] for r in value]
+        if name in CODED_COLUMNS and all(isinstance(v, str) for v in col):
+            codes = dictionaries.setdefault(name, {})
+            columns[name] = [codes.setdefault(v, len(codes)) for v in col]
+            coded.append(name)
+        else:
+            columns[name] = [_compact(v, dictionaries) for v in col]
+    return {"$rows": len(value), "$columns": columns, "$coded": coded}
+
+
+def compact_document(doc: Any) -> bytes:
+    """
+    Dictionary-encoded form of an output document: every list of objects
+    with the same keys becomes a column table, the CODED_COLUMNS strings are
+    replaced by indexes into header dictionaries, and the JSON is written
+    without indentation. io.decode_compact restores the full structure.
+    """
+    dictionaries: Dict[str, Dict[str, int]] = {}
+    body = _compact(doc, dictionaries)
+    return json.dumps(
+        {
+            "schema": COMPACT_SCHEMA,
+            "dictionaries": {name: list(codes) for name, codes in dictionaries.items()},
+            "document": body,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def output_documents(results: Dict[str, Any], targets: List[str], schema: str = "full") -> Dict[str, Any]:
+    """
+    Map target results to {relative file name: document}, expanding
+    FileBundles. With schema="compact", JSON documents are compact-encoded.
+    """
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown output schema {schema!r}. Known: {list(SCHEMAS)}")
+    out: Dict[str, Any] = {}
+    for t in targets:
+        doc = results[t]
+        if isinstance(doc, FileBundle):
+            for name, content in doc.files.items():
+                out[f"{OUTPUT_FILES[t]}/{name}"] = content
+        elif schema == "compact":
+            out[OUTPUT_FILES[t]] = compact_document(doc)
+        else:
+            out[OUTPUT_FILES[t]] = doc
+    return out
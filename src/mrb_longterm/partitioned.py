@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import heapq
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from itertools import chain, islice, pairwise
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import ModuleConfig
+from .models import ElementPriority, RankedElement
+from .scoring import diminishing_returns_rank
+
+# partition name -> key function over candidates
+PARTITION_KEYS: Dict[str, Callable[[ElementPriority], str]] = {
+    "zone": lambda c: c.zone_id,
+    "hazard_class": lambda c: c.hazard_class,
+    "element_type": lambda c: c.element_type,
+}
+
+
+def partition_candidates(
+    candidates: List[ElementPriority],
+    partition_by: str,
+) -> Dict[str, List[ElementPriority]]:
+    """Group candidates by partition key, keeping their relative order."""
+    try:
+        key = PARTITION_KEYS[partition_by]
+    except KeyError:
+        raise ValueError(f"Unknown partition_by={partition_by!r}. Known: {sorted(PARTITION_KEYS)}") from None
+    parts: Dict[str, List[ElementPriority]] = {}
+    for c in candidates:
+        parts.setdefault(key(c), []).append(c)
+    return parts
+
+
+def _rank_batch(batch: List[Tuple[str, List[ElementPriority]]], cfg: ModuleConfig) -> List[Tuple[str, List[RankedElement]]]:
+    return [(k, diminishing_returns_rank(cands, cfg)) for k, cands in batch]
+
+
+def _batches(parts: Dict[str, List[ElementPriority]], n_batches: int) -> List[List[Tuple[str, List[ElementPriority]]]]:
+    """
+    Pack many small partitions into ~n_batches batches of similar cost
+    (the heap ranker is O(n log n) in partition size): largest first, onto the
+    currently lightest batch.
+    """
+    batches: List[List[Tuple[str, List[ElementPriority]]]] = [[] for _ in range(n_batches)]
+    heap = [(0, i) for i in range(n_batches)]
+    for k, cands in sorted(parts.items(), key=lambda kv: len(kv[1]), reverse=True):
+        cost, i = heapq.heappop(heap)
+        batches[i].append((k, cands))
+        heapq.heappush(heap, (cost + len(cands) * math.log2(len(cands) + 1), i))
+    return [b for b in batches if b]
+
+
+def rank_partitioned(
+    candidates: List[ElementPriority],
+    cfg: ModuleConfig,
+    partition_by: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, List[RankedElement]]:
+    """
+    Diminishing-returns ranking applied independently inside each partition
+    (per zone by default), across a process pool. Repetition counts are per
+    partition: the first road of every zone gets weight 1.
+
+    Returns {partition_key: full ranked list}, keys sorted.
+    """
+    parts = partition_candidates(candidates, partition_by or cfg.phase2_partition_by)
+    workers = max_workers if max_workers is not None else (cfg.phase2_workers or os.cpu_count() or 1)
+
+    if workers <= 1 or len(parts) <= 1:
+        ranked = _rank_batch(list(parts.items()), cfg)
+    else:
+        # a few batches per worker keeps the pool busy without per-partition IPC
+        batches = _batches(parts, min(len(parts), workers * 4))
+        ranked = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_rank_batch, batches, [cfg] * len(batches)):
+                ranked.extend(result)
+
+    return dict(sorted(ranked, key=lambda kv: kv[0]))
+
+
+def merge_partitions(
+    partitions: Dict[str, List[RankedElement]],
+    limit: Optional[int] = None,
+) -> List[RankedElement]:
+    """
+    Global view: the partition rankings merged on final_score (the first
+    `limit` only, if given); ties go to the partition whose key sorts first.
+
+    With decaying weights each partition's list is non-increasing in
+    final_score (greedy picks the current maximum), so a lazy k-way merge is
+    exact. The non-decaying fallback (alpha > 1) can rank a higher final
+    later; such lists are sorted instead.
+    """
+    def score(r: RankedElement) -> float:
+        return r.final_score
+
+    if all(a.final_score >= b.final_score for ranked in partitions.values() for a, b in pairwise(ranked)):
+        merged = heapq.merge(*partitions.values(), key=score, reverse=True)
+        return list(merged if limit is None else islice(merged, limit))
+    everything = chain.from_iterable(partitions.values())
+    if limit is None:
+        return sorted(everything, key=score, reverse=True)
+    return heapq.nlargest(limit, everything, key=score)
+
+
+def partitioned_doc(partitions: Dict[str, List[RankedElement]], cfg: ModuleConfig) -> Dict[str, Any]:
+    top_n = max(1, int(cfg.phase2_top_n))
+    merged = merge_partitions(partitions, top_n)
+    return {
+        "phase": 2,
+        "partition_by": cfg.phase2_partition_by,
+        "top_n_per_partition": top_n,
+        "partitions": {
+            k: {
+                "n_candidates": len(ranked),
+                "ranked_elements": [asdict(r) for r in ranked[:top_n]],
+            }
+            for k, ranked in partitions.items()
+        },
+        "merged_top_n": [asdict(r) for r in merged],
+        "notes": {
+            "diminishing_returns": "repetition counts restart in every partition",
+            "merged_top_n": "k-way merge of all partition rankings on final_score",
+        },
+    }
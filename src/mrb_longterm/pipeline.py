@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 from .models import Phase1Existing
 
+from .assets import AssetTable
 from .config import ModuleConfig
+from .constraints import constrained_rank
+from .gap_index import GapIndex
+from .hierarchy import build_rollup
 from .importance_tables import DEFAULT_TABLES
 from .models import (
     ElementPriority,
@@ -12,17 +16,22 @@ from .models import (
     Phase1Gap,
     Phase1Output,
     Phase2Output,
+    RankedElement,
     RunOutputs,
+    SkippedElement,
     ZoneHazardInputs,
+    ZoneHazardResult,
 )
 from .scoring import (
+    PRIORITY_MATRIX,
     PRIORITY_NUMERIC,
     base_score_from_priority,
-    diminishing_returns_rank,
     priority_label,
     suitability_from_hazard_class,
     zoning_from_inputs,
 )
+from .spill import Interner, SpilledSequence, SpillSorter
+from .standards import build_standards_table, parse_standards
 
 
 def _index_zones(zoning):
@@ -33,11 +42,31 @@ def _counts_lookup(counts: List[ExposureCounts]) -> Dict[str, Dict[str, int]]:
     return {c.zone_id: dict(c.counts_by_type) for c in counts}
 
 
+# Rank existing: highest priority bucket, then hazard index, then value, then count
+def _existing_rank_key(e: Phase1Existing):
+    return (PRIORITY_NUMERIC[e.priority_label], e.hazard_index, e.value_index, e.count)
+
+
+# Rank gaps: high hazard first, then value_index
+_HAZARD_ORDER = {"high": 3, "medium": 2, "low": 1}
+
+
+def _gap_rank_key(g: Phase1Gap):
+    return (_HAZARD_ORDER[g.hazard_class], g.value_index)
+
+
+# With planning standards: gap magnitude x priority bucket first
+def _gap_magnitude_rank_key(g: Phase1Gap):
+    priority = PRIORITY_NUMERIC[PRIORITY_MATRIX[(g.hazard_class, g.value_index)]]
+    return (g.gap * priority, _HAZARD_ORDER[g.hazard_class], g.value_index)
+
+
 def run_phase1(
     *,
     zone_hazards: List[ZoneHazardInputs],
     exposure_counts: List[ExposureCounts],
     cfg: ModuleConfig,
+    zoning: Optional[List[ZoneHazardResult]] = None,
 ) -> Phase1Output:
     """
     Phase 1 (New planification) in counts-only mode:
@@ -49,9 +78,13 @@ def run_phase1(
          - Priority matrix => PriorityLabel
       B) gaps: missing important element-types (count==0) using the same logic
 
-    No population or planning standards are used.
+    With cfg.phase1_standards, types that have a standard are instead gaps
+    whenever observed < expected (expected from zone meta attributes, see
+    standards.py), gap = the shortfall, and gaps rank by gap x priority.
+    `zoning` may be passed in when it was already computed (shared with Phase 2).
     """
-    zoning = zoning_from_inputs(zone_hazards)
+    if zoning is None:
+        zoning = zoning_from_inputs(zone_hazards)
     zone_idx = _index_zones(zoning)
     counts_by_zone = _counts_lookup(exposure_counts)
 
@@ -59,8 +92,26 @@ def run_phase1(
 
     threshold = cfg.phase1_gap_value_threshold
 
+    standards = parse_standards(cfg.phase1_standards)
+    gap_key = _gap_rank_key
+    if standards:
+        table = build_standards_table(zone_hazards, counts_by_zone, standards)
+        standard_notes = {t: f"Below standard ({std.describe()})" for t, std in standards.items()}
+        gap_key = _gap_magnitude_rank_key
+
     existing: List[Phase1Existing] = []
     gaps: List[Phase1Gap] = []
+    add_existing = existing.append
+    add_gap = gaps.append
+
+    # Bounded-memory mode: sort fixed-size runs, spill them, merge on read.
+    spill_run_size = int(cfg.phase1_spill_run_size)
+    if spill_run_size > 0:
+        interner = Interner()
+        existing_sorter = SpillSorter(Phase1Existing, _existing_rank_key, spill_run_size, interner)
+        gaps_sorter = SpillSorter(Phase1Gap, gap_key, spill_run_size, interner)
+        add_existing = existing_sorter.add
+        add_gap = gaps_sorter.add
 
     for zone_id, zinfo in zone_idx.items():
         if cfg.phase1_only_nonlow_hazard and zinfo.hazard_class == "low":
@@ -78,7 +129,7 @@ def run_phase1(
             base = base_score_from_priority(zinfo.hazard_index, zinfo.hazard_class, v)
 
             if observed > 0:
-                existing.append(
+                add_existing(
                     Phase1Existing(
                         zone_id=zone_id,
                         hazard_index=zinfo.hazard_index,
@@ -90,10 +141,26 @@ def run_phase1(
                         base_score=base,
                     )
                 )
-            else:
+            if etype in standards:
+                row = table.zone_row[zone_id]
+                gap = table.gap[etype][row]
+                if gap > 0:
+                    add_gap(
+                        Phase1Gap(
+                            zone_id=zone_id,
+                            hazard_class=zinfo.hazard_class,
+                            element_type=etype,
+                            value_index=v,
+                            observed=observed,
+                            expected=table.expected[etype][row],
+                            gap=gap,
+                            note=standard_notes[etype],
+                        )
+                    )
+            elif observed == 0:
                 # Gap only for "important" types (ValueIndex >= threshold)
                 if v >= threshold:
-                    gaps.append(
+                    add_gap(
                         Phase1Gap(
                             zone_id=zone_id,
                             hazard_class=zinfo.hazard_class,
@@ -106,42 +173,41 @@ def run_phase1(
                         )
                     )
 
-    # Rank existing: highest priority bucket, then hazard index, then value, then count
-    existing_sorted = sorted(
-        existing,
-        key=lambda e: (PRIORITY_NUMERIC[e.priority_label], e.hazard_index, e.value_index, e.count),
-        reverse=True,
-    )
-
-    # Rank gaps: high hazard first, then value_index
-    hazard_order = {"high": 3, "medium": 2, "low": 1}
-    gaps_sorted = sorted(
-        gaps,
-        key=lambda g: (hazard_order[g.hazard_class], g.value_index),
-        reverse=True,
-    )
-
-    grouped: Dict[str, List[Phase1Gap]] = {"low": [], "medium": [], "high": []}
-    for g in gaps_sorted:
-        grouped[g.hazard_class].append(g)
+    if spill_run_size > 0:
+        existing_sorted = existing_sorter.finish()
+        gaps_sorted = gaps_sorter.finish()
+    else:
+        existing_sorted = sorted(existing, key=_existing_rank_key, reverse=True)
+        gaps_sorted = sorted(gaps, key=gap_key, reverse=True)
+
+    if isinstance(gaps_sorted, SpilledSequence):
+        # spilled: grouped views re-merge from disk, filtering one class each
+        grouped = {hc: gaps_sorted.filtered(lambda g, hc=hc: g.hazard_class == hc) for hc in ("low", "medium", "high")}
+        gap_index = None
+    else:
+        grouped = {"low": [], "medium": [], "high": []}
+        for g in gaps_sorted:
+            grouped[g.hazard_class].append(g)
+        gap_index = GapIndex.build(gaps_sorted)
 
     return Phase1Output(
         zoning=zoning,
         suitability_by_zone=suitability_by_zone,
-        existing=existing_sorted,
-        gaps=gaps_sorted,
+        existing=existing_sorted,  # type: ignore
+        gaps=gaps_sorted,  # type: ignore
         gaps_grouped_by_hazard_class=grouped,  # type: ignore
+        gap_index=gap_index,
     )
 
 
 
-def run_phase2(
+def build_candidates(
     *,
-    zone_hazards: List[ZoneHazardInputs],
-    assets: List[ExposureItem],
-    cfg: ModuleConfig,
-) -> Phase2Output:
-    zoning = zoning_from_inputs(zone_hazards)
+    zoning: List[ZoneHazardResult],
+    assets: Union[List[ExposureItem], AssetTable],
+) -> List[ElementPriority]:
+    if isinstance(assets, AssetTable):
+        return candidates_from_table(zoning, assets)
     zone_idx = _index_zones(zoning)
 
     candidates: List[ElementPriority] = []
@@ -172,9 +238,56 @@ def run_phase2(
                 base_score=base,
             )
         )
+    return candidates
 
-    ranked = diminishing_returns_rank(candidates, cfg)
 
+def candidates_from_table(zoning: List[ZoneHazardResult], table: AssetTable) -> List[ElementPriority]:
+    """
+    Same candidates as build_candidates, read from the table columns in
+    table.order. Label and base score are computed once per (zone, type).
+    """
+    zone_idx = _index_zones(zoning)
+    zone_res = [zone_idx.get(z) for z in table.zones]
+    values = [DEFAULT_TABLES.phase2_risk_mitigation.get(t) for t in table.types]
+    ids, zone_code, type_code = table.element_ids, table.zone_code, table.type_code
+
+    candidates: List[ElementPriority] = []
+    group = None
+    for i in table.order:
+        zc, tc = zone_code[i], type_code[i]
+        if group != (zc, tc):
+            group = (zc, tc)
+            z, v = zone_res[zc], values[tc]
+            if z is not None and v is None:
+                raise KeyError(
+                    f"Unknown element_type={table.types[tc]!r} for asset {ids[i]!r}. "
+                    f"Add it to importance_tables.py."
+                )
+            if z is not None:
+                label = priority_label(z.hazard_class, v)
+                base = base_score_from_priority(z.hazard_index, z.hazard_class, v)
+        if z is None:
+            continue
+        candidates.append(
+            ElementPriority(
+                element_id=ids[i],
+                element_type=table.types[tc],
+                zone_id=z.zone_id,
+                hazard_index=z.hazard_index,
+                hazard_class=z.hazard_class,
+                value_index=v,
+                priority_label=label,
+                base_score=base,
+            )
+        )
+    return candidates
+
+
+def phase2_from_ranked(
+    ranked: List[RankedElement],
+    cfg: ModuleConfig,
+    skipped: Optional[List[SkippedElement]] = None,
+) -> Phase2Output:
     by_label: Dict[str, int] = {k: 0 for k in PRIORITY_NUMERIC.keys()}  # type: ignore
     for r in ranked:
         by_label[r.priority_label] = by_label.get(r.priority_label, 0) + 1  # type: ignore
@@ -186,9 +299,24 @@ def run_phase2(
         ranked_elements=ranked,
         by_priority_label=by_label,  # type: ignore
         top_n=top_n,
+        skipped=list(skipped or []),
     )
 
 
+def run_phase2(
+    *,
+    zone_hazards: List[ZoneHazardInputs],
+    assets: List[ExposureItem],
+    cfg: ModuleConfig,
+    zoning: Optional[List[ZoneHazardResult]] = None,
+) -> Phase2Output:
+    if zoning is None:
+        zoning = zoning_from_inputs(zone_hazards)
+    candidates = build_candidates(zoning=zoning, assets=assets)
+    ranked, skipped = constrained_rank(candidates, cfg)
+    return phase2_from_ranked(ranked, cfg, skipped)
+
+
 def run_all(
     *,
     zone_hazards: List[ZoneHazardInputs],
@@ -196,6 +324,10 @@ def run_all(
     exposure_counts: List[ExposureCounts],
     cfg: ModuleConfig,
 ) -> RunOutputs:
-    p1 = run_phase1(zone_hazards=zone_hazards, exposure_counts=exposure_counts, cfg=cfg)
-    p2 = run_phase2(zone_hazards=zone_hazards, assets=assets, cfg=cfg)
-    return RunOutputs(phase1=p1, phase2=p2)
+    zoning = zoning_from_inputs(zone_hazards)
+    p1 = run_phase1(zone_hazards=zone_hazards, exposure_counts=exposure_counts, cfg=cfg, zoning=zoning)
+    candidates = build_candidates(zoning=zoning, assets=assets)
+    ranked, skipped = constrained_rank(candidates, cfg)
+    p2 = phase2_from_ranked(ranked, cfg, skipped)
+    rollup = build_rollup(zone_hazards=zone_hazards, phase1=p1, phase2=p2, cfg=cfg, ranked=ranked)
+    return RunOutputs(phase1=p1, phase2=p2, rollup=rollup)
@@ -0,0 +1,174 @@
+"""
+Progress events and cooperative cancellation for long runs.
+
+A ProgressReporter writes JSON lines (one event per line) to a sink:
+
+    {"event": "stage_start", "stage": "ranking", "total": 120000, "elapsed_s": 0.41}
+    {"event": "progress", "stage": "ranking", "processed": 48213, "total": 120000,
+     "rate_per_s": 95120.3, "eta_s": 0.76, "elapsed_s": 0.92}
+    {"event": "stage_end", "stage": "ranking", "processed": 120000, "stage_s": 1.27, ...}
+    {"event": "cancelled", "stage": "ranking", "reason": "SIGTERM", ...}
+
+"progress" events come from a background thread every `interval` seconds,
+also while a stage reports no items (a heartbeat), so the hot loop only bumps
+a counter. Cancellation is checked between stages and every `chunk` items
+inside item loops, by raising Cancelled.
+"""
+
+from __future__ import annotations
+
+import json
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+
+class Cancelled(Exception):
+    """Raised at the next check point after a CancelToken was cancelled."""
+
+
+class CancelToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+
+def install_signal_handlers(token: CancelToken, signals: Iterable[str] = ("SIGINT", "SIGTERM")) -> None:
+    """Turn the given signals into token.cancel(<signal name>) (main thread only)."""
+    for name in signals:
+        sig = getattr(signal, name, None)
+        if sig is not None:
+            signal.signal(sig, lambda signum, frame: token.cancel(signal.Signals(signum).name))
+
+
+def open_sink(spec: str) -> TextIO:
+    """'-' = stderr, 'tcp://host:port' = socket, anything else = file (appended)."""
+    if spec == "-":
+        return sys.stderr
+    if spec.startswith("tcp://"):
+        host, _, port = spec[len("tcp://"):].rpartition(":")
+        return socket.create_connection((host, int(port))).makefile("w", encoding="utf-8")
+    return open(spec, "a", encoding="utf-8")
+
+
+class ProgressReporter:
+    """
+    Stage/item progress with throughput and ETA, emitted as JSON lines.
+
+    Use as a context manager (starts/stops the heartbeat thread). Stages are
+    reported with begin()/end(); item loops call tick() once per item (or
+    feed `tick` as a callback, e.g. the on_rank hook of the rankers).
+    """
+
+    def __init__(
+        self,
+        sink: Optional[TextIO] = None,
+        *,
+        interval: float = 1.0,
+        token: Optional[CancelToken] = None,
+        chunk: int = 1024,
+    ) -> None:
+        self.sink = sink
+        self.interval = interval
+        self.token = token or CancelToken()
+        self.chunk = max(1, int(chunk))
+        self.stage: Optional[str] = None
+        self.total: Optional[int] = None
+        self.processed = 0
+        self._next_check = self.chunk
+        self._t0 = time.monotonic()
+        self._stage_t0 = self._t0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- events ---
+    def emit(self, event: str, **fields: Any) -> None:
+        if self.sink is None:
+            return
+        rec: Dict[str, Any] = {"event": event, "stage": self.stage, **fields}
+        rec["elapsed_s"] = round(time.monotonic() - self._t0, 3)
+        line = json.dumps(rec) + "\n"
+        with self._lock:
+            try:
+                self.sink.write(line)
+                self.sink.flush()
+            except (OSError, ValueError):
+                self.sink = None  # consumer went away; the run itself carries on
+
+    def snapshot(self) -> Dict[str, Any]:
+        processed, total = self.processed, self.total
+        spent = time.monotonic() - self._stage_t0
+        rate = processed / spent if spent > 0 else 0.0
+        eta = (total - processed) / rate if total is not None and rate > 0 else None
+        return {
+            "processed": processed,
+            "total": total,
+            "rate_per_s": round(rate, 1),
+            "eta_s": round(eta, 2) if eta is not None else None,
+        }
+
+    # --- stages ---
+    def begin(self, stage: str, total: Optional[int] = None) -> None:
+        self.token.raise_if_cancelled()
+        self.stage = stage
+        self.total = total
+        self.processed = 0
+        self._next_check = self.chunk
+        self._stage_t0 = time.monotonic()
+        self.emit("stage_start", total=total)
+
+    def set_total(self, total: int) -> None:
+        self.total = total
+
+    def tick(self, *_: Any) -> None:
+        """Count one item; every `chunk` items, honour cancellation."""
+        self.processed += 1
+        if self.processed >= self._next_check:
+            self._next_check += self.chunk
+            self.token.raise_if_cancelled()
+
+    def end(self) -> None:
+        counts = self.snapshot() if self.total is not None or self.processed else {}
+        self.emit("stage_end", **counts, stage_s=round(time.monotonic() - self._stage_t0, 3))
+        self.stage = None
+        self.total = None
+        self.processed = 0
+
+    # --- heartbeat thread ---
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.emit("progress", **self.snapshot())
+
+    def __enter__(self) -> "ProgressReporter":
+        self.emit("start")
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if isinstance(exc, Cancelled):
+            self.emit("cancelled", reason=self.token.reason, **self.snapshot())
+        elif exc is not None:
+            self.emit("failed", error=f"{type(exc).__name__}: {exc}")
+        else:
+            self.emit("done")
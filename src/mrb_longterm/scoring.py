@@ -1,9 +1,18 @@
 from __future__ import annotations
 
+import heapq
+from itertools import islice
 from dataclasses import dataclass
-from typing import Dict, List, Literal, Tuple
+from typing import Callable, Dict, Iterator, List, Literal, Optional, Tuple
 
 from .config import ModuleConfig
+from .decay import (  # alpha_from_value / repetition_weight re-exported for callers
+    DecayWeights,
+    alpha_from_value,
+    comparison_configs,
+    decay_weights,
+    repetition_weight,
+)
 from .models import (
     ElementPriority,
     HazardClass,
@@ -82,21 +91,6 @@ def base_score_from_priority(
     return float(bucket * 100 + hazard_index * 10 + value_index)
 
 
-# --- Proposal Phase 2: alpha(V) mapping and repetition weights ---
-def alpha_from_value(value_index: int, alpha_min: float, alpha_max: float) -> float:
-    if not (1 <= value_index <= 5):
-        raise ValueError("value_index must be 1..5")
-    # Linear mapping: value 1 -> alpha_min, value 5 -> alpha_max
-    t = (value_index - 1) / 4.0
-    return alpha_min + t * (alpha_max - alpha_min)
-
-
-def repetition_weight(alpha: float, k: int) -> float:
-    if k < 0:
-        raise ValueError("k must be >= 0")
-    return float(alpha ** k)
-
-
 def zoning_from_inputs(zone_inputs: List[ZoneHazardInputs]) -> List[ZoneHazardResult]:
     out: List[ZoneHazardResult] = []
     for z in zone_inputs:
@@ -123,27 +117,29 @@ def suitability_from_hazard_class(hc: HazardClass) -> str:
     return "Not suitable"
 
 
-def diminishing_returns_rank(
+# one greedy step: (position in candidates, type_count_before, alpha, weight, final_score)
+RankStep = Tuple[int, int, float, float, float]
+
+
+def _greedy_steps_quadratic(
     candidates: List[ElementPriority],
     cfg: ModuleConfig,
-) -> List[RankedElement]:
-    """
-    Proposal algorithm: greedy reranking with exponential decay by type repetition.
-    Deterministic and transparent: includes debug fields.
-    """
-    remaining = candidates[:]
-    ranked: List[RankedElement] = []
-    type_counts: Dict[str, int] = {}
+    type_counts: Dict[str, int],
+    weights: Optional[DecayWeights] = None,
+) -> Iterator[RankStep]:
+    weights = weights or decay_weights(cfg)
+    remaining = list(range(len(candidates)))
 
     while remaining:
         best_idx = None
         best_final = None
         best_debug = None
 
-        for i, e in enumerate(remaining):
+        for i, pos in enumerate(remaining):
+            e = candidates[pos]
             k = type_counts.get(e.element_type, 0)
-            a = alpha_from_value(e.value_index, cfg.alpha_min, cfg.alpha_max)
-            w = repetition_weight(a, k)
+            a = weights.alpha(e.element_type, e.value_index)
+            w = weights.weight(e.element_type, e.value_index, k)
             final = float(e.base_score * w)
 
             if (best_final is None) or (final > best_final):
@@ -152,25 +148,250 @@ def diminishing_returns_rank(
                 best_debug = (k, a, w, final)
 
         assert best_idx is not None and best_debug is not None
-        chosen = remaining.pop(best_idx)
+        pos = remaining.pop(best_idx)
         k, a, w, final = best_debug
+        type_counts[candidates[pos].element_type] = k + 1
+        yield pos, k, a, w, final
 
-        ranked.append(
-            RankedElement(
-                element_id=chosen.element_id,
-                element_type=chosen.element_type,
-                zone_id=chosen.zone_id,
-                hazard_index=chosen.hazard_index,
-                hazard_class=chosen.hazard_class,
-                value_index=chosen.value_index,
-                priority_label=chosen.priority_label,
-                base_score=chosen.base_score,
-                type_count_before=k,
-                alpha_used=a,
-                weight_used=w,
-                final_score=final,
-            )
-        )
-        type_counts[chosen.element_type] = k + 1
+
+# heap entry: (-final, position, group key, type_count_before, alpha, weight, block)
+QueueEntry = Tuple[float, int, Tuple[str, int], int, float, float, int]
+
+# (element_type, value_index) -> blocks of [base_score, positions (ascending), next index]
+Groups = Dict[Tuple[str, int], List[list]]
+
+
+def group_blocks(candidates: List[ElementPriority]) -> Groups:
+    """Candidates grouped for GroupQueues (one sort; shareable, see GroupQueues)."""
+    groups: Groups = {}
+    for pos in sorted(range(len(candidates)), key=lambda p: -candidates[p].base_score):
+        e = candidates[pos]
+        blocks = groups.setdefault((e.element_type, e.value_index), [])
+        if not blocks or blocks[-1][0] != e.base_score:
+            blocks.append([e.base_score, [], 0])
+        blocks[-1][1].append(pos)
+    return groups
+
+
+class GroupQueues:
+    """
+    Candidates of one (element_type, value_index) group all carry the same
+    weight at any step, so each group is a queue ordered by base_score
+    (descending; equal scores form blocks in input order) and only group
+    heads compete, in a heap keyed (-final, position). Ranking a type makes
+    the heap entries of its other groups stale; since weights only decay
+    (alpha <= 1, base >= 0) a stale entry over-estimates and is refreshed when
+    it surfaces. Weights come from precomputed DecayWeights tables, so any
+    decay model keeps these costs.
+
+    best() pops the current winner; the caller then accept()s it (ranked:
+    repetition count + 1), drop()s it (removed unranked) or park()s its whole
+    group until unpark_all(). Each is O(log n).
+
+    `groups`, if given, is an unconsumed group_blocks(candidates) shared
+    between several queues (only the next indices are copied).
+    """
+
+    def __init__(
+        self,
+        candidates: List[ElementPriority],
+        cfg: ModuleConfig,
+        type_counts: Dict[str, int],
+        weights: Optional[DecayWeights] = None,
+        groups: Optional[Groups] = None,
+    ) -> None:
+        self.candidates = candidates
+        self.cfg = cfg
+        self.type_counts = type_counts
+        self.weights = weights or decay_weights(cfg)
+        if groups is None:
+            self.groups = group_blocks(candidates)
+        else:
+            self.groups = {key: [[base, positions, 0] for base, positions, _ in blocks] for key, blocks in groups.items()}
+        per_type: Dict[str, int] = {}
+        for (t, _), blocks in self.groups.items():
+            per_type[t] = per_type.get(t, 0) + sum(len(positions) for _, positions, _ in blocks)
+        self.weights.reserve((key, type_counts.get(key[0], 0) + per_type[key[0]]) for key in self.groups)
+        self.heads: Dict[Tuple[str, int], int] = {key: 0 for key in self.groups}
+        self.parked: List[Tuple[str, int]] = []
+        # groups whose weight reached 0: every remaining candidate ties at 0.0,
+        # so they go in input order from a heap of (next position, block)
+        self._zero: Dict[Tuple[str, int], List[Tuple[int, int]]] = {}
+        self._heap = [self._entry(key) for key in self.groups]
+        heapq.heapify(self._heap)
+
+    def _entry(self, key: Tuple[str, int]) -> QueueEntry:
+        blocks = self.groups[key]
+        b = self.heads[key]
+        a = self.weights.alpha(*key)
+        k = self.type_counts.get(key[0], 0)
+        w = self.weights.weight(key[0], key[1], k)
+        if w == 0.0:
+            zero = self._zero.get(key)
+            if zero is None:
+                # weights only decay, so the group stays at 0 from here on
+                zero = self._zero[key] = [
+                    (positions[nxt], j) for j, (_, positions, nxt) in enumerate(blocks[b:], b) if nxt < len(positions)
+                ]
+                heapq.heapify(zero)
+            return (-0.0, zero[0][0], key, k, a, w, zero[0][1])
+        final = float(blocks[b][0] * w)
+        best, best_pos = b, blocks[b][1][blocks[b][2]]
+        # distinct base scores can round to the same final (e.g. alpha ** k
+        # underflowing to 0); the earliest candidate of such a run wins, as in the quadratic loop
+        for j in range(b + 1, len(blocks)):
+            base, positions, nxt = blocks[j]
+            if nxt == len(positions):
+                continue
+            if float(base * w) != final:
+                break
+            if positions[nxt] < best_pos:
+                best, best_pos = j, positions[nxt]
+        return (-final, best_pos, key, k, a, w, best)
+
+    def best(self) -> Optional[QueueEntry]:
+        while self._heap:
+            e = heapq.heappop(self._heap)
+            if self.type_counts.get(e[2][0], 0) == e[3]:
+                return e
+            heapq.heappush(self._heap, self._entry(e[2]))
+        return None
+
+    def _consume(self, e: QueueEntry) -> None:
+        key, b = e[2], e[6]
+        blocks = self.groups[key]
+        blocks[b][2] += 1
+        zero = self._zero.get(key)
+        if zero is not None:
+            _, positions, nxt = blocks[b]
+            if nxt < len(positions):
+                heapq.heapreplace(zero, (positions[nxt], b))
+            else:
+                heapq.heappop(zero)
+        while self.heads[key] < len(blocks) and blocks[self.heads[key]][2] == len(blocks[self.heads[key]][1]):
+            self.heads[key] += 1
+        if self.heads[key] < len(blocks):
+            heapq.heappush(self._heap, self._entry(key))
+
+    def accept(self, e: QueueEntry) -> None:
+        self.type_counts[e[2][0]] = e[3] + 1
+        self._consume(e)
+
+    def drop(self, e: QueueEntry) -> None:
+        self._consume(e)
+
+    def park(self, e: QueueEntry) -> None:
+        self.parked.append(e[2])
+
+    def unpark_all(self) -> None:
+        for key in self.parked:
+            heapq.heappush(self._heap, self._entry(key))
+        self.parked = []
+
+
+def _greedy_steps_heap(
+    candidates: List[ElementPriority],
+    cfg: ModuleConfig,
+    type_counts: Dict[str, int],
+    weights: Optional[DecayWeights] = None,
+    groups: Optional[Groups] = None,
+) -> Iterator[RankStep]:
+    """Same picks as the quadratic loop in O(n log n), see GroupQueues."""
+    queues = GroupQueues(candidates, cfg, type_counts, weights, groups)
+    while True:
+        e = queues.best()
+        if e is None:
+            return
+        queues.accept(e)
+        yield e[1], e[3], e[4], e[5], -e[0]
+
+
+def decaying_weights(
+    cfg: ModuleConfig,
+    candidates: List[ElementPriority],
+    weights: Optional[DecayWeights] = None,
+) -> bool:
+    """True if repetition weights only decay (what GroupQueues relies on)."""
+    return (weights or decay_weights(cfg)).decaying and all(e.base_score >= 0 for e in candidates)
+
+
+def greedy_steps(
+    candidates: List[ElementPriority],
+    cfg: ModuleConfig,
+    type_counts: Optional[Dict[str, int]] = None,
+    weights: Optional[DecayWeights] = None,
+) -> Iterator[RankStep]:
+    """
+    The diminishing-returns greedy order as RankSteps, optionally resuming
+    from existing per-type repetition counts (used by what-if re-ranking).
+    Ties go to the earliest candidate. `weights` (default: decay_weights(cfg))
+    lets repeated calls share their weight tables.
+    """
+    counts = dict(type_counts or {})
+    weights = weights or decay_weights(cfg)
+    if decaying_weights(cfg, candidates, weights):
+        return _greedy_steps_heap(candidates, cfg, counts, weights)
+    return _greedy_steps_quadratic(candidates, cfg, counts, weights)
+
+
+def ranked_element(e: ElementPriority, k: int, a: float, w: float, final: float) -> RankedElement:
+    return RankedElement(
+        element_id=e.element_id,
+        element_type=e.element_type,
+        zone_id=e.zone_id,
+        hazard_index=e.hazard_index,
+        hazard_class=e.hazard_class,
+        value_index=e.value_index,
+        priority_label=e.priority_label,
+        base_score=e.base_score,
+        type_count_before=k,
+        alpha_used=a,
+        weight_used=w,
+        final_score=final,
+    )
+
+
+def diminishing_returns_rank(
+    candidates: List[ElementPriority],
+    cfg: ModuleConfig,
+    on_rank: Optional[Callable[[RankedElement], None]] = None,
+) -> List[RankedElement]:
+    """
+    Proposal algorithm: greedy reranking with decay by type repetition
+    (exponential unless config.json picks another phase2_decay_model).
+    Deterministic and transparent: includes debug fields.
+
+    `on_rank`, if given, is called with each element as soon as it is ranked
+    (streaming consumers); it may raise to abort the ranking.
+    """
+    ranked: List[RankedElement] = []
+    for pos, k, a, w, final in greedy_steps(candidates, cfg):
+        r = ranked_element(candidates[pos], k, a, w, final)
+        ranked.append(r)
+        if on_rank is not None:
+            on_rank(r)
 
     return ranked
+
+
+def compare_decay_models(
+    candidates: List[ElementPriority],
+    cfg: ModuleConfig,
+) -> Dict[str, List[RankedElement]]:
+    """
+    Top N of the diminishing-returns ranking under each model of
+    decay.comparison_models(cfg), configured model first. The candidates are
+    grouped and sorted once and shared by every model, which then ranks only
+    its top N: O(n log n + models * N log n).
+    """
+    top_n = max(1, int(cfg.phase2_top_n))
+    groups = group_blocks(candidates) if all(e.base_score >= 0 for e in candidates) else None
+    out: Dict[str, List[RankedElement]] = {}
+    for name, model_cfg in comparison_configs(cfg).items():
+        weights = decay_weights(model_cfg)
+        if groups is not None and weights.decaying:
+            steps = _greedy_steps_heap(candidates, model_cfg, {}, weights, groups)
+        else:
+            steps = _greedy_steps_quadratic(candidates, model_cfg, {}, weights)
+        out[name] = [ranked_element(candidates[pos], k, a, w, final) for pos, k, a, w, final in islice(steps, top_n)]
+    return out
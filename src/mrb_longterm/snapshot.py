@@ -0,0 +1,238 @@
+"""
+Binary snapshot of validated MRB inputs, for fast repeated loads.
+
+File layout (little-endian):
+
+    b"MRBSNAP1" | uint32 header_len | header JSON | sections (8-byte aligned)
+
+Sections (offsets/lengths in the header):
+    zone_ids      utf8 blob + int32 offsets [n_zones + 1]
+    HD, F, I      int8 [n_zones]
+    zone_meta     JSON list (only zones with meta; hierarchy keys etc.)
+    type_ids      utf8 blob + int32 offsets [n_types + 1]   (interned types)
+    count_zone    int32 [n_rows]        zone table index of each counts entry
+    row_offsets   int32 [n_rows + 1]    CSR offsets into the entry columns
+    entry_type    int32 [n_entries]     type table index
+    entry_count   int32 [n_entries]
+
+Counts are kept as CSR rows rather than a dense zone x type matrix so each
+zone's counts_by_type keeps its input key order (it drives synthetic asset
+order, hence ranking tie-breaks) and explicit zero counts survive.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .io import parse_exposure_counts, parse_zone_hazards, write_bytes_atomic
+from .models import ExposureCounts, ZoneHazardInputs
+from .validation import load_validated_raw_inputs
+
+
+SNAPSHOT_FILE = "inputs.snapshot"
+SNAPSHOT_MAGIC = b"MRBSNAP1"
+SNAPSHOT_VERSION = 1
+SOURCE_FILES = ("hazard_zones.json", "exposure_by_zone.json")
+
+
+def source_fingerprint(input_dir: Path) -> List[Dict[str, Any]]:
+    """Cheap stat-based fingerprint used before falling back to hashing."""
+    out = []
+    for name in SOURCE_FILES:
+        st = (input_dir / name).stat()
+        out.append({"file": name, "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+    return out
+
+
+def source_hash(input_dir: Path) -> str:
+    h = hashlib.sha256()
+    for name in SOURCE_FILES:
+        data = (input_dir / name).read_bytes()
+        h.update(name.encode("utf-8"))
+        h.update(struct.pack("<Q", len(data)))
+        h.update(data)
+    return h.hexdigest()
+
+
+def _le(a: array) -> bytes:
+    if sys.byteorder != "little" and a.itemsize > 1:
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def _string_table(strings: List[str]) -> Tuple[bytes, array]:
+    blob = bytearray()
+    offsets = array("i", [0])
+    for s in strings:
+        blob.extend(s.encode("utf-8"))
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+def build_snapshot(input_dir: Path) -> bytes:
+    """Validate + parse the JSON inputs once and encode them as a snapshot."""
+    fingerprint = source_fingerprint(input_dir)
+    digest = source_hash(input_dir)
+    raw = load_validated_raw_inputs(input_dir)
+    zones = parse_zone_hazards(raw["hazard_zones"])
+    counts = parse_exposure_counts(raw["exposure_by_zone"])
+
+    zone_pos = {z.zone_id: i for i, z in enumerate(zones)}
+    type_pos: Dict[str, int] = {}
+    count_zone = array("i")
+    row_offsets = array("i", [0])
+    entry_type = array("i")
+    entry_count = array("i")
+    for c in counts:
+        count_zone.append(zone_pos[c.zone_id])
+        for etype, n in c.counts_by_type.items():
+            entry_type.append(type_pos.setdefault(etype, len(type_pos)))
+            entry_count.append(n)
+        row_offsets.append(len(entry_type))
+
+    zone_blob, zone_offsets = _string_table([z.zone_id for z in zones])
+    type_blob, type_offsets = _string_table(list(type_pos))
+    meta = [[i, z.meta] for i, z in enumerate(zones) if z.meta]
+
+    sections: List[Tuple[str, bytes]] = [
+        ("zone_ids", zone_blob),
+        ("zone_offsets", _le(zone_offsets)),
+        ("HD", _le(array("b", [z.HD for z in zones]))),
+        ("F", _le(array("b", [z.F for z in zones]))),
+        ("I", _le(array("b", [z.I for z in zones]))),
+        ("zone_meta", json.dumps(meta, ensure_ascii=False).encode("utf-8")),
+        ("type_ids", type_blob),
+        ("type_offsets", _le(type_offsets)),
+        ("count_zone", _le(count_zone)),
+        ("row_offsets", _le(row_offsets)),
+        ("entry_type", _le(entry_type)),
+        ("entry_count", _le(entry_count)),
+    ]
+
+    layout: Dict[str, List[int]] = {}
+    body = bytearray()
+    for name, data in sections:
+        body.extend(b"\0" * (-len(body) % 8))
+        layout[name] = [len(body), len(data)]
+        body.extend(data)
+
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "source_sha256": digest,
+        "source_fingerprint": fingerprint,
+        "n_zones": len(zones),
+        "n_types": len(type_pos),
+        "n_rows": len(counts),
+        "n_entries": len(entry_type),
+        "sections": layout,
+    }).encode("utf-8")
+    prefix = SNAPSHOT_MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (-len(prefix) % 8)
+    return prefix + bytes(body)
+
+
+def write_snapshot(input_dir: Path, path: Optional[Path] = None) -> Path:
+    path = path or (input_dir / SNAPSHOT_FILE)
+    write_bytes_atomic(path, build_snapshot(input_dir))
+    return path
+
+
+class Snapshot:
+    """Memory-mapped snapshot; sections are memoryviews over the map."""
+
+    def __init__(self, path: Path) -> None:
+        with Path(path).open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not an MRB input snapshot")
+        (hlen,) = struct.unpack_from("<I", self._mm, 8)
+        self.header: Dict[str, Any] = json.loads(self._mm[12:12 + hlen].decode("utf-8"))
+        if self.header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.header.get('version')!r}")
+        self._base = 12 + hlen + (-(12 + hlen) % 8)
+
+    def _bytes(self, name: str) -> memoryview:
+        off, n = self.header["sections"][name]
+        start = self._base + off
+        return memoryview(self._mm)[start:start + n]
+
+    def _ints(self, name: str, typecode: str) -> Any:
+        mv = self._bytes(name)
+        if len(mv) == 0:
+            return array(typecode)
+        if sys.byteorder != "little" and typecode != "b":
+            a = array(typecode, mv.tobytes())
+            a.byteswap()
+            return a
+        return mv.cast(typecode)
+
+    def _strings(self, blob: str, offsets: str) -> List[str]:
+        data = self._bytes(blob).tobytes()
+        offs = self._ints(offsets, "i")
+        return [data[offs[i]:offs[i + 1]].decode("utf-8") for i in range(len(offs) - 1)]
+
+    def matches(self, input_dir: Path) -> bool:
+        """True if the snapshot was built from the current JSON inputs."""
+        try:
+            if self.header.get("source_fingerprint") == source_fingerprint(input_dir):
+                return True
+            return self.header.get("source_sha256") == source_hash(input_dir)
+        except FileNotFoundError:
+            return False
+
+    def zone_hazards(self) -> List[ZoneHazardInputs]:
+        ids = self._strings("zone_ids", "zone_offsets")
+        hd, f, i = (self._ints(k, "b") for k in ("HD", "F", "I"))
+        meta = {pos: m for pos, m in json.loads(self._bytes("zone_meta").tobytes().decode("utf-8"))}
+        return [
+            ZoneHazardInputs(zone_id=z, HD=hd[k], F=f[k], I=i[k], meta=meta.get(k, {}))
+            for k, z in enumerate(ids)
+        ]
+
+    def exposure_counts(self, zone_ids: Optional[List[str]] = None) -> List[ExposureCounts]:
+        zone_ids = zone_ids or self._strings("zone_ids", "zone_offsets")
+        types = self._strings("type_ids", "type_offsets")
+        count_zone = self._ints("count_zone", "i")
+        row_offsets = self._ints("row_offsets", "i")
+        entry_type = self._ints("entry_type", "i")
+        entry_count = self._ints("entry_count", "i")
+        out: List[ExposureCounts] = []
+        for r in range(len(count_zone)):
+            lo, hi = row_offsets[r], row_offsets[r + 1]
+            out.append(ExposureCounts(
+                zone_id=zone_ids[count_zone[r]],
+                counts_by_type={types[entry_type[e]]: entry_count[e] for e in range(lo, hi)},
+            ))
+        return out
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+
+def load_inputs(input_dir: Path) -> Tuple[List[ZoneHazardInputs], List[ExposureCounts]]:
+    """
+    Zone hazards and counts for a run: from input_dir/inputs.snapshot when it
+    matches the JSON sources, otherwise by validating and parsing the JSON.
+    """
+    path = input_dir / SNAPSHOT_FILE
+    if path.exists():
+        snap = Snapshot(path)
+        try:
+            if snap.matches(input_dir):
+                zones = snap.zone_hazards()
+                return zones, snap.exposure_counts([z.zone_id for z in zones])
+        finally:
+            snap.close()
+    raw = load_validated_raw_inputs(input_dir)
+    return parse_zone_hazards(raw["hazard_zones"]), parse_exposure_counts(raw["exposure_by_zone"])
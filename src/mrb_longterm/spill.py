@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import dataclasses
+import heapq
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Sequence, TypeVar, Union
+
+T = TypeVar("T")
+
+
+class Interner:
+    """String <-> int table shared by all runs of a sort."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, s: str) -> int:
+        i = self.ids.get(s)
+        if i is None:
+            i = len(self.strings)
+            self.ids[s] = i
+            self.strings.append(s)
+        return i
+
+
+class DataclassCodec(Generic[T]):
+    """
+    Fixed-width little-endian record encoding of a flat dataclass:
+    int -> int64, float -> float64, anything else (str / Literal aliases) ->
+    uint32 index into an Interner. A Phase1Existing spills as 48 bytes.
+    """
+
+    def __init__(self, cls: type, interner: Optional[Interner] = None) -> None:
+        self.cls = cls
+        self.interner = interner or Interner()
+        self.names: List[str] = []
+        self.interned: List[bool] = []
+        fmt = "<"
+        for f in dataclasses.fields(cls):
+            t = f.type if isinstance(f.type, str) else getattr(f.type, "__name__", "")
+            self.names.append(f.name)
+            if t == "int":
+                fmt += "q"
+                self.interned.append(False)
+            elif t == "float":
+                fmt += "d"
+                self.interned.append(False)
+            else:
+                fmt += "I"
+                self.interned.append(True)
+        self.struct = struct.Struct(fmt)
+        self.size = self.struct.size
+
+    def encode(self, obj: T) -> bytes:
+        intern = self.interner.intern
+        values = [
+            intern(getattr(obj, n)) if s else getattr(obj, n)
+            for n, s in zip(self.names, self.interned)
+        ]
+        return self.struct.pack(*values)
+
+    def decode(self, buf: Union[bytes, memoryview]) -> T:
+        strings = self.interner.strings
+        values = self.struct.unpack(buf)
+        kwargs = {
+            n: strings[v] if s else v
+            for n, s, v in zip(self.names, self.interned, values)
+        }
+        return self.cls(**kwargs)
+
+
+class SpilledSequence(Generic[T]):
+    """
+    Read-only, re-iterable view of a k-way merge over sorted run files.
+    Supports len() and iteration (each iteration re-merges from disk), which is
+    all the writers and summaries need; it never holds the records in memory.
+    """
+
+    def __init__(
+        self,
+        runs: List[Path],
+        codec: DataclassCodec[T],
+        key: Callable[[T], Any],
+        n: int,
+        owner: Any,
+        where: Optional[Callable[[T], bool]] = None,
+    ) -> None:
+        self._runs = runs
+        self._codec = codec
+        self._key = key
+        self._n = n
+        self._owner = owner  # keeps the temp directory alive
+        self._where = where
+
+    def _read_run(self, path: Path, chunk_records: int = 4096) -> Iterator[T]:
+        size = self._codec.size
+        decode = self._codec.decode
+        with path.open("rb") as f:
+            while True:
+                block = f.read(size * chunk_records)
+                if not block:
+                    return
+                view = memoryview(block)
+                for off in range(0, len(block), size):
+                    yield decode(view[off:off + size])
+
+    def __iter__(self) -> Iterator[T]:
+        merged = heapq.merge(*(self._read_run(p) for p in self._runs), key=self._key, reverse=True)
+        if self._where is None:
+            return iter(merged)
+        return (x for x in merged if self._where(x))
+
+    def __len__(self) -> int:
+        if self._where is None:
+            return self._n
+        return sum(1 for _ in self)
+
+    def filtered(self, where: Callable[[T], bool]) -> "SpilledSequence[T]":
+        return SpilledSequence(self._runs, self._codec, self._key, self._n, self._owner, where)
+
+
+class SpillSorter(Generic[T]):
+    """
+    Bounded-memory equivalent of sorted(items, key=key, reverse=True).
+
+    Items are buffered up to `run_size`; each full buffer is sorted (stable)
+    and spilled to a temp file as fixed-width records. finish() returns a plain
+    sorted list if nothing was spilled, else a SpilledSequence whose k-way
+    merge yields exactly the in-memory order (heapq.merge breaks ties by run
+    order, and runs are consecutive chunks of the input).
+    """
+
+    def __init__(
+        self,
+        cls: type,
+        key: Callable[[T], Any],
+        run_size: int,
+        interner: Optional[Interner] = None,
+        tmp_dir: Optional[Path] = None,
+    ) -> None:
+        if run_size < 1:
+            raise ValueError("run_size must be >= 1")
+        self.codec: DataclassCodec[T] = DataclassCodec(cls, interner)
+        self.key = key
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self._buf: List[T] = []
+        self._runs: List[Path] = []
+        self._tmp: Optional[tempfile.TemporaryDirectory] = None
+        self._n = 0
+
+    def add(self, item: T) -> None:
+        self._buf.append(item)
+        self._n += 1
+        if len(self._buf) >= self.run_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self._tmp is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="mrb_spill_", dir=self.tmp_dir)
+        self._buf.sort(key=self.key, reverse=True)
+        path = Path(self._tmp.name) / f"run_{len(self._runs):05d}.bin"
+        encode = self.codec.encode
+        with path.open("wb") as f:
+            f.write(b"".join(encode(x) for x in self._buf))
+        self._runs.append(path)
+        self._buf = []
+
+    def finish(self) -> Sequence[T]:
+        if not self._runs:
+            return sorted(self._buf, key=self.key, reverse=True)
+        if self._buf:
+            self._spill()
+        return SpilledSequence(self._runs, self.codec, self.key, self._n, self._tmp)
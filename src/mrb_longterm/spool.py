@@ -0,0 +1,242 @@
+"""
+Spool-directory work queue: jobs are JSON files in a shared folder and any
+number of workers (one host, or several hosts sharing the mount) claim them
+by atomic rename. No broker.
+
+    spool/
+      pending/<job_id>.json      submitted, waiting
+      claimed/<job_id>.json      renamed here by the worker that runs it
+      heartbeats/<job_id>.json   rewritten by that worker while it runs
+      done/<job_id>.json         job + result (written files, worker, timings)
+      failed/<job_id>.json       job + error
+
+A claim is stale when neither the claimed file nor its heartbeat changed for
+`stale_after` seconds. Both sides of that comparison are file mtimes set by
+the file server: "now" is the mtime of a probe file the reclaimer touches in
+the spool, so clock skew between hosts cannot cause false or missed
+reclaims. Any worker moves stale claims back to pending (attempts + 1)
+or, past `max_attempts`, to failed. A job run twice rewrites the same output
+folder atomically, so a slow worker finishing after a reclaim is harmless.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .io import read_json, write_json_atomic
+from .stages import DEFAULT_TARGETS, run_targets
+
+QUEUES = ("pending", "claimed", "heartbeats", "done", "failed")
+
+log = logging.getLogger(__name__)
+
+
+def init_spool(spool_dir: Path) -> Path:
+    for q in QUEUES:
+        (spool_dir / q).mkdir(parents=True, exist_ok=True)
+    return spool_dir
+
+
+def _jobs(folder: Path) -> List[Path]:
+    # write_json_atomic's temp files start with "."
+    return sorted(p for p in folder.glob("*.json") if not p.name.startswith("."))
+
+
+def submit_job(
+    spool_dir: Path,
+    input_dir: Path,
+    output_dir: Path,
+    targets: Optional[Iterable[str]] = None,
+) -> str:
+    """Queue one run; job ids sort in submission order (FIFO claims)."""
+    init_spool(spool_dir)
+    job_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    write_json_atomic(spool_dir / "pending" / f"{job_id}.json", {
+        "job_id": job_id,
+        "input_dir": str(Path(input_dir).resolve()),
+        "output_dir": str(Path(output_dir).resolve()),
+        "targets": list(targets) if targets is not None else list(DEFAULT_TARGETS),
+        "attempts": 0,
+        "submitted_at": time.time(),
+    })
+    return job_id
+
+
+def claim_next(spool_dir: Path) -> Optional[Path]:
+    """
+    Oldest pending job, renamed into claimed/; None if the queue is empty.
+    The pending file is touched first, so the claim never shows up in
+    claimed/ with its (old) submission mtime and looks stale to reclaimers.
+    """
+    for path in _jobs(spool_dir / "pending"):
+        target = spool_dir / "claimed" / path.name
+        try:
+            os.utime(path)  # rename keeps the mtime; the claim starts now
+            os.rename(path, target)  # only one worker wins the rename
+            os.utime(target)
+        except FileNotFoundError:
+            continue  # taken by another worker (or reclaimed) meanwhile
+        return target
+    return None
+
+
+def _last_alive(spool_dir: Path, claimed: Path) -> float:
+    stamps = []
+    for p in (claimed, spool_dir / "heartbeats" / claimed.name):
+        try:
+            stamps.append(p.stat().st_mtime)
+        except FileNotFoundError:
+            pass
+    return max(stamps, default=0.0)
+
+
+def spool_now(spool_dir: Path) -> float:
+    """The file server's current time: the mtime of a freshly written probe file."""
+    probe = spool_dir / f".clock-{uuid.uuid4().hex[:8]}"
+    try:
+        probe.write_bytes(b"")
+        return probe.stat().st_mtime
+    finally:
+        probe.unlink(missing_ok=True)
+
+
+def reclaim_stale(spool_dir: Path, stale_after: float, max_attempts: int = 3) -> List[str]:
+    """Move stale claims back to pending (or to failed after max_attempts)."""
+    now = spool_now(spool_dir)
+    reclaimed = []
+    for claimed in _jobs(spool_dir / "claimed"):
+        if now - _last_alive(spool_dir, claimed) < stale_after:
+            continue
+        # take the stale claim ourselves first, so only one reclaimer acts on it
+        grab = claimed.with_name(f".reclaim-{uuid.uuid4().hex[:8]}-{claimed.name}")
+        try:
+            os.rename(claimed, grab)
+        except FileNotFoundError:
+            continue
+        job = read_json(grab)
+        job["attempts"] = int(job.get("attempts", 0)) + 1
+        if job["attempts"] >= max_attempts:
+            job["error"] = f"claim went stale {job['attempts']} times (no heartbeat for {stale_after}s)"
+            write_json_atomic(spool_dir / "failed" / claimed.name, job)
+        else:
+            write_json_atomic(spool_dir / "pending" / claimed.name, job)
+        os.unlink(grab)
+        (spool_dir / "heartbeats" / claimed.name).unlink(missing_ok=True)
+        reclaimed.append(job["job_id"])
+    return reclaimed
+
+
+class _Heartbeat:
+    """
+    Rewrites heartbeats/<job>.json every `interval` seconds in a thread. A
+    failed write (e.g. the mount briefly unavailable) is logged and retried
+    at the next beat; the thread only stops with the job.
+    """
+
+    def __init__(self, path: Path, worker_id: str, interval: float) -> None:
+        self.path = path
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.started_at = time.time()
+        self.failures = 0  # failed beats so far
+
+    def beat(self) -> None:
+        write_json_atomic(self.path, {
+            "worker": self.worker_id,
+            "started_at": self.started_at,
+            "beat_at": time.time(),
+        })
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.beat()
+            except Exception:
+                self.failures += 1
+                log.warning("heartbeat write to %s failed (%d so far); retrying in %ss",
+                            self.path, self.failures, self.interval, exc_info=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self.beat()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.path.unlink(missing_ok=True)
+
+
+def run_job(
+    spool_dir: Path,
+    claimed: Path,
+    worker_id: str,
+    heartbeat_interval: float = 5.0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Run one claimed job and file it under done/ or failed/. None if the
+    claim was reclaimed before the job could be read.
+    """
+    try:
+        job = read_json(claimed)
+    except FileNotFoundError:
+        return None
+    with _Heartbeat(spool_dir / "heartbeats" / claimed.name, worker_id, heartbeat_interval) as hb:
+        try:
+            written = run_targets(
+                input_dir=Path(job["input_dir"]),
+                output_dir=Path(job["output_dir"]),
+                targets=job["targets"],
+            )
+            result = {**job, "written": [str(p) for p in written]}
+            queue = "done"
+        except Exception as exc:
+            result = {**job, "error": f"{type(exc).__name__}: {exc}", "traceback": traceback.format_exc()}
+            queue = "failed"
+        result.update(worker=worker_id, started_at=hb.started_at, finished_at=time.time())
+    write_json_atomic(spool_dir / queue / claimed.name, result)
+    claimed.unlink(missing_ok=True)  # already gone if it was reclaimed meanwhile
+    return result
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(
+    spool_dir: Path,
+    *,
+    worker_id: Optional[str] = None,
+    poll_interval: float = 1.0,
+    heartbeat_interval: float = 5.0,
+    stale_after: float = 30.0,
+    max_attempts: int = 3,
+    max_jobs: Optional[int] = None,
+    exit_when_idle: bool = False,
+) -> int:
+    """Claim and run jobs until stopped (or idle / max_jobs). Returns jobs run."""
+    init_spool(spool_dir)
+    worker_id = worker_id or default_worker_id()
+    n = 0
+    while max_jobs is None or n < max_jobs:
+        reclaim_stale(spool_dir, stale_after, max_attempts)
+        claimed = claim_next(spool_dir)
+        if claimed is None:
+            if exit_when_idle:
+                break
+            time.sleep(poll_interval)
+            continue
+        if run_job(spool_dir, claimed, worker_id, heartbeat_interval) is None:
+            continue  # lost the claim; take the next job
+        n += 1
+    return n
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import outputs as docs
+from .adjacency import gap_coverage_doc, load_zone_graph
+from .assets import asset_input_seeds, grouped_assets, has_asset_input
+from .columnar import phase1_matrix_columnar_files
+from .constraints import constrained_rank
+from .diff import changes_doc, load_previous_outputs
+from .engines import EngineOptions, plan_engines
+from .hierarchy import build_rollup
+from .io import expand_assets, load_config, write_outputs
+from .partitioned import partitioned_doc, rank_partitioned
+from .pipeline import build_candidates, phase2_from_ranked, run_phase1
+from .progress import ProgressReporter
+from .scoring import compare_decay_models, zoning_from_inputs
+from .snapshot import load_inputs
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One node of the pipeline DAG. `fn` is called with the results of `deps`,
+    in order; its return value is memoized under `name`.
+    """
+    name: str
+    deps: Tuple[str, ...]
+    fn: Callable[..., Any]
+
+
+STAGES: Dict[str, Stage] = {}
+
+
+def _stage(name: str, *deps: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def register(fn: Callable[..., Any]) -> Callable[..., Any]:
+        STAGES[name] = Stage(name=name, deps=tuple(deps), fn=fn)
+        return fn
+    return register
+
+
+# --- load ---
+_stage("cfg", "input_dir")(load_config)
+# both documents are validated together before any heavy stage (or come from
+# a matching inputs.snapshot, which only ever holds validated inputs)
+_stage("inputs", "input_dir")(load_inputs)
+
+
+@_stage("zone_hazards", "inputs")
+def _zone_hazards(inputs):
+    return inputs[0]
+
+
+@_stage("exposure_counts", "inputs")
+def _exposure_counts(inputs):
+    return inputs[1]
+
+
+@_stage("engine_options")
+def _engine_options():
+    return EngineOptions()  # seeded by run_targets (memory budget override, allowed engines)
+
+
+_stage("engines", "cfg", "zone_hazards", "exposure_counts", "engine_options")(plan_engines)
+
+
+@_stage("assets", "exposure_counts", "engines")  # seeded with an AssetTable for exposure_assets.csv
+def _assets(exposure_counts, engines):
+    if engines.assets == "grouped":
+        return grouped_assets(exposure_counts)
+    return expand_assets(exposure_counts)
+
+# --- compute ---
+_stage("zoning", "zone_hazards")(zoning_from_inputs)
+
+
+@_stage("phase1", "zone_hazards", "exposure_counts", "cfg", "zoning", "engines")
+def _phase1(zone_hazards, exposure_counts, cfg, zoning, engines):
+    cfg = engines.phase1_cfg(cfg)
+    return run_phase1(zone_hazards=zone_hazards, exposure_counts=exposure_counts, cfg=cfg, zoning=zoning)
+
+
+@_stage("candidates", "zoning", "assets")
+def _candidates(zoning, assets):
+    return build_candidates(zoning=zoning, assets=assets)
+
+
+@_stage("progress")
+def _progress():
+    return None  # seed a ProgressReporter to get item progress + cancellation
+
+
+@_stage("ranking", "candidates", "cfg", "progress")
+def _ranking(candidates, cfg, progress):
+    if progress is None:
+        return constrained_rank(candidates, cfg)  # (ranked, skipped)
+    progress.set_total(len(candidates))
+    return constrained_rank(candidates, cfg, on_rank=progress.tick)
+
+
+@_stage("phase2", "ranking", "cfg")
+def _phase2(ranking, cfg):
+    ranked, skipped = ranking
+    return phase2_from_ranked(ranked, cfg, skipped)
+
+
+_stage("partitioned_ranking", "candidates", "cfg")(rank_partitioned)
+_stage("decay_rankings", "candidates", "cfg")(compare_decay_models)
+_stage("zone_graph", "input_dir", "zoning")(load_zone_graph)  # None without zone_adjacency.json
+
+
+@_stage("rollup", "zone_hazards", "phase1", "phase2", "ranking", "cfg")
+def _rollup(zone_hazards, phase1, phase2, ranking, cfg):
+    return build_rollup(zone_hazards=zone_hazards, phase1=phase1, phase2=phase2, cfg=cfg, ranked=ranking[0])
+
+
+# --- output documents (one per file in outputs.OUTPUT_FILES) ---
+@_stage("phase1_new_planification", "phase1", "cfg", "engines")
+def _phase1_new_planification(phase1, cfg, engines):
+    return docs.phase1_planification_doc(phase1, cfg, engines.streaming_writer)
+
+
+_stage("phase1_matrix", "zoning", "exposure_counts", "cfg", "zone_hazards")(docs.phase1_matrix_doc)
+
+
+@_stage("phase2_risk_mitigation", "phase2", "cfg", "engines", "assets")
+def _phase2_risk_mitigation(phase2, cfg, engines, assets):
+    return docs.phase2_risk_mitigation_doc(phase2, cfg, engines.streaming_writer, assets)
+
+
+_stage("phase2_matrix", "phase2")(docs.phase2_matrix_doc)
+_stage("phase2_type_summary", "phase2", "cfg", "assets")(docs.phase2_type_summary_doc)
+_stage("summary", "zoning", "phase1", "cfg", "engines")(docs.summary_doc)
+_stage("hierarchy_summary", "rollup", "cfg")(docs.hierarchy_summary_doc)
+_stage("phase1_gap_index", "phase1")(docs.phase1_gap_index_doc)
+_stage("phase1_matrix_columnar", "zoning", "exposure_counts", "cfg", "zone_hazards")(phase1_matrix_columnar_files)
+_stage("phase2_partitioned", "partitioned_ranking", "cfg")(partitioned_doc)
+_stage("phase1_gap_coverage", "phase1", "zone_graph", "zoning", "exposure_counts", "cfg")(gap_coverage_doc)
+_stage("phase2_decay_comparison", "decay_rankings", "cfg")(docs.phase2_decay_comparison_doc)
+
+# --- run-to-run comparison (seed "previous_dir") ---
+_stage("previous_outputs", "previous_dir")(load_previous_outputs)
+_stage("changes", "previous_outputs", "phase1", "phase2")(changes_doc)
+
+DEFAULT_TARGETS: Tuple[str, ...] = tuple(t for t in docs.OUTPUT_FILES if t not in docs.OPTIONAL_TARGETS)
+
+
+class StageRunner:
+    """
+    Resolves and runs only the stages needed for the requested targets.
+
+    `seeds` pre-populate results (e.g. {"input_dir": Path(...)} or already
+    loaded {"zone_hazards": ..., "cfg": ...}); seeded stages are never rerun.
+    Every stage result is computed at most once per runner. A seeded
+    "progress" reporter is told when each stage starts and ends.
+    """
+
+    def __init__(self, seeds: Optional[Dict[str, Any]] = None) -> None:
+        self.results: Dict[str, Any] = dict(seeds or {})
+        self.executed: List[str] = []
+
+    def plan(self, targets: Iterable[str]) -> List[str]:
+        """Stages still to run for `targets`, in dependency order."""
+        order: List[str] = []
+        visiting: set = set()
+        done: set = set(self.results)
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in pipeline stages at {name!r}")
+            stage = STAGES.get(name)
+            if stage is None:
+                raise KeyError(f"Unknown stage/target {name!r} (and no seed provided). Known: {sorted(STAGES)}")
+            visiting.add(name)
+            for d in stage.deps:
+                visit(d)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for t in targets:
+            visit(t)
+        return order
+
+    def run(self, targets: Iterable[str]) -> Dict[str, Any]:
+        targets = list(targets)
+        progress: Optional[ProgressReporter] = self.results.get("progress")
+        for name in self.plan(targets):
+            stage = STAGES[name]
+            if progress is not None and name != "progress":
+                progress.begin(name)
+            self.results[name] = stage.fn(*(self.results[d] for d in stage.deps))
+            self.executed.append(name)
+            if progress is not None and name != "progress":
+                progress.end()
+        return {t: self.results[t] for t in targets}
+
+    def get(self, name: str) -> Any:
+        return self.run([name])[name]
+
+
+def ordered_targets(targets: Iterable[str]) -> List[str]:
+    """Requested output targets in OUTPUT_FILES order (ValueError on unknown ones)."""
+    wanted = set(targets)
+    unknown = wanted - set(docs.OUTPUT_FILES)
+    if unknown:
+        raise ValueError(f"Unknown output target(s) {sorted(unknown)}. Known: {list(docs.OUTPUT_FILES)}")
+    return [t for t in docs.OUTPUT_FILES if t in wanted]
+
+
+def target_seeds(
+    input_dir: Path,
+    targets: List[str],
+    *,
+    seeds: Optional[Dict[str, Any]] = None,
+    progress: Optional[ProgressReporter] = None,
+    schema: str = "full",
+    memory_budget_mb: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    StageRunner seeds for run_targets / aio.run_targets_async: the caller's
+    seeds plus the progress reporter, the engine options allowed by the
+    targets and schema, and the asset-level inputs (exposure_assets.csv).
+    """
+    seeds = {"input_dir": input_dir, **(seeds or {})}
+    if progress is not None:
+        seeds["progress"] = progress
+    seeds.setdefault("engine_options", EngineOptions(
+        memory_budget_mb=memory_budget_mb,
+        allow_spill="phase1_gap_index" not in targets,  # the gap index needs in-memory gaps
+        allow_streaming_writer=schema != "compact",  # compact tables need whole lists
+    ))
+    if "zone_hazards" not in seeds and has_asset_input(input_dir):
+        # one streaming pass yields zone counts and the Phase 2 assets
+        if progress is not None:
+            progress.begin("inputs")
+        seeds.update(asset_input_seeds(input_dir))
+        if progress is not None:
+            progress.end()
+    return seeds
+
+
+def run_targets(
+    *,
+    input_dir: Path,
+    output_dir: Path,
+    targets: Iterable[str] = DEFAULT_TARGETS,
+    seeds: Optional[Dict[str, Any]] = None,
+    write_workers: Optional[int] = None,
+    only_changed: bool = False,
+    progress: Optional[ProgressReporter] = None,
+    schema: str = "full",
+    memory_budget_mb: Optional[int] = None,
+) -> List[Path]:
+    """
+    Compute the requested output documents and write them to output_dir
+    (concurrently, atomically, followed by manifest.json). With only_changed,
+    files identical to the previous run are left untouched.
+    Returns the written paths in OUTPUT_FILES order, manifest last.
+
+    schema="compact" writes the dictionary-encoded JSON schema (read it back
+    with io.read_output). memory_budget_mb (else cfg.memory_budget_mb) lets
+    engines.plan_engines switch to lower-footprint engines; the choice is
+    recorded in summary.json. With a `progress` reporter, stage/item events are emitted and its cancel
+    token is honoured; a cancelled run raises progress.Cancelled before any
+    output file is written.
+    """
+    targets = ordered_targets(targets)
+    runner = StageRunner(target_seeds(
+        input_dir, targets, seeds=seeds, progress=progress, schema=schema, memory_budget_mb=memory_budget_mb
+    ))
+    results = runner.run(targets)
+
+    documents = docs.output_documents(results, targets, schema)
+    if progress is not None:
+        progress.begin("write_outputs")
+    engines = runner.results.get("engines")
+    written = write_outputs(
+        output_dir,
+        documents,
+        max_workers=write_workers,
+        only_changed=only_changed,
+        streaming=engines is not None and engines.streaming_writer,
+    )
+    if progress is not None:
+        progress.end()
+    return written
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .models import ZoneHazardInputs
+from .validation import KNOWN_TYPES, InputValidationError
+
+
+@dataclass(frozen=True)
+class PlanningStandard:
+    """
+    `units` elements of `element_type` per `per` of a zone attribute, e.g.
+    1 school per 2500 population: PlanningStandard("schools", "population", 2500, 1).
+    The attribute is read from the zone's meta.
+    """
+    element_type: str
+    attribute: str
+    per: float
+    units: float = 1.0
+
+    def describe(self) -> str:
+        return f"{self.units:g} per {self.per:g} {self.attribute}"
+
+
+def parse_standards(obj: Dict[str, Dict[str, Any]]) -> Dict[str, PlanningStandard]:
+    """
+    config.json "phase1_standards": {type: {"attribute", "per", "units"}}.
+    Every type must be in the importance tables.
+    """
+    out: Dict[str, PlanningStandard] = {}
+    for etype, spec in obj.items():
+        if etype not in KNOWN_TYPES:
+            raise ValueError(f"phase1_standards: unknown element_type {etype!r} (add it to importance_tables.py)")
+        try:
+            std = PlanningStandard(
+                element_type=etype,
+                attribute=str(spec["attribute"]),
+                per=float(spec["per"]),
+                units=float(spec.get("units", 1.0)),
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"phase1_standards[{etype!r}] needs attribute and per: {exc}") from None
+        if std.per <= 0 or std.units < 0:
+            raise ValueError(f"phase1_standards[{etype!r}]: per must be > 0 and units >= 0")
+        out[etype] = std
+    return out
+
+
+# how matrix views describe is_gap under each rule
+COUNTS_GAP_DEFINITION = "is_gap = (value_index >= threshold) AND (count == 0)"
+STANDARDS_GAP_DEFINITION = (
+    "types with a planning standard: is_gap = count < ceil(zone meta attribute * units / per); "
+    "other types: is_gap = (value_index >= threshold) AND (count == 0)"
+)
+
+
+@dataclass(frozen=True)
+class StandardsTable:
+    """
+    Expected counts and gap magnitudes per standard type, as int64 columns
+    aligned with `zone_ids` (one row per zone).
+    """
+    zone_ids: List[str]
+    zone_row: Dict[str, int]
+    standards: Dict[str, PlanningStandard]
+    expected: Dict[str, array]
+    gap: Dict[str, array]
+
+    def is_gap(self, zone_id: str, element_type: str) -> Optional[bool]:
+        """Shortfall against the type's standard; None if the type has no standard."""
+        col = self.gap.get(element_type)
+        return None if col is None else col[self.zone_row[zone_id]] > 0
+
+
+def _as_number(value: Any) -> Optional[float]:
+    # JSON numbers, or numeric strings such as "10000" (CSV-derived meta)
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        x = float(value)
+    except ValueError:
+        return None
+    return x if math.isfinite(x) else None
+
+
+def _attribute_column(zones: List[ZoneHazardInputs], attribute: str, etype: str, problems: List[str]) -> array:
+    col = array("d")
+    for z in zones:
+        where = f"hazard_zones.json zone_id={z.zone_id!r}"
+        if attribute not in z.meta:
+            problems.append(f"{where}: missing {attribute!r} (needed by phase1_standards[{etype!r}])")
+            col.append(0.0)
+            continue
+        x = _as_number(z.meta[attribute])
+        if x is None:
+            problems.append(f"{where}: {attribute}={z.meta[attribute]!r} is not a number "
+                            f"(needed by phase1_standards[{etype!r}])")
+            x = 0.0
+        col.append(x)
+    return col
+
+
+def build_standards_table(
+    zones: List[ZoneHazardInputs],
+    counts_by_zone: Dict[str, Dict[str, int]],
+    standards: Dict[str, PlanningStandard],
+) -> StandardsTable:
+    """
+    expected = ceil(attribute * units / per), gap = max(expected - observed, 0),
+    each computed column-wise for one type over all zones at once. Every zone
+    needs each standard's attribute as a number (numeric strings are parsed);
+    otherwise InputValidationError lists every offending zone.
+    """
+    zone_ids = [z.zone_id for z in zones]
+    expected: Dict[str, array] = {}
+    gap: Dict[str, array] = {}
+    attr_cols: Dict[str, array] = {}
+    problems: List[str] = []
+    for etype, std in standards.items():
+        attr = attr_cols.get(std.attribute)
+        if attr is None:
+            attr = attr_cols[std.attribute] = _attribute_column(zones, std.attribute, etype, problems)
+        factor = std.units / std.per
+        # round first so 30000 * (1 / 10000) = 3.0000000000000004 does not ceil to 4
+        exp = array("q", map(math.ceil, (round(x * factor, 9) for x in attr)))
+        observed = array("q", (int(counts_by_zone.get(z, {}).get(etype, 0)) for z in zone_ids))
+        expected[etype] = exp
+        gap[etype] = array("q", (e - o if e > o else 0 for e, o in zip(exp, observed)))
+    if problems:
+        raise InputValidationError(problems)
+    return StandardsTable(
+        zone_ids=zone_ids,
+        zone_row={z: i for i, z in enumerate(zone_ids)},
+        standards=standards,
+        expected=expected,
+        gap=gap,
+    )
+
+
+def configured_standards_table(
+    standards_cfg: Dict[str, Dict[str, Any]],
+    zones: Optional[List[ZoneHazardInputs]],
+    counts_by_zone: Dict[str, Dict[str, int]],
+) -> Optional[StandardsTable]:
+    """
+    The StandardsTable for config.json "phase1_standards" (the rule the Phase 1
+    gap analysis uses), or None when no standard is configured.
+    """
+    standards = parse_standards(standards_cfg)
+    if not standards:
+        return None
+    if zones is None:
+        raise ValueError("phase1_standards need the zone inputs (meta attributes) to decide gaps")
+    return build_standards_table(zones, counts_by_zone, standards)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Set
+
+from .importance_tables import DEFAULT_TABLES
+from .io import read_json
+
+HAZARD_FIELDS = ("HD", "F", "I")
+
+# Compiled once: membership tests instead of per-value range logic.
+_VALID_SCALE: FrozenSet[int] = frozenset(range(1, 6))
+# element types every exposure input may use (the importance tables' keys)
+KNOWN_TYPES: FrozenSet[str] = frozenset(DEFAULT_TABLES.phase2_risk_mitigation)
+_KNOWN_TYPES = KNOWN_TYPES  # former private name
+
+
+class InputValidationError(ValueError):
+    """
+    Raised when MRB inputs are malformed. Carries every problem found,
+    not only the first one.
+    """
+
+    def __init__(self, problems: List[str], max_shown: int = 50) -> None:
+        self.problems = problems
+        shown = "\n".join(f"  - {p}" for p in problems[:max_shown])
+        more = f"\n  ... and {len(problems) - max_shown} more" if len(problems) > max_shown else ""
+        super().__init__(f"{len(problems)} problem(s) in MRB inputs:\n{shown}{more}")
+
+
+def _as_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return None
+
+
+def validate_inputs(
+    zones_obj: Any,
+    counts_obj: Any,
+    known_types: FrozenSet[str] = KNOWN_TYPES,
+) -> List[str]:
+    """
+    Single pass over the parsed hazard_zones.json / exposure_by_zone.json
+    documents. Returns every problem found (empty list = valid):
+
+      - missing/malformed fields, HD/F/I outside 1..5, duplicate zone_id
+      - count entries for zones not in hazard_zones.json (orphans), duplicate
+        count entries, unknown element types, negative or non-integer counts
+    """
+    problems: List[str] = []
+
+    zones = zones_obj.get("zones") if isinstance(zones_obj, dict) else None
+    if not isinstance(zones, list):
+        problems.append("hazard_zones.json: expected an object with a 'zones' list")
+        zones = []
+
+    zone_ids: Set[str] = set()
+    for i, z in enumerate(zones):
+        where = f"hazard_zones.json zones[{i}]"
+        if not isinstance(z, dict) or "zone_id" not in z:
+            problems.append(f"{where}: missing 'zone_id'")
+            continue
+        zid = str(z["zone_id"])
+        where = f"{where} (zone_id={zid!r})"
+        if zid in zone_ids:
+            problems.append(f"{where}: duplicate zone_id")
+        zone_ids.add(zid)
+        for f in HAZARD_FIELDS:
+            if f not in z:
+                problems.append(f"{where}: missing {f}")
+                continue
+            v = _as_int(z[f])
+            if v not in _VALID_SCALE:
+                problems.append(f"{where}: {f}={z[f]!r} must be an integer in 1..5")
+
+    entries = counts_obj.get("counts") if isinstance(counts_obj, dict) else None
+    if not isinstance(entries, list):
+        problems.append("exposure_by_zone.json: expected an object with a 'counts' list (counts-only contract)")
+        entries = []
+
+    count_zone_ids: Set[str] = set()
+    for i, c in enumerate(entries):
+        where = f"exposure_by_zone.json counts[{i}]"
+        if not isinstance(c, dict) or "zone_id" not in c:
+            problems.append(f"{where}: missing 'zone_id'")
+            continue
+        zid = str(c["zone_id"])
+        where = f"{where} (zone_id={zid!r})"
+        if zid in count_zone_ids:
+            problems.append(f"{where}: duplicate counts entry for zone")
+        count_zone_ids.add(zid)
+        if zid not in zone_ids:
+            problems.append(f"{where}: orphan zone (not in hazard_zones.json)")
+
+        by_type = c.get("counts_by_type")
+        if not isinstance(by_type, dict):
+            problems.append(f"{where}: 'counts_by_type' must be an object")
+            continue
+        for etype, n in by_type.items():
+            if etype not in known_types:
+                problems.append(f"{where}: unknown element_type {etype!r} (add it to importance_tables.py)")
+            v = _as_int(n)
+            if v is None:
+                problems.append(f"{where}: count for {etype!r} is not an integer: {n!r}")
+            elif v < 0:
+                problems.append(f"{where}: negative count for {etype!r}: {v}")
+
+    return problems
+
+
+def check_inputs(zones_obj: Any, counts_obj: Any) -> None:
+    """Raise InputValidationError listing every problem, if any."""
+    problems = validate_inputs(zones_obj, counts_obj)
+    if problems:
+        raise InputValidationError(problems)
+
+
+def load_validated_raw_inputs(input_dir: Path) -> Dict[str, Any]:
+    """
+    Parse both input documents and validate them before any expansion or
+    ranking work. Returns {"hazard_zones": obj, "exposure_by_zone": obj}.
+    """
+    zones_obj = read_json(input_dir / "hazard_zones.json")
+    counts_obj = read_json(input_dir / "exposure_by_zone.json")
+    check_inputs(zones_obj, counts_obj)
+    return {"hazard_zones": zones_obj, "exposure_by_zone": counts_obj}
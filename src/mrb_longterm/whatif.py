@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .config import ModuleConfig
+from .constraints import constraints_active
+from .decay import decay_weights
+from .importance_tables import DEFAULT_TABLES
+from .models import ElementPriority, RankedElement, ZoneHazardResult
+from .scoring import (
+    base_score_from_priority,
+    classify_hazard,
+    greedy_steps,
+    priority_label,
+    ranked_element,
+)
+
+
+@dataclass(frozen=True)
+class WhatIfResult:
+    """
+    Effect of one perturbation on the Phase 2 ranking. Ranks are 1-based;
+    None means "not ranked" (before: the asset did not exist).
+    """
+    perturbation: str
+    element_ids: List[str]
+    previous_ranks: Dict[str, Optional[int]]
+    new_ranks: Dict[str, Optional[int]]
+    reranked_from: int  # ranks before this one are the baseline's
+    top_n: List[RankedElement]
+    entered_top_n: List[str]
+    displaced: List[str]
+    entry_threshold: Optional[float] = None
+
+
+class WhatIf:
+    """
+    Holds a baseline Phase 2 ranking and answers single-asset / single-zone
+    perturbations without re-ranking from scratch.
+
+    The greedy ranking is a prefix-stable process: while no removed or
+    rescored candidate has been reached and no new one would beat the
+    baseline pick, every step is unchanged. So a query finds the first step
+    the perturbation can affect (binary searches over the non-increasing
+    final scores, one per repetition-count segment of the affected type),
+    keeps the baseline prefix, and re-ranks only the perturbed element types
+    from there - only as far as the top N and the affected elements need.
+
+    Only the unconstrained ranking is prefix-stable this way: a config with
+    phase2_max_per_* caps or phase2_min_per_type reservations is rejected
+    (re-run the pipeline, which uses constrained_rank, instead).
+
+    Cost: add_asset stays near 1 ms at ~20k candidates. set_zone_hazard
+    re-ranks every type present in the zone until its deepest element is
+    placed again, so at ~20k candidates it takes ~15-20 ms (median, p95
+    ~30-40 ms) - above the 10 ms aim; it scales with the depth of the
+    zone's elements in the ranking, not with the top N.
+    """
+
+    def __init__(self, candidates: List[ElementPriority], zoning: List[ZoneHazardResult], cfg: ModuleConfig) -> None:
+        if constraints_active(cfg):
+            raise ValueError(
+                "WhatIf replays the unconstrained ranking; phase2_max_per_zone, "
+                "phase2_max_per_hazard_class and phase2_min_per_type must be unset"
+            )
+        self.cfg = cfg
+        self.weights = decay_weights(cfg)
+        self.top_n = max(1, int(cfg.phase2_top_n))
+        self.candidates = list(candidates)
+        self.zones = {z.zone_id: z for z in zoning}
+
+        self.order: List[int] = []  # candidate position ranked at each step
+        self.ranked: List[RankedElement] = []
+        for pos, k, a, w, final in greedy_steps(self.candidates, cfg, weights=self.weights):
+            self.order.append(pos)
+            self.ranked.append(ranked_element(self.candidates[pos], k, a, w, final))
+
+        self._neg_finals = [-r.final_score for r in self.ranked]  # ascending, for bisect
+        self._step_of = {pos: s for s, pos in enumerate(self.order)}
+        self._type_steps: Dict[str, List[int]] = {}
+        self._type_positions: Dict[str, List[int]] = {}
+        self._zone_positions: Dict[str, List[int]] = {}
+        self._type_zone_counts: Dict[Tuple[str, str], int] = {}
+        for s, pos in enumerate(self.order):
+            self._type_steps.setdefault(self.ranked[s].element_type, []).append(s)
+        for pos, c in enumerate(self.candidates):
+            self._type_positions.setdefault(c.element_type, []).append(pos)
+            self._zone_positions.setdefault(c.zone_id, []).append(pos)
+            key = (c.zone_id, c.element_type)
+            self._type_zone_counts[key] = self._type_zone_counts.get(key, 0) + 1
+        # the shortcuts rely on non-increasing final scores (decaying weights)
+        self._decaying = self.weights.decaying
+
+    # --- baseline lookups ---
+    def _counts_at(self, step: int) -> Dict[str, int]:
+        """Per-type repetition counts before `step`."""
+        return {t: bisect_left(steps, step) for t, steps in self._type_steps.items()}
+
+    def _first_beat(self, e: ElementPriority, pos: int, limit: Optional[int] = None) -> int:
+        """
+        First baseline step at which candidate `e` (at position `pos`) would be
+        picked, or `limit` if that is earlier (the search stops there).
+        """
+        n = len(self.order) if limit is None else limit
+        if not self._decaying or e.base_score < 0:
+            return 0
+        steps = self._type_steps.get(e.element_type, [])
+        lo = 0
+        for k in range(len(steps) + 1):
+            if lo >= n:
+                break
+            hi = min(steps[k] + 1, n) if k < len(steps) else n  # steps [lo, hi) see count k
+            final = float(e.base_score * self.weights.weight(e.element_type, e.value_index, k))
+            s = bisect_left(self._neg_finals, -final, lo, hi)
+            # equal finals: the earlier candidate position wins
+            while s < hi and -self._neg_finals[s] == final and self.order[s] < pos:
+                s += 1
+            if s < hi:
+                return s
+            lo = hi
+        return n
+
+    def entry_threshold(self, element_type: str, value_index: Optional[int] = None) -> float:
+        """
+        Base score an additional asset of `element_type` must exceed to enter
+        the top N: min over top-N steps s of final_s / weight(k_type(s)).
+        0.0 when fewer than N elements are ranked.
+        """
+        if len(self.ranked) < self.top_n:
+            return 0.0
+        v = value_index if value_index is not None else self._value_index(element_type)
+        steps = self._type_steps.get(element_type, [])
+        best = float("inf")
+        for s in range(self.top_n):
+            w = self.weights.weight(element_type, v, bisect_left(steps, s))
+            if w > 0:
+                best = min(best, self.ranked[s].final_score / w)
+        return best
+
+    @staticmethod
+    def _value_index(element_type: str) -> int:
+        v = DEFAULT_TABLES.phase2_risk_mitigation.get(element_type)
+        if v is None:
+            raise KeyError(f"Unknown element_type={element_type!r}. Add it to importance_tables.py.")
+        return v
+
+    # --- perturbations ---
+    def add_asset(self, zone_id: str, element_type: str) -> WhatIfResult:
+        """
+        One more asset of `element_type` in `zone_id` (synthetic id zone:type:i),
+        placed after all existing candidates, i.e. it loses score ties.
+        """
+        z = self.zones.get(zone_id)
+        if z is None:
+            raise KeyError(f"Unknown zone_id={zone_id!r}")
+        v = self._value_index(element_type)
+        i = self._type_zone_counts.get((zone_id, element_type), 0) + 1
+        new = ElementPriority(
+            element_id=f"{zone_id}:{element_type}:{i}",
+            element_type=element_type,
+            zone_id=zone_id,
+            hazard_index=z.hazard_index,
+            hazard_class=z.hazard_class,
+            value_index=v,
+            priority_label=priority_label(z.hazard_class, v),
+            base_score=base_score_from_priority(z.hazard_index, z.hazard_class, v),
+        )
+        result = self._rerank(f"add {element_type} in {zone_id}", {len(self.candidates): new})
+        return replace(result, entry_threshold=self.entry_threshold(element_type, v))
+
+    def set_zone_hazard(self, zone_id: str, hazard_index: int) -> WhatIfResult:
+        """
+        Rescore every asset of `zone_id` as if its hazard index were
+        `hazard_index` (e.g. one class down: 4 -> 3).
+        """
+        if zone_id not in self.zones:
+            raise KeyError(f"Unknown zone_id={zone_id!r}")
+        if not 1 <= hazard_index <= 5:
+            raise ValueError(f"hazard_index must be in 1..5, got {hazard_index}")
+        hc = classify_hazard(hazard_index)
+        changed = {}
+        for pos in self._zone_positions.get(zone_id, []):
+            c = self.candidates[pos]
+            changed[pos] = replace(
+                c,
+                hazard_index=hazard_index,
+                hazard_class=hc,
+                priority_label=priority_label(hc, c.value_index),
+                base_score=base_score_from_priority(hazard_index, hc, c.value_index),
+            )
+        return self._rerank(f"set hazard_index of {zone_id} to {hazard_index}", changed)
+
+    def _baseline_before(
+        self,
+        neg_final: float,
+        pos: int,
+        start: int,
+        types: Set[str],
+        stream_ties: Dict[float, List[int]],
+    ) -> int:
+        """
+        How many baseline elements of the unperturbed types, from `start` on,
+        are merged ahead of the re-ranked element (neg_final, pos): all with a
+        higher final, plus those winning the tie on position among equal finals.
+        Both streams are non-increasing in final, so this is a few bisects.
+        """
+        lo = bisect_left(self._neg_finals, neg_final, start)
+        hi = bisect_right(self._neg_finals, neg_final, start)
+        ahead = lo - start
+        for t in types:
+            steps = self._type_steps.get(t, [])
+            first = bisect_left(steps, start)
+            ahead -= bisect_left(steps, lo, first) - first
+        # equal finals: replay the merge of both streams' tie runs, up to our element
+        tied = (self.order[s] for s in range(lo, hi) if self.ranked[s].element_type not in types)
+        mine = stream_ties[neg_final]
+        i = j = 0
+        for tied_pos in tied:
+            while mine[j] < tied_pos:
+                if mine[j] == pos:
+                    return ahead + i
+                j += 1
+            i += 1
+        return ahead + i
+
+    def _rerank(self, perturbation: str, changed: Dict[int, ElementPriority]) -> WhatIfResult:
+        """
+        `changed` maps candidate positions to their new versions; positions
+        past the end are added assets (they lose ties to every existing one).
+        """
+        n_cand = len(self.candidates)
+        start = len(self.order)
+        for pos in changed:
+            if pos < n_cand:
+                start = min(start, self._step_of[pos])
+        for pos, e in changed.items():
+            start = self._first_beat(e, pos, start)
+
+        # Past the prefix only the perturbed types' streams change: a type's
+        # picks depend on its own repetition count alone, and the greedy ranking
+        # is the merge of per-type streams on (-final, position). So re-rank the
+        # perturbed types and merge them into the baseline tail of the others.
+        types = {e.element_type for e in changed.values()}
+        if not self._decaying:
+            types |= set(self._type_positions)  # no monotone merge: re-rank everything
+        tail_positions = sorted(
+            [p for t in types for p in self._type_positions.get(t, []) if self._step_of[p] >= start]
+            + [p for p in changed if p >= n_cand]
+        )
+        tail = [changed.get(p) or self.candidates[p] for p in tail_positions]
+        counts = {t: bisect_left(self._type_steps.get(t, []), start) for t in types}
+
+        # the re-ranked stream, only until every perturbed element is placed;
+        # entries are (-final, position, tail index, k, alpha, weight) and
+        # become RankedElements only if they reach the new top N
+        pending = {e.element_id for e in changed.values()}
+        stream: List[Tuple[float, int, int, int, float, float]] = []
+        for i, k, a, w, final in greedy_steps(tail, self.cfg, counts, self.weights):
+            if not pending and len(stream) >= self.top_n - start:
+                break
+            stream.append((-final, tail_positions[i], i, k, a, w))
+            pending.discard(tail[i].element_id)
+
+        def baseline() -> Iterator[Tuple[float, int, RankedElement]]:
+            for s in range(start, len(self.order)):
+                r = self.ranked[s]
+                if r.element_type not in types:
+                    yield -r.final_score, self.order[s], r
+
+        new_top: List[RankedElement] = self.ranked[:min(start, self.top_n)]
+        for entry in heapq.merge(baseline(), stream):
+            if len(new_top) >= self.top_n:
+                break
+            if len(entry) == 3:
+                new_top.append(entry[2])
+            else:
+                neg_final, _pos, i, k, a, w = entry
+                new_top.append(ranked_element(tail[i], k, a, w, -neg_final))
+
+        new_ranks: Dict[str, Optional[int]] = {}
+        perturbed = {e.element_id for e in changed.values()}
+        stream_ties: Dict[float, List[int]] = {}  # -final -> positions, in stream order
+        for neg_final, pos, *_ in stream:
+            stream_ties.setdefault(neg_final, []).append(pos)
+        for n, (neg_final, pos, i, *_) in enumerate(stream):
+            if tail[i].element_id in perturbed:
+                new_ranks[tail[i].element_id] = (
+                    start + n + self._baseline_before(neg_final, pos, start, types, stream_ties) + 1
+                )
+
+        previous_ranks: Dict[str, Optional[int]] = {}
+        for p in sorted(changed):
+            eid = changed[p].element_id
+            previous_ranks[eid] = self._step_of[p] + 1 if p < n_cand else None
+
+        old_ids = [r.element_id for r in self.ranked[:self.top_n]]
+        new_ids = [r.element_id for r in new_top]
+        old_set, new_set = set(old_ids), set(new_ids)
+        return WhatIfResult(
+            perturbation=perturbation,
+            element_ids=list(previous_ranks),
+            previous_ranks=previous_ranks,
+            new_ranks={eid: new_ranks.get(eid) for eid in previous_ranks},
+            reranked_from=start + 1,
+            top_n=new_top,
+            entered_top_n=[eid for eid in new_ids if eid not in old_set],
+            displaced=[eid for eid in old_ids if eid not in new_set],
+        )
+
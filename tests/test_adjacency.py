@@ -0,0 +1,63 @@
+from dataclasses import replace
+
+from mrb_longterm.adjacency import build_zone_graph, gap_coverage_doc, multi_source_bfs, nearest_other_source
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.pipeline import run_phase1
+from mrb_longterm.scoring import zoning_from_inputs
+
+
+def test_csr_graph_and_bounded_bfs():
+    g = build_zone_graph(["A", "B", "C", "D", "E"], [("A", "B"), ("B", "C"), ("C", "D"), ("B", "B")])
+    assert g.neighbours_of("B") == ["A", "C"]
+    assert g.neighbours_of("E") == []
+
+    dist, origin = multi_source_bfs(g, [0], max_hops=2)
+    assert list(dist) == [0, 1, 2, -1, -1]
+    assert [g.zone_ids[o] for o in origin[:3]] == ["A", "A", "A"]
+
+    # sources A and C: each one's entry is the other source
+    dist, origin = nearest_other_source(g, [0, 2], max_hops=3)
+    assert list(dist) == [2, 1, 2, 1, -1]
+    assert [g.zone_ids[o] for o in origin[:4]] == ["C", "A", "A", "C"]
+
+
+def test_gap_coverage_by_low_hazard_neighbour():
+    zones = [
+        ZoneHazardInputs("HIGH", 5, 5, 5),
+        ZoneHazardInputs("SAFE", 1, 1, 1),
+        ZoneHazardInputs("FAR", 4, 4, 4),
+    ]
+    counts = [ExposureCounts("SAFE", {"hospitals_health_center": 2}), ExposureCounts("HIGH", {}), ExposureCounts("FAR", {})]
+    cfg = ModuleConfig.default()
+    zoning = zoning_from_inputs(zones)
+    phase1 = run_phase1(zone_hazards=zones, exposure_counts=counts, cfg=cfg, zoning=zoning)
+    graph = build_zone_graph([z.zone_id for z in zoning], [("HIGH", "SAFE"), ("HIGH", "FAR")])
+
+    doc = gap_coverage_doc(phase1, graph, zoning, counts, cfg)
+    status = {(r["zone_id"], r["element_type"]): r for r in doc["gaps"]}
+    assert status[("HIGH", "hospitals_health_center")]["status"] == "covered"
+    assert status[("HIGH", "hospitals_health_center")]["nearest_provider"] == "SAFE"
+    assert status[("FAR", "hospitals_health_center")]["status"] == "uncovered"  # 2 hops away
+    assert doc["n_covered"] + doc["n_uncovered"] == len(phase1.gaps)
+
+
+def test_short_zone_does_not_cover_itself():
+    zones = [
+        ZoneHazardInputs("SHORT", 3, 3, 3, meta={"population": 50000}),
+        ZoneHazardInputs("NEXT", 1, 1, 1, meta={"population": 2500}),
+        ZoneHazardInputs("LONE", 3, 3, 3, meta={"population": 25000}),
+    ]
+    counts = [ExposureCounts("SHORT", {"schools": 2}), ExposureCounts("NEXT", {"schools": 1}),
+              ExposureCounts("LONE", {"schools": 1})]
+    cfg = replace(ModuleConfig.default(), phase1_standards={"schools": {"attribute": "population", "per": 2500}})
+    zoning = zoning_from_inputs(zones)
+    phase1 = run_phase1(zone_hazards=zones, exposure_counts=counts, cfg=cfg, zoning=zoning)
+    graph = build_zone_graph([z.zone_id for z in zoning], [("SHORT", "NEXT")])
+
+    doc = gap_coverage_doc(phase1, graph, zoning, counts, cfg)
+    status = {(r["zone_id"], r["element_type"]): r for r in doc["gaps"]}
+    # SHORT has schools and a provider class, but is itself below standard
+    assert status[("SHORT", "schools")]["nearest_provider"] == "NEXT"
+    assert status[("SHORT", "schools")]["hops"] == 1
+    assert status[("LONE", "schools")]["status"] == "uncovered"  # no other zone in reach
@@ -0,0 +1,70 @@
+import asyncio
+import io
+import json
+
+from mrb_longterm.aio import iter_ranked_async, run_phase2_async, run_targets_async
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.io import expand_assets
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.pipeline import run_phase2
+from mrb_longterm.progress import ProgressReporter
+from mrb_longterm.stages import run_targets
+
+ZONES = [ZoneHazardInputs("Z1", 5, 5, 5), ZoneHazardInputs("Z2", 3, 3, 3)]
+ASSETS = expand_assets([
+    ExposureCounts("Z1", {"roads": 30, "hospitals_health_center": 5}),
+    ExposureCounts("Z2", {"schools": 20, "shelters": 3}),
+])
+
+def test_async_phase2_matches_sync():
+    cfg = ModuleConfig.default()
+    out = asyncio.run(run_phase2_async(zone_hazards=ZONES, assets=ASSETS, cfg=cfg))
+    assert out == run_phase2(zone_hazards=ZONES, assets=ASSETS, cfg=cfg)
+
+def test_streamed_ranking_with_backpressure_and_early_exit():
+    cfg = ModuleConfig.default()
+    expected = run_phase2(zone_hazards=ZONES, assets=ASSETS, cfg=ModuleConfig(phase2_top_n=10_000)).ranked_elements
+
+    async def consume(limit):
+        got = []
+        async for r in iter_ranked_async(zone_hazards=ZONES, assets=ASSETS, cfg=cfg, max_buffer=2):
+            got.append(r)
+            if len(got) == limit:
+                break
+        return got
+
+    assert asyncio.run(consume(None)) == expected
+    assert asyncio.run(consume(5)) == expected[:5]
+
+def test_run_targets_async_writes_requested_outputs(tmp_path):
+    inp = tmp_path / "in"
+    inp.mkdir()
+    (inp / "hazard_zones.json").write_text(json.dumps({"zones": [{"zone_id": "Z1", "HD": 5, "F": 5, "I": 5}]}))
+    (inp / "exposure_by_zone.json").write_text(json.dumps({"counts": [{"zone_id": "Z1", "counts_by_type": {"roads": 2}}]}))
+
+    written = asyncio.run(run_targets_async(
+        input_dir=inp, output_dir=tmp_path / "out", targets=["summary", "phase2_matrix"]
+    ))
+    assert [p.name for p in written] == ["phase2_matrix.json", "summary.json", "manifest.json"]
+
+def test_run_targets_async_forwards_budget_and_progress(tmp_path):
+    inp = tmp_path / "in"
+    inp.mkdir()
+    (inp / "hazard_zones.json").write_text(json.dumps({
+        "zones": [{"zone_id": f"Z{i}", "HD": 1 + i % 5, "F": 4, "I": 4} for i in range(10)]
+    }))
+    (inp / "exposure_by_zone.json").write_text(json.dumps({
+        "counts": [{"zone_id": f"Z{i}", "counts_by_type": {"roads": 3, "schools": i % 2}} for i in range(10)]
+    }))
+
+    run_targets(input_dir=inp, output_dir=tmp_path / "sync", memory_budget_mb=1)
+    sink = io.StringIO()
+    with ProgressReporter(sink, interval=60) as progress:
+        asyncio.run(run_targets_async(input_dir=inp, output_dir=tmp_path / "async", memory_budget_mb=1, progress=progress))
+
+    for f in (tmp_path / "sync").glob("*.json"):
+        assert f.read_bytes() == (tmp_path / "async" / f.name).read_bytes(), f.name
+    summary = json.loads((tmp_path / "async" / "summary.json").read_text())
+    assert summary["engines"]["writer"] == "streaming"
+    events = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert {"ranking", "write_outputs"} <= {e["stage"] for e in events if e["event"] == "stage_end"}
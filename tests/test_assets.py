@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from mrb_longterm.assets import load_asset_table
+from mrb_longterm.stages import run_targets
+from mrb_longterm.validation import InputValidationError
+
+
+def _zones(input_dir):
+    input_dir.mkdir()
+    (input_dir / "hazard_zones.json").write_text(json.dumps({
+        "zones": [{"zone_id": "Z1", "HD": 5, "F": 5, "I": 5}, {"zone_id": "Z2", "HD": 2, "F": 3, "I": 2}]
+    }), encoding="utf-8")
+
+
+def test_asset_csv_ranks_like_the_equivalent_counts(tmp_path):
+    _zones(tmp_path / "assets_in")
+    (tmp_path / "assets_in" / "exposure_assets.csv").write_text(
+        "element_id,element_type,zone_id,beds\n"
+        "H-1,hospitals_health_center,Z1,120\n"
+        "S-1,shelters,Z2,\n"
+        "H-2,hospitals_health_center,Z1,80\n"
+        "S-2,shelters,Z1,\n"
+        "S-3,shelters,Z2,\n",
+        encoding="utf-8",
+    )
+    _zones(tmp_path / "counts_in")
+    (tmp_path / "counts_in" / "exposure_by_zone.json").write_text(json.dumps({"counts": [
+        {"zone_id": "Z1", "counts_by_type": {"hospitals_health_center": 2, "shelters": 1}},
+        {"zone_id": "Z2", "counts_by_type": {"shelters": 2}},
+    ]}), encoding="utf-8")
+
+    for name in ("assets", "counts"):
+        run_targets(input_dir=tmp_path / f"{name}_in", output_dir=tmp_path / f"{name}_out")
+    load = lambda name, f: json.loads((tmp_path / f"{name}_out" / f).read_text(encoding="utf-8"))
+
+    assert load("assets", "phase1_matrix.json") == load("counts", "phase1_matrix.json")
+    by_assets = load("assets", "phase2_risk_mitigation.json")["ranked_elements"]
+    by_counts = load("counts", "phase2_risk_mitigation.json")["ranked_elements"]
+    strip = lambda rows: [{k: v for k, v in r.items() if k != "element_id"} for r in rows]
+    assert strip(by_assets) == strip(by_counts)
+    assert sorted(r["element_id"] for r in by_assets) == ["H-1", "H-2", "S-1", "S-2", "S-3"]
+    assert load("assets", "phase2_risk_mitigation.json")["notes"]["assets"].startswith("element IDs from exposure_assets.csv")
+    assert load("counts", "phase2_risk_mitigation.json")["notes"]["assets"].startswith("synthetic IDs")
+    assert load("assets", "phase2_type_summary.json")["mode"] == "asset-level (exposure_assets.csv)"
+
+
+def test_asset_table_columns_and_meta(tmp_path):
+    path = tmp_path / "exposure_assets.csv"
+    path.write_text("zone_id,element_id,element_type,owner\nZ2,a,shelters,city\nZ1,b,schools,\nZ2,c,schools,x\n",
+                    encoding="utf-8")
+    table = load_asset_table(path)
+
+    assert len(table) == 3 and table.zones == ["Z2", "Z1"] and table.types == ["shelters", "schools"]
+    assert [table.element_ids[i] for i in table.order] == ["a", "c", "b"]
+    assert [(c.zone_id, c.counts_by_type) for c in table.counts] == [
+        ("Z2", {"shelters": 1, "schools": 1}), ("Z1", {"schools": 1})
+    ]
+    assert table.item(0).meta == {"owner": "city"} and table.row_meta(1) == {}
+
+
+def test_asset_table_reports_every_problem_with_line_numbers(tmp_path):
+    path = tmp_path / "exposure_assets.csv"
+    path.write_text("element_id,element_type,zone_id\na,shelters,Z1\na,shelters,Z1\nb,castles,Z1\nc,shelters,Nowhere\n",
+                    encoding="utf-8")
+    with pytest.raises(InputValidationError) as err:
+        load_asset_table(path, zone_ids={"Z1"})
+
+    assert [p.split(":")[0] for p in err.value.problems] == [
+        "exposure_assets.csv line 3", "exposure_assets.csv line 4", "exposure_assets.csv line 5",
+    ]
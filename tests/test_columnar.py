@@ -0,0 +1,24 @@
+import json
+
+from mrb_longterm.columnar import open_phase1_matrix_columnar, phase1_matrix_columnar_files
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.io import write_outputs
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.outputs import output_documents, phase1_matrix_doc
+from mrb_longterm.scoring import zoning_from_inputs
+
+def test_columnar_matrix_matches_json_matrix(tmp_path):
+    cfg = ModuleConfig.default()
+    zoning = zoning_from_inputs([ZoneHazardInputs("Zb", 5, 5, 5), ZoneHazardInputs("Za", 2, 2, 2)])
+    counts = [ExposureCounts("Zb", {"roads": 3, "shelters": 1}), ExposureCounts("Za", {"schools": 2})]
+
+    bundle = phase1_matrix_columnar_files(zoning, counts, cfg)
+    write_outputs(tmp_path, output_documents({"phase1_matrix_columnar": bundle}, ["phase1_matrix_columnar"]))
+    doc = json.loads(json.dumps(phase1_matrix_doc(zoning, counts, cfg)))
+
+    with open_phase1_matrix_columnar(tmp_path / "phase1_matrix_columnar") as m:
+        assert [m.zone_id(i) for i in range(m.n_zones)] == [r["zone_id"] for r in doc["matrix_rows"]]
+        for row in doc["matrix_rows"]:
+            for col in ("count", "value_index", "priority_rank", "is_gap"):
+                assert list(m.zone_cells(row["zone_id"], col)) == [int(c[col]) for c in row["cells"]]
+        assert list(m.type_cells("roads", "count")) == [0, 3]
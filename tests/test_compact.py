@@ -0,0 +1,43 @@
+import json
+
+from mrb_longterm.io import decode_compact, read_output
+from mrb_longterm.outputs import compact_document
+from mrb_longterm.stages import DEFAULT_TARGETS, run_targets
+
+
+def test_compact_document_round_trips_and_codes_strings():
+    doc = {
+        "rows": [
+            {"zone_id": "Z1", "element_type": "shelters", "score": 1.5, "cells": [{"hazard_class": "low"}]},
+            {"zone_id": "Z1", "element_type": "schools", "score": None, "cells": []},
+        ],
+        "mixed": [{"a": 1}, {"b": 2}, 3],
+        "empty": [],
+    }
+    encoded = json.loads(compact_document(doc))
+
+    assert encoded["dictionaries"]["zone_id"] == ["Z1"]
+    assert encoded["document"]["rows"]["$columns"]["zone_id"] == [0, 0]
+    assert decode_compact(encoded) == doc
+
+
+def test_compact_outputs_decode_to_the_full_schema(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "hazard_zones.json").write_text(json.dumps({
+        "zones": [{"zone_id": f"Z{i}", "HD": 1 + i % 5, "F": 3, "I": 4} for i in range(6)]
+    }), encoding="utf-8")
+    (input_dir / "exposure_by_zone.json").write_text(json.dumps({
+        "counts": [{"zone_id": f"Z{i}", "counts_by_type": {"shelters": i, "schools": 1}} for i in range(6)]
+    }), encoding="utf-8")
+
+    run_targets(input_dir=input_dir, output_dir=tmp_path / "compact", schema="compact")
+    run_targets(input_dir=input_dir, output_dir=tmp_path / "full",
+                targets=list(DEFAULT_TARGETS) + ["changes"], seeds={"previous_dir": tmp_path / "compact"})
+
+    for f in (tmp_path / "compact").glob("*.json"):
+        if f.name != "manifest.json":
+            assert read_output(f) == json.loads((tmp_path / "full" / f.name).read_text(encoding="utf-8"))
+    changes = json.loads((tmp_path / "full" / "changes.json").read_text(encoding="utf-8"))
+    assert changes["previous_found"] == {"phase1_new_planification": True, "phase2_risk_mitigation": True}
+    assert changes["phase1"]["n_new_gaps"] == changes["phase2"]["n_rank_moves"] == 0
@@ -0,0 +1,72 @@
+from collections import Counter
+from dataclasses import replace
+
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.constraints import constrained_rank
+from mrb_longterm.io import expand_assets
+from mrb_longterm.models import ElementPriority, ExposureCounts, ZoneHazardInputs
+from mrb_longterm.pipeline import build_candidates
+from mrb_longterm.scoring import diminishing_returns_rank, zoning_from_inputs
+
+ZONES = [ZoneHazardInputs("HOT", 5, 5, 5)] + [ZoneHazardInputs(f"Z{i}", 1 + i % 4, 2, 1 + i % 3) for i in range(6)]
+COUNTS = [ExposureCounts("HOT", {"schools": 6, "shelters": 6, "minery": 2})] + [
+    ExposureCounts(z.zone_id, {"schools": 2, "shelters": 1, "minery": 1}) for z in ZONES[1:]
+]
+CANDIDATES = build_candidates(zoning=zoning_from_inputs(ZONES), assets=expand_assets(COUNTS))
+
+
+def test_no_constraints_is_plain_ranking():
+    cfg = ModuleConfig.default()
+    ranked, skipped = constrained_rank(CANDIDATES, cfg)
+    assert ranked == diminishing_returns_rank(CANDIDATES, cfg) and skipped == []
+
+    # caps that never bind change nothing either
+    loose = replace(cfg, phase2_max_per_zone=100)
+    assert constrained_rank(CANDIDATES, loose) == (ranked, [])
+
+
+def test_caps_and_minimums():
+    cfg = replace(
+        ModuleConfig.default(),
+        phase2_top_n=10,
+        phase2_max_per_zone=3,
+        phase2_max_per_hazard_class=6,
+        phase2_min_per_type={"minery": 2},
+    )
+    ranked, skipped = constrained_rank(CANDIDATES, cfg)
+    top = ranked[:10]
+
+    assert max(Counter(r.zone_id for r in top).values()) <= 3
+    assert max(Counter(r.hazard_class for r in top).values()) <= 6
+    assert sum(r.element_type == "minery" for r in top) >= 2
+    assert sorted(r.element_id for r in ranked) == sorted(c.element_id for c in CANDIDATES)
+
+    reasons = Counter(s.reason for s in skipped)
+    assert reasons["max_per_zone"] > 0
+    top_ids = {r.element_id for r in top}
+    for s in skipped:
+        if s.reason == "max_per_zone":
+            assert s.element_id not in top_ids
+            assert sum(r.zone_id == s.zone_id for r in top[:s.at_rank - 1]) == 3
+
+
+def test_reparked_group_is_recorded_once():
+    # a1 is taken; d1 and a2 are parked for the b minimum; b1 then breaks the
+    # zone cap, which frees a slot (unpark); d1 is taken and a2 is parked again
+    cands = [
+        ElementPriority("a1", "a", "Z1", 3, "medium", 3, "Low", 500.0),
+        ElementPriority("d1", "d", "Z5", 3, "medium", 3, "Low", 495.0),
+        ElementPriority("a2", "a", "Z2", 3, "medium", 3, "Low", 490.0),
+        ElementPriority("b1", "b", "Z1", 3, "medium", 3, "Low", 100.0),
+        ElementPriority("c1", "c", "Z4", 3, "medium", 3, "Low", 50.0),
+    ]
+    cfg = replace(ModuleConfig.default(), phase2_top_n=3, phase2_max_per_zone=1,
+                  phase2_min_per_type={"b": 1, "c": 1}, phase2_alpha_by_type={"a": 1.0})
+    ranked, skipped = constrained_rank(cands, cfg)
+
+    assert [r.element_id for r in ranked[:3]] == ["a1", "d1", "c1"]
+    assert [(s.element_id, s.reason) for s in skipped] == [
+        ("d1", "reserved_for_min_per_type"),
+        ("a2", "reserved_for_min_per_type"),
+        ("b1", "max_per_zone"),
+    ]
@@ -0,0 +1,86 @@
+import json
+import random
+from dataclasses import replace
+
+import pytest
+
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.decay import DECAY_MODELS, decay_model, repetition_weight
+from mrb_longterm.models import ElementPriority
+from mrb_longterm.scoring import (
+    _greedy_steps_heap,
+    _greedy_steps_quadratic,
+    compare_decay_models,
+    diminishing_returns_rank,
+)
+from mrb_longterm.stages import run_targets
+
+
+def _candidates(seed, n):
+    rng = random.Random(seed)
+    return [
+        ElementPriority(f"e{i}", rng.choice("abc"), "Z", 3, "medium", rng.randint(1, 5), "Low",
+                        float(rng.choice([100, 210, 305, 500])))
+        for i in range(n)
+    ]
+
+
+def test_model_weights():
+    assert decay_model("exponential").weight(0.7, 5) == repetition_weight(0.7, 5)
+    assert decay_model("hyperbolic").weight(0.7, 1) == pytest.approx(0.7)
+    assert decay_model("hyperbolic").weight(0.7, 9) > repetition_weight(0.7, 9)
+    capped = decay_model("step_capped", {"cap": 2})
+    assert capped.weight(0.5, 2) == capped.weight(0.5, 50) == 0.25
+    assert decay_model("saturating", {"floor": 0.3}).weight(0.5, 200) == pytest.approx(0.3)
+
+    with pytest.raises(ValueError):
+        decay_model("linear")
+    with pytest.raises(ValueError):
+        decay_model("saturating", {"cap": 2})
+    with pytest.raises(ValueError):
+        decay_model("step_capped", {"cap": 1.5})
+
+
+def test_heap_ranker_matches_quadratic_for_every_model():
+    cands = _candidates(3, 90)
+    for model in DECAY_MODELS:
+        for alpha_by_type in ({}, {"a": 0.3, "c": 1.0}):
+            cfg = replace(ModuleConfig.default(), phase2_decay_model=model, phase2_alpha_by_type=alpha_by_type)
+            assert list(_greedy_steps_heap(cands, cfg, {})) == list(_greedy_steps_quadratic(cands, cfg, {}))
+
+
+def test_comparison_ranks_each_model_like_a_full_run():
+    cands = _candidates(5, 120)
+    cfg = replace(ModuleConfig.default(), phase2_top_n=15, phase2_decay_model="saturating",
+                  phase2_decay_compare=("exponential", "step_capped"))
+    rankings = compare_decay_models(cands, cfg)
+    assert list(rankings) == ["saturating", "exponential", "step_capped"]
+    for model, top in rankings.items():
+        assert top == diminishing_returns_rank(cands, replace(cfg, phase2_decay_model=model))[:15]
+
+
+def test_decay_settings_from_config(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "hazard_zones.json").write_text(json.dumps({
+        "zones": [{"zone_id": f"Z{i}", "HD": 1 + i % 5, "F": 4, "I": 4} for i in range(6)]
+    }), encoding="utf-8")
+    (input_dir / "exposure_by_zone.json").write_text(json.dumps({
+        "counts": [{"zone_id": f"Z{i}", "counts_by_type": {"shelters": 3, "schools": 2}} for i in range(6)]
+    }), encoding="utf-8")
+    (input_dir / "config.json").write_text(json.dumps({
+        "phase2_decay_model": "step_capped",
+        "phase2_decay_params": {"step_capped": {"cap": 1}},
+        "phase2_alpha_by_type": {"shelters": 0.5},
+    }), encoding="utf-8")
+
+    run_targets(input_dir=input_dir, output_dir=tmp_path / "out",
+                targets=["phase2_risk_mitigation", "phase2_decay_comparison"])
+
+    doc = json.loads((tmp_path / "out" / "phase2_risk_mitigation.json").read_text(encoding="utf-8"))
+    assert doc["notes"]["diminishing_returns"]["decay"]["params"] == {"cap": 1.0}
+    shelters = [r["weight_used"] for r in doc["ranked_elements"] if r["element_type"] == "shelters"]
+    assert shelters == [1.0] + [0.5] * (len(shelters) - 1)
+
+    comparison = json.loads((tmp_path / "out" / "phase2_decay_comparison.json").read_text(encoding="utf-8"))
+    assert list(comparison["models"]) == ["step_capped", "exponential", "hyperbolic", "saturating"]
@@ -0,0 +1,25 @@
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.diff import diff_phase1, diff_phase2
+from mrb_longterm.io import dump_dataclass_list, expand_assets
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.pipeline import run_phase1, run_phase2
+
+def test_gap_and_rank_changes_between_runs():
+    cfg = ModuleConfig.default()
+    zones = [ZoneHazardInputs("Z1", 5, 5, 5), ZoneHazardInputs("Z2", 3, 3, 3)]
+    before = [ExposureCounts("Z1", {"roads": 1}), ExposureCounts("Z2", {"shelters": 1})]
+    after = [ExposureCounts("Z1", {"roads": 1, "shelters": 1}), ExposureCounts("Z2", {})]
+
+    p1_before = run_phase1(zone_hazards=zones, exposure_counts=before, cfg=cfg)
+    p1_after = run_phase1(zone_hazards=zones, exposure_counts=after, cfg=cfg)
+    d1 = diff_phase1({"gaps": dump_dataclass_list(p1_before.gaps),
+                      "existing": dump_dataclass_list(p1_before.existing)}, p1_after)
+    assert [(g["zone_id"], g["element_type"]) for g in d1["closed_gaps"]] == [("Z1", "shelters")]
+    assert [(g["zone_id"], g["element_type"]) for g in d1["new_gaps"]] == [("Z2", "shelters")]
+
+    p2_before = run_phase2(zone_hazards=zones, assets=expand_assets(before), cfg=cfg)
+    p2_after = run_phase2(zone_hazards=zones, assets=expand_assets(after), cfg=cfg)
+    d2 = diff_phase2({"ranked_elements": dump_dataclass_list(p2_before.ranked_elements)}, p2_after)
+    assert [e["element_id"] for e in d2["entered"]] == ["Z1:shelters:1"]
+    assert [e["element_id"] for e in d2["left"]] == ["Z2:shelters:1"]
+    assert d2["rank_moves"] == []  # Z1:roads:1 stays second
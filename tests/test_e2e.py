@@ -1,6 +1,8 @@
+import hashlib
 import json
 
 from mrb_longterm.cli import main as cli_main
+from mrb_longterm.io import write_outputs
 
 def test_e2e(tmp_path, monkeypatch):
     input_dir = tmp_path / "input"
@@ -33,3 +35,43 @@ def test_e2e(tmp_path, monkeypatch):
     assert (output_dir / "phase1_new_planification.json").exists()
     assert (output_dir / "phase2_risk_mitigation.json").exists()
     assert (output_dir / "summary.json").exists()
+    assert (output_dir / "manifest.json").exists()
+
+def test_outputs_manifest_matches_files(tmp_path):
+    docs = {"a.json": {"x": 1}, "b.json": [1, 2, 3]}
+    written = write_outputs(tmp_path, docs, max_workers=2)
+
+    assert [p.name for p in written] == ["a.json", "b.json", "manifest.json"]
+    manifest = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["complete"] is True
+    for entry in manifest["files"]:
+        data = (tmp_path / entry["file"]).read_bytes()
+        assert entry["bytes"] == len(data)
+        assert entry["sha256"] == hashlib.sha256(data).hexdigest()
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_compare_delta_only_rewrites_nothing_on_identical_rerun(tmp_path, monkeypatch):
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+    input_dir.mkdir()
+    (input_dir / "hazard_zones.json").write_text(json.dumps({
+        "zones": [{"zone_id": "Z1", "HD": 5, "F": 5, "I": 5}]
+    }), encoding="utf-8")
+    (input_dir / "exposure_by_zone.json").write_text(json.dumps({
+        "counts": [{"zone_id": "Z1", "counts_by_type": {"roads": 2}}]
+    }), encoding="utf-8")
+
+    argv = ["mrb-longterm", "--input", str(input_dir), "--output", str(output_dir)]
+    monkeypatch.setattr("sys.argv", argv)
+    cli_main()
+    before = (output_dir / "phase2_risk_mitigation.json").stat().st_mtime_ns
+
+    monkeypatch.setattr("sys.argv", argv + ["--compare", "--delta-only"])
+    cli_main()
+
+    manifest = json.loads((output_dir / "manifest.json").read_text(encoding="utf-8"))
+    written = {e["file"] for e in manifest["files"] if e["written"]}
+    assert written == {"changes.json"}
+    assert (output_dir / "phase2_risk_mitigation.json").stat().st_mtime_ns == before
+    changes = json.loads((output_dir / "changes.json").read_text(encoding="utf-8"))
+    assert changes["phase2"]["n_entered"] == 0 and changes["phase1"]["n_new_gaps"] == 0
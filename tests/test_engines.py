@@ -0,0 +1,49 @@
+import json
+
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.engines import IN_MEMORY, EngineOptions, plan_engines
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.stages import run_targets
+
+
+def _inputs(n_zones, per_type):
+    zones = [ZoneHazardInputs(f"Z{i}", 4, 4, 4) for i in range(n_zones)]
+    counts = [ExposureCounts(f"Z{i}", {"shelters": per_type, "schools": per_type}) for i in range(n_zones)]
+    return zones, counts
+
+
+def test_plan_escalates_until_the_estimate_fits():
+    cfg = ModuleConfig.default()
+    zones, counts = _inputs(20_000, 50)
+
+    assert plan_engines(cfg, zones, counts) is IN_MEMORY
+    roomy = plan_engines(cfg, zones, counts, EngineOptions(memory_budget_mb=100_000))
+    assert (roomy.assets, roomy.writer, roomy.phase1_sort, roomy.fits) == ("expanded", "document", "memory", True)
+
+    tight = plan_engines(cfg, zones, counts, EngineOptions(memory_budget_mb=50))
+    assert (tight.assets, tight.writer, tight.phase1_sort, tight.fits) == ("grouped", "streaming", "spill", False)
+    assert tight.phase1_cfg(cfg).phase1_spill_run_size == tight.spill_run_size > 0
+
+    no_spill = plan_engines(cfg, zones, counts, EngineOptions(memory_budget_mb=50, allow_spill=False))
+    assert no_spill.phase1_sort == "memory"
+
+
+def test_budgeted_run_writes_the_same_outputs(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "hazard_zones.json").write_text(json.dumps({
+        "zones": [{"zone_id": f"Z{i}", "HD": 1 + i % 5, "F": 4, "I": 4} for i in range(30)]
+    }), encoding="utf-8")
+    (input_dir / "exposure_by_zone.json").write_text(json.dumps({
+        "counts": [{"zone_id": f"Z{i}", "counts_by_type": {"shelters": 4, "schools": i % 3}} for i in range(30)]
+    }), encoding="utf-8")
+
+    run_targets(input_dir=input_dir, output_dir=tmp_path / "plain")
+    run_targets(input_dir=input_dir, output_dir=tmp_path / "budget", memory_budget_mb=1)
+
+    for f in (tmp_path / "plain").glob("*.json"):
+        if f.name not in ("summary.json", "manifest.json"):
+            assert f.read_bytes() == (tmp_path / "budget" / f.name).read_bytes(), f.name
+    summary = json.loads((tmp_path / "budget" / "summary.json").read_text(encoding="utf-8"))
+    assert summary["engines"]["assets"] == "grouped" and summary["engines"]["writer"] == "streaming"
+    assert "engines" not in json.loads((tmp_path / "plain" / "summary.json").read_text(encoding="utf-8"))
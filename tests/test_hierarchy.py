@@ -0,0 +1,57 @@
+from dataclasses import replace
+
+import pytest
+
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.models import ExposureCounts, ExposureItem, ZoneHazardInputs
+from mrb_longterm.pipeline import run_all
+
+def test_rollup_zone_municipality_region():
+    cfg = ModuleConfig.default()
+    zones = [
+        ZoneHazardInputs("Z1", 5, 5, 5, meta={"region": "North", "municipality": "Town_A"}),
+        ZoneHazardInputs("Z2", 4, 4, 4, meta={"parent_path": "North/Town_B"}),
+        ZoneHazardInputs("Z3", 3, 3, 3),
+    ]
+    counts = [ExposureCounts("Z1", {"hospitals_health_center": 2}), ExposureCounts("Z2", {"roads": 1})]
+    assets = [
+        ExposureItem("h1", "hospitals_health_center", "Z1"),
+        ExposureItem("h2", "hospitals_health_center", "Z1"),
+        ExposureItem("r1", "roads", "Z2"),
+    ]
+
+    out = run_all(zone_hazards=zones, assets=assets, exposure_counts=counts, cfg=cfg)
+    root = out.rollup
+
+    assert root.n_zones == 3
+    assert root.phase1_n_gaps == len(out.phase1.gaps)
+    assert root.phase2_n_ranked == 3
+
+    north = next(c for c in root.children if c.key == "North")
+    assert north.level == "region" and north.n_zones == 2
+    assert [c.key for c in north.children] == ["Town_A", "Town_B"]
+    assert north.phase1_existing_by_priority_label["Very High"] == 2
+    assert north.phase2_sum_final_score == sum(r.final_score for r in out.phase2.ranked_elements)
+
+    # zones without a parent path hang off the root
+    assert any(c.level == "zone" and c.key == "Z3" for c in root.children)
+
+def test_rollup_covers_every_ranked_asset_and_keys_children_by_level():
+    cfg = replace(ModuleConfig.default(), phase2_top_n=1)
+    zones = [
+        ZoneHazardInputs("North", 5, 5, 5, meta={"region": "North"}),
+        ZoneHazardInputs("Z2", 4, 4, 4, meta={"region": "North"}),
+    ]
+    counts = [ExposureCounts("North", {"roads": 2}), ExposureCounts("Z2", {"roads": 1})]
+    assets = [ExposureItem("r1", "roads", "North"), ExposureItem("r2", "roads", "North"), ExposureItem("r3", "roads", "Z2")]
+
+    out = run_all(zone_hazards=zones, assets=assets, exposure_counts=counts, cfg=cfg)
+    assert len(out.phase2.ranked_elements) == 1
+    assert out.rollup.phase2_n_ranked == 3
+
+    (north,) = out.rollup.children
+    assert north.level == "region" and north.n_zones == 2
+    assert sorted((c.level, c.key) for c in north.children) == [("zone", "North"), ("zone", "Z2")]
+
+    with pytest.raises(ValueError, match="Duplicate zone_id"):
+        run_all(zone_hazards=zones + [ZoneHazardInputs("Z2", 1, 1, 1)], assets=[], exposure_counts=[], cfg=cfg)
@@ -0,0 +1,39 @@
+from dataclasses import replace
+
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.io import expand_assets
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.partitioned import merge_partitions, rank_partitioned
+from mrb_longterm.pipeline import build_candidates
+from mrb_longterm.scoring import diminishing_returns_rank, zoning_from_inputs
+
+def _candidates():
+    zones = [ZoneHazardInputs(f"Z{i}", 1 + i % 5, 1 + (i * 2) % 5, 3) for i in range(12)]
+    counts = [ExposureCounts(z.zone_id, {"roads": 1 + i % 4, "schools": i % 3, "shelters": 1}) for i, z in enumerate(zones)]
+    return build_candidates(zoning=zoning_from_inputs(zones), assets=expand_assets(counts))
+
+def test_per_zone_ranking_parallel_matches_serial():
+    cfg = ModuleConfig.default()
+    cands = _candidates()
+
+    serial = rank_partitioned(cands, cfg, max_workers=1)
+    parallel = rank_partitioned(cands, cfg, max_workers=2)
+    assert parallel == serial
+
+    z3 = [c for c in cands if c.zone_id == "Z3"]
+    assert serial["Z3"] == diminishing_returns_rank(z3, cfg)
+
+    merged = merge_partitions(serial)
+    assert len(merged) == len(cands)
+    scores = [r.final_score for r in merged]
+    assert scores == sorted(scores, reverse=True)
+
+def test_merge_handles_non_decaying_partitions():
+    cfg = replace(ModuleConfig.default(), alpha_min=1.2, alpha_max=1.5)  # weights grow: quadratic fallback
+    partitions = rank_partitioned(_candidates(), cfg, max_workers=1)
+    assert any(a.final_score < b.final_score for ranked in partitions.values() for a, b in zip(ranked, ranked[1:]))
+
+    merged = merge_partitions(partitions)
+    scores = [r.final_score for r in merged]
+    assert scores == sorted(scores, reverse=True)
+    assert merge_partitions(partitions, 5) == merged[:5]
@@ -15,3 +15,23 @@ def test_phase1_outputs_existing_and_gaps():
 
     # Gaps should include shelters (value 5 in phase1 table)
     assert any(g.zone_id == "Z1" and g.element_type == "shelters" for g in out.gaps)
+
+def test_phase1_gap_index_lookups():
+    cfg = ModuleConfig.default()
+    zones = [ZoneHazardInputs("Z1", 5, 5, 5), ZoneHazardInputs("Z2", 3, 3, 3)]
+    counts = [ExposureCounts("Z1", {"hospitals_health_center": 1}), ExposureCounts("Z2", {})]
+
+    out = run_phase1(zone_hazards=zones, exposure_counts=counts, cfg=cfg)
+    idx = out.gap_index
+
+    assert idx.zones_missing("hospitals_health_center") == ["Z2"]
+    assert "shelters" in idx.missing_in_zone("Z1")
+    assert "hospitals_health_center" not in idx.missing_in_zone("Z1")
+
+    high_shelters = idx.query(element_type="shelters", hazard_class="high")
+    assert [g.zone_id for g in high_shelters] == ["Z1"]
+    assert idx.query(hazard_class="medium", value_index=5) == [
+        g for g in out.gaps if g.hazard_class == "medium" and g.value_index == 5
+    ]
+    assert idx.query(value_index=5) == [g for g in out.gaps if g.value_index == 5]
+    assert idx.query(value_index=5) and idx.query(value_index=0) == []
@@ -0,0 +1,55 @@
+import io
+import json
+
+import pytest
+
+from mrb_longterm.progress import Cancelled, CancelToken, ProgressReporter
+from mrb_longterm.stages import run_targets
+
+
+def _inputs(input_dir):
+    input_dir.mkdir()
+    (input_dir / "hazard_zones.json").write_text(json.dumps({
+        "zones": [{"zone_id": f"Z{i}", "HD": 1 + i % 5, "F": 4, "I": 3} for i in range(20)]
+    }), encoding="utf-8")
+    (input_dir / "exposure_by_zone.json").write_text(json.dumps({
+        "counts": [{"zone_id": f"Z{i}", "counts_by_type": {"shelters": 3, "water_storage": 2}} for i in range(20)]
+    }), encoding="utf-8")
+
+
+def test_progress_events_cover_stages_and_ranking_items(tmp_path):
+    _inputs(tmp_path / "input")
+    sink = io.StringIO()
+    with ProgressReporter(sink, interval=60) as progress:
+        run_targets(input_dir=tmp_path / "input", output_dir=tmp_path / "out", progress=progress)
+
+    events = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert events[0]["event"] == "start" and events[-1]["event"] == "done"
+    ranking_end = next(e for e in events if e["event"] == "stage_end" and e["stage"] == "ranking")
+    assert ranking_end["processed"] == ranking_end["total"] == 100
+    assert any(e["event"] == "stage_start" and e["stage"] == "write_outputs" for e in events)
+
+
+def test_cancelled_run_writes_nothing(tmp_path):
+    _inputs(tmp_path / "input")
+    token = CancelToken()
+    token.cancel("SIGTERM")
+    sink = io.StringIO()
+    with pytest.raises(Cancelled):
+        with ProgressReporter(sink, token=token) as progress:
+            run_targets(input_dir=tmp_path / "input", output_dir=tmp_path / "out", progress=progress)
+
+    assert not (tmp_path / "out").exists()
+    assert json.loads(sink.getvalue().splitlines()[-1])["event"] == "cancelled"
+
+
+def test_tick_honours_cancellation_at_chunk_boundaries():
+    progress = ProgressReporter(chunk=8)
+    progress.begin("loop", total=100)
+    for _ in range(5):
+        progress.tick()
+    progress.token.cancel("stop")
+    with pytest.raises(Cancelled, match="stop"):
+        for _ in range(100):
+            progress.tick()
+    assert progress.processed == 8
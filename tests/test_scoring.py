@@ -1,6 +1,13 @@
+import random
+from dataclasses import replace
+
 import pytest
 
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.models import ElementPriority
 from mrb_longterm.scoring import (
+    _greedy_steps_heap,
+    _greedy_steps_quadratic,
     alpha_from_value,
     classify_hazard,
     compute_hazard_index,
@@ -36,3 +43,23 @@ def test_base_score_monotonic():
 def test_alpha_mapping():
     assert alpha_from_value(1, 0.55, 0.92) == pytest.approx(0.55)
     assert alpha_from_value(5, 0.55, 0.92) == pytest.approx(0.92)
+
+def test_heap_ranker_matches_quadratic_greedy():
+    rng = random.Random(7)
+    for alpha_min in (0.0, 0.55, 1.0):
+        cfg = replace(ModuleConfig.default(), alpha_min=alpha_min)
+        cands = [
+            ElementPriority(f"e{i}", rng.choice("abc"), "Z", 3, "medium", rng.randint(1, 5), "Low",
+                            float(rng.choice([100, 210, 305, 500])))
+            for i in range(80)
+        ]
+        assert list(_greedy_steps_heap(cands, cfg, {})) == list(_greedy_steps_quadratic(cands, cfg, {}))
+
+def test_heap_ranker_matches_quadratic_after_weights_underflow():
+    rng = random.Random(11)
+    cfg = replace(ModuleConfig.default(), alpha_min=0.1, alpha_max=0.2)  # 0.2 ** 470 == 0.0
+    cands = [
+        ElementPriority(f"e{i}", "a", "Z", 3, "medium", rng.randint(1, 5), "Low", float(rng.randint(1, 40)))
+        for i in range(700)
+    ]
+    assert list(_greedy_steps_heap(cands, cfg, {})) == list(_greedy_steps_quadratic(cands, cfg, {}))
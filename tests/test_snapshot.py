@@ -0,0 +1,35 @@
+import json
+
+from mrb_longterm.snapshot import SNAPSHOT_FILE, Snapshot, load_inputs, write_snapshot
+from mrb_longterm.validation import load_validated_raw_inputs
+from mrb_longterm.io import parse_exposure_counts, parse_zone_hazards
+
+def _write_inputs(d, roads=5):
+    (d / "hazard_zones.json").write_text(json.dumps({"zones": [
+        {"zone_id": "Z1", "HD": 5, "F": 4, "I": 3, "region": "North"},
+        {"zone_id": "Zé", "HD": 1, "F": 2, "I": 2},
+    ]}), encoding="utf-8")
+    (d / "exposure_by_zone.json").write_text(json.dumps({"counts": [
+        {"zone_id": "Zé", "counts_by_type": {"shelters": 0, "roads": 1}},
+        {"zone_id": "Z1", "counts_by_type": {"roads": roads, "schools": 2}},
+    ]}), encoding="utf-8")
+
+def test_snapshot_roundtrip_and_staleness(tmp_path):
+    _write_inputs(tmp_path)
+    raw = load_validated_raw_inputs(tmp_path)
+    expected = (parse_zone_hazards(raw["hazard_zones"]), parse_exposure_counts(raw["exposure_by_zone"]))
+
+    path = write_snapshot(tmp_path)
+    assert path.name == SNAPSHOT_FILE
+    snap = Snapshot(path)
+    assert snap.matches(tmp_path)
+    zones = snap.zone_hazards()
+    counts = snap.exposure_counts()
+    snap.close()
+    assert (zones, counts) == expected
+    assert [list(c.counts_by_type) for c in counts] == [["shelters", "roads"], ["roads", "schools"]]
+
+    # edited inputs: the stale snapshot is ignored
+    _write_inputs(tmp_path, roads=7)
+    _zones, counts = load_inputs(tmp_path)
+    assert counts[1].counts_by_type["roads"] == 7
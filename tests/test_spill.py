@@ -0,0 +1,31 @@
+import random
+from dataclasses import replace
+
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.io import encode_json, iter_encode_json
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.outputs import phase1_planification_doc
+from mrb_longterm.pipeline import run_phase1
+
+def _inputs(n_zones=40, seed=7):
+    rng = random.Random(seed)
+    types = ["roads", "schools", "shelters", "hospitals_health_center", "ports", "water_storage"]
+    zones = [ZoneHazardInputs(f"Z{i}", rng.randint(1, 5), rng.randint(1, 5), rng.randint(1, 5)) for i in range(n_zones)]
+    counts = [ExposureCounts(z.zone_id, {t: rng.randint(0, 3) for t in types}) for z in zones]
+    return zones, counts
+
+def test_spilled_phase1_matches_in_memory_order_and_bytes():
+    zones, counts = _inputs()
+    cfg = ModuleConfig.default()
+    mem = run_phase1(zone_hazards=zones, exposure_counts=counts, cfg=cfg)
+    spilled = run_phase1(zone_hazards=zones, exposure_counts=counts, cfg=replace(cfg, phase1_spill_run_size=7))
+
+    assert not isinstance(spilled.gaps, list)
+    assert list(spilled.existing) == mem.existing
+    assert list(spilled.gaps) == mem.gaps
+    assert len(spilled.gaps) == len(mem.gaps)
+    for hc in ("low", "medium", "high"):
+        assert list(spilled.gaps_grouped_by_hazard_class[hc]) == mem.gaps_grouped_by_hazard_class[hc]
+
+    streamed = "".join(iter_encode_json(phase1_planification_doc(spilled, cfg))).encode("utf-8")
+    assert streamed == encode_json(phase1_planification_doc(mem, cfg))
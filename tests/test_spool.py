@@ -0,0 +1,124 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from mrb_longterm import spool as spool_mod
+from mrb_longterm.spool import _Heartbeat, claim_next, reclaim_stale, run_job, submit_job
+
+
+def _write_inputs(input_dir: Path, n_zones: int) -> None:
+    input_dir.mkdir(parents=True)
+    (input_dir / "hazard_zones.json").write_text(json.dumps({
+        "zones": [{"zone_id": f"Z{i}", "HD": 1 + i % 5, "F": 3, "I": 4} for i in range(n_zones)]
+    }), encoding="utf-8")
+    (input_dir / "exposure_by_zone.json").write_text(json.dumps({
+        "counts": [{"zone_id": f"Z{i}", "counts_by_type": {"shelters": i % 3}} for i in range(n_zones)]
+    }), encoding="utf-8")
+
+
+def test_several_workers_drain_the_spool(tmp_path):
+    spool = tmp_path / "spool"
+    jobs = []
+    for j in range(6):
+        _write_inputs(tmp_path / f"in{j}", 3 + j)
+        jobs.append(submit_job(spool, tmp_path / f"in{j}", tmp_path / f"out{j}"))
+
+    src = str(Path(__file__).resolve().parents[1] / "src")
+    env = {**os.environ, "PYTHONPATH": src + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "mrb_longterm.cli", "worker", "--spool", str(spool), "--exit-when-idle"],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        for _ in range(3)
+    ]
+    for w in workers:
+        _, err = w.communicate(timeout=120)
+        assert w.returncode == 0, err.decode()
+
+    assert sorted(p.stem for p in (spool / "done").glob("*.json")) == sorted(jobs)
+    assert not list((spool / "pending").glob("*.json"))
+    assert not list((spool / "claimed").glob("*.json"))
+    assert not list((spool / "failed").glob("*.json"))
+    for j in range(6):
+        assert (tmp_path / f"out{j}" / "summary.json").exists()
+
+
+def test_stale_claim_is_requeued_then_failed(tmp_path):
+    spool = tmp_path / "spool"
+    job_id = submit_job(spool, tmp_path / "in", tmp_path / "out")
+    claimed = claim_next(spool)
+    assert claimed is not None and claim_next(spool) is None
+
+    assert reclaim_stale(spool, stale_after=60) == []
+    old = time.time() - 120
+    os.utime(claimed, (old, old))
+    assert reclaim_stale(spool, stale_after=60, max_attempts=2) == [job_id]
+    requeued = json.loads((spool / "pending" / f"{job_id}.json").read_text(encoding="utf-8"))
+    assert requeued["attempts"] == 1
+
+    claimed = claim_next(spool)
+    os.utime(claimed, (old, old))
+    assert reclaim_stale(spool, stale_after=60, max_attempts=2) == [job_id]
+    assert (spool / "failed" / f"{job_id}.json").exists()
+    assert not list((spool / "pending").glob("*.json"))
+
+
+def test_staleness_uses_the_file_servers_clock(tmp_path, monkeypatch):
+    spool = tmp_path / "spool"
+    submit_job(spool, tmp_path / "in", tmp_path / "out")
+    claim_next(spool)
+    real_time = time.time
+    monkeypatch.setattr(spool_mod.time, "time", lambda: real_time() + 3600)  # this host's clock runs ahead
+    assert reclaim_stale(spool, stale_after=60) == []
+
+
+def test_heartbeat_survives_failed_writes(tmp_path, monkeypatch):
+    real_write = spool_mod.write_json_atomic
+    calls = []
+
+    def flaky_write(path, data):
+        calls.append(path)
+        if len(calls) in (2, 3):  # the first two beats after entering fail
+            raise OSError("mount unavailable")
+        return real_write(path, data)
+
+    monkeypatch.setattr(spool_mod, "write_json_atomic", flaky_write)
+    with _Heartbeat(tmp_path / "job.json", "w1", interval=0.01) as hb:
+        deadline = time.time() + 10
+        while len(calls) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert hb.failures == 2 and len(calls) >= 5  # still beating after the failures
+
+
+def test_claim_is_fresh_and_survives_a_grab_after_rename(tmp_path, monkeypatch):
+    spool = tmp_path / "spool"
+    first = submit_job(spool, tmp_path / "in", tmp_path / "out")
+    second = submit_job(spool, tmp_path / "in", tmp_path / "out")
+    old = time.time() - 120
+    for p in (spool / "pending").glob("*.json"):
+        os.utime(p, (old, old))  # submitted long ago
+
+    real_rename = os.rename
+    reclaims = []
+
+    def rename_then_reclaim(src, dst):
+        real_rename(src, dst)
+        # another worker's reclaim pass lands between the rename and utime
+        reclaims.append(reclaim_stale(spool, stale_after=60))
+
+    monkeypatch.setattr(spool_mod.os, "rename", rename_then_reclaim)
+    claimed = claim_next(spool)
+    assert reclaims == [[]] and claimed is not None and claimed.stem == first
+
+    def rename_then_grab(src, dst):
+        real_rename(src, dst)
+        if Path(dst).stem == second:
+            os.unlink(dst)  # grabbed by a reclaimer before our utime
+
+    monkeypatch.setattr(spool_mod.os, "rename", rename_then_grab)
+    assert claim_next(spool) is None  # the grabbed job is skipped, no FileNotFoundError
+    assert run_job(spool, spool / "claimed" / f"{second}.json", "w1") is None
@@ -0,0 +1,25 @@
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.stages import StageRunner
+
+def _seeds():
+    return {
+        "cfg": ModuleConfig.default(),
+        "zone_hazards": [ZoneHazardInputs("Z1", 5, 5, 5), ZoneHazardInputs("Z2", 1, 1, 1)],
+        "exposure_counts": [ExposureCounts("Z1", {"roads": 2})],
+    }
+
+def test_only_phase1_matrix_skips_phase1_and_ranking():
+    runner = StageRunner(_seeds())
+    doc = runner.get("phase1_matrix")
+
+    assert runner.executed == ["zoning", "phase1_matrix"]
+    assert [len(r["cells"]) for r in doc["matrix_rows"]] == [len(doc["element_types"])] * 2
+
+def test_shared_intermediates_computed_once():
+    runner = StageRunner(_seeds())
+    runner.run(["summary", "phase2_matrix", "hierarchy_summary"])
+
+    assert runner.executed.count("zoning") == 1
+    assert runner.executed.count("phase1") == 1
+    assert runner.executed.count("ranking") == 1
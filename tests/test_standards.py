@@ -0,0 +1,91 @@
+from dataclasses import replace
+
+import pytest
+
+from mrb_longterm.columnar import phase1_matrix_columnar_files
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.outputs import phase1_matrix_doc
+from mrb_longterm.pipeline import run_phase1
+from mrb_longterm.scoring import zoning_from_inputs
+from mrb_longterm.standards import build_standards_table, parse_standards
+from mrb_longterm.validation import InputValidationError
+
+STANDARDS = {
+    "schools": {"attribute": "population", "per": 2500, "units": 1},
+    "shelters": {"attribute": "area_km2", "per": 10, "units": 2},
+}
+
+
+def test_expected_counts_and_gaps():
+    zones = [
+        ZoneHazardInputs("A", 4, 4, 4, meta={"population": 10000, "area_km2": 15}),
+        ZoneHazardInputs("B", 3, 3, 3, meta={"population": "30000", "area_km2": 0}),  # numeric string parsed
+        ZoneHazardInputs("C", 5, 5, 5, meta={"population": 0, "area_km2": "0.0"}),
+    ]
+    counts = {"A": {"schools": 1}, "B": {"schools": 12, "shelters": 1}}
+    table = build_standards_table(zones, counts, parse_standards(STANDARDS))
+
+    assert list(table.expected["schools"]) == [4, 12, 0]
+    assert list(table.gap["schools"]) == [3, 0, 0]
+    assert list(table.expected["shelters"]) == [3, 0, 0]  # ceil(15 * 2 / 10)
+    assert list(table.gap["shelters"]) == [3, 0, 0]
+
+
+def test_phase1_gaps_ranked_by_magnitude_times_priority():
+    zones = [
+        ZoneHazardInputs("BIG", 3, 3, 3, meta={"population": 50000}),
+        ZoneHazardInputs("SMALL", 5, 5, 5, meta={"population": 5000}),
+    ]
+    counts = [ExposureCounts("BIG", {"schools": 2}), ExposureCounts("SMALL", {})]
+    cfg = replace(ModuleConfig.default(), phase1_standards={"schools": STANDARDS["schools"]})
+    out = run_phase1(zone_hazards=zones, exposure_counts=counts, cfg=cfg)
+
+    schools = [g for g in out.gaps if g.element_type == "schools"]
+    assert [(g.zone_id, g.observed, g.expected, g.gap) for g in schools] == [("BIG", 2, 20, 18), ("SMALL", 0, 2, 2)]
+    assert out.gaps[0].zone_id == "BIG"  # 18 x priority beats every counts-only gap (1 x priority)
+
+
+def test_bad_standard_rejected():
+    with pytest.raises(ValueError):
+        parse_standards({"schools": {"attribute": "population"}})
+    with pytest.raises(ValueError, match="'school'"):
+        parse_standards({"school": {"attribute": "population", "per": 2500}})  # typo of "schools"
+
+
+def test_missing_or_non_numeric_attribute_is_a_problem():
+    zones = [
+        ZoneHazardInputs("A", 4, 4, 4, meta={"population": "many", "area_km2": 15}),
+        ZoneHazardInputs("B", 3, 3, 3, meta={"area_km2": True}),
+    ]
+    with pytest.raises(InputValidationError) as exc:
+        build_standards_table(zones, {}, parse_standards(STANDARDS))
+    assert exc.value.problems == [
+        "hazard_zones.json zone_id='A': population='many' is not a number (needed by phase1_standards['schools'])",
+        "hazard_zones.json zone_id='B': missing 'population' (needed by phase1_standards['schools'])",
+        "hazard_zones.json zone_id='B': area_km2=True is not a number (needed by phase1_standards['shelters'])",
+    ]
+
+
+def test_matrix_is_gap_follows_standards():
+    zones = [
+        ZoneHazardInputs("BIG", 3, 3, 3, meta={"population": 50000}),
+        ZoneHazardInputs("OK", 5, 5, 5, meta={"population": 2500}),
+    ]
+    counts = [ExposureCounts("BIG", {"schools": 2}), ExposureCounts("OK", {"schools": 1})]
+    cfg = replace(ModuleConfig.default(), phase1_standards={"schools": STANDARDS["schools"]})
+    zoning = zoning_from_inputs(zones)
+    gaps = {(g.zone_id, g.element_type) for g in run_phase1(zone_hazards=zones, exposure_counts=counts, cfg=cfg).gaps}
+
+    doc = phase1_matrix_doc(zoning, counts, cfg, zones)
+    cells = {(row["zone_id"], c["element_type"]): c["is_gap"] for row in doc["matrix_rows"] for c in row["cells"]}
+    assert cells[("BIG", "schools")] and not cells[("OK", "schools")]  # 2 < 20 schools is a gap, though count > 0
+    assert {k for k, is_gap in cells.items() if is_gap} == gaps
+    assert doc["mode"] == "planning-standards"
+    assert "planning standard" in doc["legend"]["is_gap_definition"]
+
+    bundle = phase1_matrix_columnar_files(zoning, counts, cfg, zones)
+    assert list(bundle.files["is_gap.i8"]) == [int(is_gap) for is_gap in cells.values()]
+
+    with pytest.raises(ValueError):
+        phase1_matrix_doc(zoning, counts, cfg)  # standards need the zone meta
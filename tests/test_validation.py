@@ -0,0 +1,28 @@
+import pytest
+
+from mrb_longterm.validation import InputValidationError, check_inputs, validate_inputs
+
+def test_valid_inputs_have_no_problems():
+    zones = {"zones": [{"zone_id": "Z1", "HD": 5, "F": 4, "I": 3}]}
+    counts = {"counts": [{"zone_id": "Z1", "counts_by_type": {"roads": 2, "shelters": 0}}]}
+    assert validate_inputs(zones, counts) == []
+
+def test_all_problems_reported_at_once():
+    zones = {"zones": [
+        {"zone_id": "Z1", "HD": 6, "F": 4, "I": 3},
+        {"zone_id": "Z1", "HD": 1, "F": 1, "I": 1},
+        {"zone_id": "Z2", "HD": 1, "F": 1},
+    ]}
+    counts = {"counts": [
+        {"zone_id": "Z1", "counts_by_type": {"roads": -1, "spaceports": 1}},
+        {"zone_id": "Z9", "counts_by_type": {"roads": 1}},
+    ]}
+
+    with pytest.raises(InputValidationError) as exc:
+        check_inputs(zones, counts)
+
+    problems = exc.value.problems
+    assert len(problems) == 6
+    text = "\n".join(problems)
+    for needle in ("HD=6", "duplicate zone_id", "missing I", "negative count", "'spaceports'", "orphan zone"):
+        assert needle in text
@@ -0,0 +1,69 @@
+from dataclasses import replace
+
+import pytest
+
+from mrb_longterm.config import ModuleConfig
+from mrb_longterm.io import expand_assets
+from mrb_longterm.models import ExposureCounts, ZoneHazardInputs
+from mrb_longterm.pipeline import build_candidates
+from mrb_longterm.scoring import diminishing_returns_rank, zoning_from_inputs
+from mrb_longterm.whatif import WhatIf
+
+ZONES = [ZoneHazardInputs(f"Z{i}", 1 + i % 5, 1 + (i * 3) % 5, 1 + (i * 2) % 5) for i in range(10)]
+COUNTS = [ExposureCounts(z.zone_id, {"industrial_infrastructure": i % 4, "schools": 1 + i % 2, "hospitals_health_center": i % 2}) for i, z in enumerate(ZONES)]
+
+
+def _full_rank(zones, counts, cfg, extra=()):
+    assets = expand_assets(counts) + expand_assets(list(extra))
+    return diminishing_returns_rank(build_candidates(zoning=zoning_from_inputs(zones), assets=assets), cfg)
+
+
+def _whatif(cfg):
+    zoning = zoning_from_inputs(ZONES)
+    return WhatIf(build_candidates(zoning=zoning, assets=expand_assets(COUNTS)), zoning, cfg)
+
+
+def test_add_asset_matches_full_rerun():
+    cfg = replace(ModuleConfig.default(), phase2_top_n=8)
+    wi = _whatif(cfg)
+    assert wi.ranked == _full_rank(ZONES, COUNTS, cfg)
+
+    res = wi.add_asset("Z4", "hospitals_health_center")
+    # added assets go after all existing candidates (they lose score ties)
+    full = _full_rank(ZONES, COUNTS, cfg, [ExposureCounts("Z4", {"hospitals_health_center": 1})])
+    ids = [r.element_id for r in full]
+
+    assert res.element_ids == ["Z4:hospitals_health_center:1"]
+    assert res.previous_ranks == {"Z4:hospitals_health_center:1": None}
+    assert res.new_ranks["Z4:hospitals_health_center:1"] == ids.index("Z4:hospitals_health_center:1") + 1
+    assert res.top_n == full[:8]
+    old_top = {r.element_id for r in wi.ranked[:8]}
+    assert set(res.displaced) == old_top - set(ids[:8])
+
+
+def test_zone_hazard_change_and_entry_threshold():
+    cfg = replace(ModuleConfig.default(), phase2_top_n=5)
+    wi = _whatif(cfg)
+
+    res = wi.set_zone_hazard("Z4", 1)
+    zones = [replace(z, HD=1, F=1, I=1) if z.zone_id == "Z4" else z for z in ZONES]
+    full = _full_rank(zones, COUNTS, cfg)
+    ids = [r.element_id for r in full]
+    assert res.top_n == full[:5]
+    for eid, rank in res.new_ranks.items():
+        assert rank == ids.index(eid) + 1
+
+    # an added asset enters the top N iff its base score beats the threshold
+    for zone in ("Z0", "Z4", "Z9"):
+        added = wi.add_asset(zone, "schools")
+        base = build_candidates(zoning=zoning_from_inputs(ZONES), assets=expand_assets(
+            [ExposureCounts(zone, {"schools": 1})]))[0].base_score
+        assert (added.new_ranks[added.element_ids[0]] <= 5) == (base > added.entry_threshold)
+
+
+def test_constrained_config_is_rejected():
+    for caps in ({"phase2_max_per_zone": 2}, {"phase2_max_per_hazard_class": 3},
+                 {"phase2_min_per_type": {"schools": 1}}):
+        with pytest.raises(ValueError, match="unconstrained"):
+            _whatif(replace(ModuleConfig.default(), **caps))
+    _whatif(replace(ModuleConfig.default(), phase2_min_per_type={"schools": 0}))